@@ -2,7 +2,7 @@
 """
 @input  依赖：tkinter, SpriteSplitter
 @output 导出：SpriteSplitterGUI
-@pos    图形界面入口与交互逻辑（含fit缩放补边对齐选项）
+@pos    图形界面入口与交互逻辑（含fit缩放补边对齐选项、Rect碎片合并距离、XY-Cut模式、Rect参数调整时基于检测缓存实时重新过滤（输入防抖）、多线程导出、zip/tar 归档输出、编码档位、可选运行报告；预览与拆分器共用原始模式的图片；Grid 模式可跳过空单元格，预览只在网格几何变化时重新计算单元格与判空）
 
 ⚠️ 一旦本文件被更新，务必更新以上注释
 
@@ -11,7 +11,7 @@
 
 功能：
 1. 拖放或选择精灵表图片
-2. 三种拆分模式（Grid/Rectangular/Data File）
+2. 四种拆分模式（Grid/Rectangular/Data File/XY-Cut）
 3. 实时预览
 4. 自定义输出设置
 5. 多语言支持（中文/英文）
@@ -27,6 +27,7 @@ from pathlib import Path
 
 # 导入核心拆分器
 from sprite_splitter import SpriteSplitter, SpriteRect, resolve_image_path_from_data_file
+import sprite_export
 
 # 导入多语言支持
 # 导入多语言支持
@@ -38,6 +39,9 @@ from version_checker import version_checker
 class SpriteSheetSplitterGUI:
     """精灵表拆分器图形界面"""
 
+    # Rect 参数连续输入时，停止输入该毫秒数后才重新拆分（防抖）
+    RECT_REFRESH_DELAY_MS = 200
+
     def __init__(self, root: tk.Tk):
         """
         初始化GUI
@@ -60,6 +64,8 @@ class SpriteSheetSplitterGUI:
         self.canvas_image_id = None  # 画布上的图片ID
         self.image_offset_x: int = 0  # 图片在画布上的X偏移
         self.image_offset_y: int = 0  # 图片在画布上的Y偏移
+        self._rect_refresh_job = None  # 待执行的 Rect 参数刷新（root.after 返回的ID）
+        self._grid_preview_cells = None  # Grid 预览缓存：(网格几何参数, 单元格列表, 判空结果)
 
         # 设置样式
         self._setup_styles()
@@ -315,6 +321,8 @@ class SpriteSheetSplitterGUI:
                        value="rect", command=self.on_mode_change).pack(side=tk.LEFT, padx=5)
         ttk.Radiobutton(modes_container, text=i18n.t("mode_data"), variable=self.split_mode,
                        value="data", command=self.on_mode_change).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(modes_container, text=i18n.t("mode_xycut"), variable=self.split_mode,
+                       value="xycut", command=self.on_mode_change).pack(side=tk.LEFT, padx=5)
 
         # Grid模式设置
         self.grid_frame = ttk.LabelFrame(splitter_frame, text=i18n.t("grid_settings"), padding=5)
@@ -371,6 +379,13 @@ class SpriteSheetSplitterGUI:
         margin_spinbox = ttk.Spinbox(grid_row6, from_=0, to=100, textvariable=self.margin_var, width=8)
         margin_spinbox.pack(side=tk.LEFT)
 
+        # 跳过全透明/纯背景色的单元格（预览同步过滤）
+        grid_row7 = ttk.Frame(self.grid_frame)
+        grid_row7.pack(fill=tk.X, pady=2)
+        self.skip_empty_var = tk.BooleanVar(value=False)
+        self.skip_empty_var.trace_add("write", self.on_grid_param_change)
+        ttk.Checkbutton(grid_row7, text=i18n.t("skip_empty"), variable=self.skip_empty_var).pack(side=tk.LEFT)
+
         # Rectangular模式设置（默认隐藏）
         self.rect_frame = ttk.LabelFrame(splitter_frame, text=i18n.t("rect_settings"), padding=5)
 
@@ -392,6 +407,25 @@ class SpriteSheetSplitterGUI:
         self.alpha_threshold_var = tk.StringVar(value="0")
         ttk.Spinbox(rect_row3, from_=0, to=255, textvariable=self.alpha_threshold_var, width=8).pack(side=tk.LEFT)
 
+        rect_row4 = ttk.Frame(self.rect_frame)
+        rect_row4.pack(fill=tk.X, pady=2)
+        ttk.Label(rect_row4, text=i18n.t("merge_distance"), width=12).pack(side=tk.LEFT)
+        self.merge_distance_var = tk.StringVar(value="0")
+        ttk.Spinbox(rect_row4, from_=0, to=200, textvariable=self.merge_distance_var, width=8).pack(side=tk.LEFT)
+        ttk.Label(rect_row4, text=i18n.t("merge_distance_hint"), foreground='#666666', font=('Helvetica', 9)).pack(side=tk.LEFT, padx=5)
+
+        rect_row5 = ttk.Frame(self.rect_frame)
+        rect_row5.pack(fill=tk.X, pady=2)
+        ttk.Label(rect_row5, text=i18n.t("min_density"), width=12).pack(side=tk.LEFT)
+        self.min_density_var = tk.StringVar(value="1")
+        ttk.Spinbox(rect_row5, from_=0, to=100, increment=0.5, textvariable=self.min_density_var, width=8).pack(side=tk.LEFT)
+        ttk.Label(rect_row5, text=i18n.t("min_density_hint"), foreground='#666666', font=('Helvetica', 9)).pack(side=tk.LEFT, padx=5)
+
+        # 已检测过的参数组合直接复用拆分器缓存，调整即时生效
+        for var in (self.min_width_var, self.min_height_var, self.alpha_threshold_var,
+                    self.merge_distance_var, self.min_density_var):
+            var.trace_add("write", self.on_rect_param_change)
+
         # Data File模式设置（默认隐藏）
         self.data_frame = ttk.LabelFrame(splitter_frame, text=i18n.t("data_settings"), padding=5)
 
@@ -486,6 +520,30 @@ class SpriteSheetSplitterGUI:
         ttk.Checkbutton(out_row8, text=i18n.t("remove_bg"), variable=self.remove_bg_var).pack(side=tk.LEFT)
         ttk.Label(out_row8, text=i18n.t("remove_bg_hint"), foreground='#666666', font=('Helvetica', 9)).pack(side=tk.LEFT, padx=5)
 
+        # 导出线程数
+        out_row9 = ttk.Frame(output_frame)
+        out_row9.pack(fill=tk.X, pady=2)
+        ttk.Label(out_row9, text=i18n.t("export_workers"), width=10).pack(side=tk.LEFT)
+        self.export_workers_var = tk.StringVar(value=str(min(4, os.cpu_count() or 1)))
+        ttk.Spinbox(out_row9, from_=1, to=32, textvariable=self.export_workers_var, width=5).pack(side=tk.LEFT)
+        ttk.Label(out_row9, text=i18n.t("export_workers_hint"), foreground='#666666', font=('Helvetica', 9)).pack(side=tk.LEFT, padx=5)
+
+        # 编码档位
+        out_row10 = ttk.Frame(output_frame)
+        out_row10.pack(fill=tk.X, pady=2)
+        ttk.Label(out_row10, text=i18n.t("encode_profile"), width=10).pack(side=tk.LEFT)
+        self.profile_var = tk.StringVar(value=sprite_export.DEFAULT_PROFILE)
+        ttk.Combobox(out_row10, textvariable=self.profile_var, values=list(sprite_export.ENCODING_PROFILES),
+                     width=10, state="readonly").pack(side=tk.LEFT)
+        ttk.Label(out_row10, text=i18n.t("encode_profile_hint"), foreground='#666666', font=('Helvetica', 9)).pack(side=tk.LEFT, padx=5)
+
+        # 运行报告（默认不写）
+        out_row11 = ttk.Frame(output_frame)
+        out_row11.pack(fill=tk.X, pady=2)
+        self.write_report_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(out_row11, text=i18n.t("write_report"), variable=self.write_report_var).pack(side=tk.LEFT)
+        ttk.Label(out_row11, text=i18n.t("write_report_hint"), foreground='#666666', font=('Helvetica', 9)).pack(side=tk.LEFT, padx=5)
+
         # 批量调整大小设置
         resize_frame = ttk.LabelFrame(splitter_frame, text=i18n.t("resize_settings"), padding=5)
         resize_frame.pack(fill=tk.X, pady=5)
@@ -742,7 +800,9 @@ class SpriteSheetSplitterGUI:
         try:
             self.image_path = file_path
             self.splitter = SpriteSplitter(file_path)
-            self.original_image = self.splitter.image.copy()
+            # 与拆分器共用同一份像素（保持原始模式），不再额外复制整张图
+            self.original_image = self.splitter.image
+            self._grid_preview_cells = None
 
             # 清空精灵列表
             self.sprite_listbox.delete(0, tk.END)
@@ -805,8 +865,8 @@ class SpriteSheetSplitterGUI:
             canvas_width = 600
             canvas_height = 400
 
-        # 创建预览图副本
-        preview = self.original_image.copy()
+        # 创建预览图副本（原图可能是调色板/灰度等模式，统一为 RGBA 显示）
+        preview = self.original_image.convert('RGBA')
 
         # 如果有精灵数据，在图片上绘制半透明遮罩
         if sprites:
@@ -839,7 +899,7 @@ class SpriteSheetSplitterGUI:
                     )
 
             # 将遮罩合成到预览图上
-            preview = Image.alpha_composite(preview.convert('RGBA'), overlay)
+            preview = Image.alpha_composite(preview, overlay)
 
         # 应用缩放
         scaled_width = int(self.original_image.width * self.zoom_level)
@@ -899,11 +959,51 @@ class SpriteSheetSplitterGUI:
             self.grid_frame.pack(fill=tk.X, pady=5, after=self.grid_frame.master.winfo_children()[0])
             # 触发一次预览更新
             self.on_grid_param_change()
-        elif mode == "rect":
+        elif mode in ("rect", "xycut"):
+            # XY-Cut 与 Rectangular 共用最小尺寸/Alpha阈值设置
             self.rect_frame.pack(fill=tk.X, pady=5, after=self.grid_frame.master.winfo_children()[0])
         elif mode == "data":
             self.data_frame.pack(fill=tk.X, pady=5, after=self.grid_frame.master.winfo_children()[0])
 
+    def on_rect_param_change(self, *args):
+        """
+        Rect参数变化时的处理 - 基于检测缓存实时重新拆分
+
+        拆分器已缓存当前 Alpha阈值/合并距离 的检测结果时，调整最小尺寸或密度
+        只需重新过滤缓存（毫秒级），此时直接刷新结果；未缓存的组合仍需点击"执行拆分"。
+        连续输入时每次变化都取消上一次待执行的刷新，停止输入 RECT_REFRESH_DELAY_MS 后只刷新一次
+        """
+        if self._rect_refresh_job is not None:
+            self.root.after_cancel(self._rect_refresh_job)
+        self._rect_refresh_job = self.root.after(self.RECT_REFRESH_DELAY_MS, self._refresh_rect_split)
+
+    def _refresh_rect_split(self):
+        """防抖到期后执行的 Rect 实时重新拆分"""
+        self._rect_refresh_job = None
+        if not self.splitter or not self.splitter.sprites:
+            return
+
+        if self.split_mode.get() != "rect":
+            return
+
+        try:
+            params = self._get_rect_params()
+        except ValueError:
+            return
+
+        if self.splitter.is_detection_cached(params["alpha_threshold"], params["merge_distance"]):
+            self.do_split()
+
+    def _get_rect_params(self) -> dict:
+        """读取Rect模式参数（无效输入抛出 ValueError）"""
+        return {
+            "min_width": int(self.min_width_var.get()),
+            "min_height": int(self.min_height_var.get()),
+            "alpha_threshold": int(self.alpha_threshold_var.get()),
+            "merge_distance": int(self.merge_distance_var.get()) if self.merge_distance_var.get() else 0,
+            "min_density": float(self.min_density_var.get()) / 100 if self.min_density_var.get() else 0.0,
+        }
+
     def on_grid_param_change(self, *args):
         """
         Grid参数变化时的处理 - 实时预览网格线
@@ -951,26 +1051,40 @@ class SpriteSheetSplitterGUI:
                 if rows > 0:
                     sprite_height = (effective_height - padding * (rows - 1)) // rows
 
-            # 构建预览用的精灵列表
-            preview_sprites = []
-            sprite_index = 0
-
-            for row in range(rows):
-                for col in range(columns):
-                    x = margin + col * (sprite_width + padding)
-                    y = margin + row * (sprite_height + padding)
-
-                    # 确保不超出图片边界
-                    if x + sprite_width <= img_width and y + sprite_height <= img_height:
-                        sprite = SpriteRect(
-                            x=x,
-                            y=y,
-                            width=sprite_width,
-                            height=sprite_height,
-                            name=f"sprite_{sprite_index:04d}"
-                        )
-                        preview_sprites.append(sprite)
-                        sprite_index += 1
+            # 构建预览用的精灵列表：只随网格几何（行列数、尺寸、间距、边距）变化，
+            # 其他触发（如切换"跳过空单元格"）直接复用上次的单元格与判空结果
+            cells_key = (columns, rows, sprite_width, sprite_height, padding, margin)
+            if self._grid_preview_cells is None or self._grid_preview_cells[0] != cells_key:
+                preview_sprites = []
+                sprite_index = 0
+
+                for row in range(rows):
+                    for col in range(columns):
+                        x = margin + col * (sprite_width + padding)
+                        y = margin + row * (sprite_height + padding)
+
+                        # 确保不超出图片边界
+                        if x + sprite_width <= img_width and y + sprite_height <= img_height:
+                            sprite = SpriteRect(
+                                x=x,
+                                y=y,
+                                width=sprite_width,
+                                height=sprite_height,
+                                name=f"sprite_{sprite_index:04d}"
+                            )
+                            preview_sprites.append(sprite)
+                            sprite_index += 1
+                self._grid_preview_cells = (cells_key, preview_sprites, None)
+            _, preview_sprites, empty = self._grid_preview_cells
+
+            if self.skip_empty_var.get() and self.splitter and preview_sprites:
+                if empty is None:
+                    # 拆分器缓存了整表判空索引，这里只做一次批量查询
+                    empty = self.splitter.empty_cells(
+                        [(s.x, s.y, s.x + s.width, s.y + s.height) for s in preview_sprites]
+                    )
+                    self._grid_preview_cells = (cells_key, preview_sprites, empty)
+                preview_sprites = [s for s, is_empty in zip(preview_sprites, empty) if not is_empty]
 
             # 更新预览（但不更新splitter的sprites，那是执行拆分时做的事）
             self.update_preview(preview_sprites, self.selected_sprite_index)
@@ -1022,18 +1136,18 @@ class SpriteSheetSplitterGUI:
                     sprite_width=0,  # 设为0，让核心方法根据列数行数计算
                     sprite_height=0,
                     padding=padding,
-                    margin=margin
+                    margin=margin,
+                    skip_empty=self.skip_empty_var.get()
                 )
 
             elif mode == "rect":
-                min_width = int(self.min_width_var.get())
-                min_height = int(self.min_height_var.get())
-                alpha_threshold = int(self.alpha_threshold_var.get())
-
-                sprites = self.splitter.split_by_rectangle(
-                    min_width=min_width,
-                    min_height=min_height,
-                    alpha_threshold=alpha_threshold
+                sprites = self.splitter.split_by_rectangle(**self._get_rect_params())
+
+            elif mode == "xycut":
+                sprites = self.splitter.split_by_xycut(
+                    min_width=int(self.min_width_var.get()),
+                    min_height=int(self.min_height_var.get()),
+                    alpha_threshold=int(self.alpha_threshold_var.get())
                 )
 
             elif mode == "data":
@@ -1076,6 +1190,7 @@ class SpriteSheetSplitterGUI:
             edge_crop = int(self.edge_crop_var.get()) if self.edge_crop_var.get() else 0
             smart_edge = self.smart_edge_var.get()
             remove_bg = self.remove_bg_var.get()
+            workers = int(self.export_workers_var.get()) if self.export_workers_var.get() else 1
             restore_source = self.restore_source_var.get()
             origin_text = self.offset_origin_var.get()
             origin_map = {
@@ -1087,27 +1202,46 @@ class SpriteSheetSplitterGUI:
             # 获取缩放参数
             resize_mode, resize_scale, resize_width, resize_height, pad_align, pad_smart = self._get_resize_params()
 
-            saved_files = self.splitter.save_sprites(
-                output_dir=output_dir,
-                name_template=name_template,
-                format=format,
-                trim=trim,
-                edge_crop=edge_crop,
-                smart_edge_detect=smart_edge,
-                remove_bg=remove_bg,
-                resize_mode=resize_mode,
-                resize_scale=resize_scale,
-                resize_width=resize_width,
-                resize_height=resize_height,
-                pad_align=pad_align,
-                pad_smart=pad_smart,
-                restore_source=restore_source,
-                offset_origin=offset_origin
-            )
+            # 输出路径为 zip/tar 归档时，精灵与数据文件写入同一归档（GUI 不支持写到标准输出）
+            archive = None
+            if output_dir != "-" and sprite_export.is_archive_target(output_dir):
+                archive = sprite_export.open_sink(output_dir)
+            try:
+                saved_files = self.splitter.save_sprites(
+                    output_dir=output_dir,
+                    name_template=name_template,
+                    format=format,
+                    trim=trim,
+                    edge_crop=edge_crop,
+                    smart_edge_detect=smart_edge,
+                    remove_bg=remove_bg,
+                    resize_mode=resize_mode,
+                    resize_scale=resize_scale,
+                    resize_width=resize_width,
+                    resize_height=resize_height,
+                    pad_align=pad_align,
+                    pad_smart=pad_smart,
+                    restore_source=restore_source,
+                    offset_origin=offset_origin,
+                    workers=workers,
+                    sink=archive,
+                    profile=self.profile_var.get()
+                )
 
-            # 同时导出数据文件
-            data_path = os.path.join(output_dir, '_sprites.json')
-            self.splitter.export_data_file(data_path)
+                # 同时导出数据文件（勾选时附带运行报告）
+                write_report = self.write_report_var.get()
+                if archive is not None:
+                    self.splitter.export_data_file('_sprites.json', sink=archive)
+                    if write_report:
+                        self.splitter.export_report_file(sprite_export.REPORT_NAME, sink=archive)
+                else:
+                    data_path = os.path.join(output_dir, '_sprites.json')
+                    self.splitter.export_data_file(data_path)
+                    if write_report:
+                        self.splitter.export_report_file(os.path.join(output_dir, sprite_export.REPORT_NAME))
+            finally:
+                if archive is not None:
+                    archive.close()
 
             self.status_label.config(text=i18n.t("status_saved_to", count=len(saved_files), path=output_dir))
             messagebox.showinfo(i18n.t("title_success"), i18n.t("msg_save_success", count=len(saved_files), path=output_dir))
@@ -1312,6 +1446,7 @@ class SpriteSheetSplitterGUI:
         self.image_path = ""
         self.splitter = None
         self.original_image = None
+        self._grid_preview_cells = None
         self.preview_image = None
 
         self.canvas.delete("all")
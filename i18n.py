@@ -57,6 +57,7 @@ LANGUAGES = {
         "mode_grid": "Grid",
         "mode_rect": "Rectangular",
         "mode_data": "数据文件",
+        "mode_xycut": "XY-Cut",
 
         # Grid设置
         "grid_settings": "Grid设置",
@@ -66,12 +67,23 @@ LANGUAGES = {
         "sprite_height": "精灵高度:",
         "padding": "形状填充:",
         "margin": "边框填充:",
+        "skip_empty": "跳过空单元格（全透明/纯背景）",
 
         # Rectangular设置
         "rect_settings": "Rectangular设置",
         "min_width": "最小宽度:",
         "min_height": "最小高度:",
         "alpha_threshold": "Alpha阈值:",
+        "merge_distance": "碎片合并:",
+        "merge_distance_hint": "px (合并相距很近的碎片)",
+        "min_density": "最小密度:",
+        "min_density_hint": "% (低于此填充率视为噪点)",
+        "export_workers": "导出线程:",
+        "export_workers_hint": "(多线程并发编码写入)",
+        "encode_profile": "编码档位:",
+        "encode_profile_hint": "(fast 最快 / smallest 最小)",
+        "write_report": "写入运行报告",
+        "write_report_hint": "(_report.json：档位、耗时、字节数)",
 
         # 数据文件设置
         "data_settings": "数据文件设置",
@@ -202,10 +214,11 @@ LANGUAGES = {
    - Grid: 按固定网格拆分，适合规则排列的精灵
    - Rectangular: 自动检测透明边界分隔的区域
    - 数据文件: 使用JSON数据文件拆分
+   - XY-Cut: 沿整行/整列透明间隔递归切分，适合按行列排布但单元尺寸不一的精灵表
 
 3. 配置拆分参数
    - Grid模式: 设置列数/行数或精灵尺寸
-   - Rectangular模式: 设置最小尺寸和Alpha阈值
+   - Rectangular/XY-Cut模式: 设置最小尺寸和Alpha阈值
    - 数据文件模式: 选择JSON文件
 
 4. 执行拆分
@@ -293,6 +306,7 @@ LANGUAGES = {
         "mode_grid": "Grid",
         "mode_rect": "Rectangular",
         "mode_data": "Data File",
+        "mode_xycut": "XY-Cut",
 
         # Grid settings
         "grid_settings": "Grid Settings",
@@ -302,12 +316,23 @@ LANGUAGES = {
         "sprite_height": "Sprite Height:",
         "padding": "Padding:",
         "margin": "Margin:",
+        "skip_empty": "Skip empty cells (transparent/background only)",
 
         # Rectangular settings
         "rect_settings": "Rectangular Settings",
         "min_width": "Min Width:",
         "min_height": "Min Height:",
         "alpha_threshold": "Alpha Threshold:",
+        "merge_distance": "Merge Gap:",
+        "merge_distance_hint": "px (merge nearby fragments)",
+        "min_density": "Min Density:",
+        "min_density_hint": "% (sparser regions are noise)",
+        "export_workers": "Workers:",
+        "export_workers_hint": "(parallel encode & write)",
+        "encode_profile": "Profile:",
+        "encode_profile_hint": "(fast / balanced / smallest)",
+        "write_report": "Write run report",
+        "write_report_hint": "(_report.json: profile, time, bytes)",
 
         # Data file settings
         "data_settings": "Data File Settings",
@@ -430,10 +455,11 @@ Usage Guide:
    - Grid: Fixed grid splitting
    - Rectangular: Auto detect regions by transparent boundaries
    - Data File: Split using JSON data
+   - XY-Cut: Recursively cut along fully transparent rows/columns (row/column layouts with irregular cells)
 
 3. Configure Parameters
    - Grid: Set columns/rows or sprite size
-   - Rectangular: Set min size and alpha threshold
+   - Rectangular/XY-Cut: Set min size and alpha threshold
    - Data File: Select JSON file
 
 4. Execute Split
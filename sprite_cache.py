@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow
+@output 导出：DetectionCache, image_digest, bands_digest, CACHE_VERSION, DEFAULT_CACHE_SIZE_MB
+@pos    拆分结果的磁盘缓存：以解码后像素的内容哈希（P 模式含调色板与透明色）+ 拆分参数为键（可按流式解码的水平带计算，无需整图），按修改时间做 LRU 淘汰
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+
+缓存布局：
+- 每个条目一个 JSON 文件（<key>.json），内容为精灵矩形字段列表
+- 命中时刷新文件修改时间，写入后按修改时间从旧到新淘汰，直到总大小不超过上限
+- 文件损坏或版本不符视为未命中并删除
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+
+# 缓存格式版本（检测结果语义变化时递增，使旧条目失效）
+CACHE_VERSION = 2
+
+# 默认缓存大小上限(MB)
+DEFAULT_CACHE_SIZE_MB = 64
+
+# 计算内容哈希时每次读取的行数（避免一次性复制整张图的像素）
+HASH_BAND_ROWS = 256
+
+
+def image_digest(img: Image.Image) -> str:
+    """
+    按水平带计算解码后像素的内容哈希（含模式与尺寸）
+
+    P 等保持原始模式的图片像素只是调色板下标，调色板与透明色（tRNS）一并计入哈希。
+    """
+    bands = (
+        img.crop((0, top, img.width, min(img.height, top + HASH_BAND_ROWS)))
+        for top in range(0, max(1, img.height), HASH_BAND_ROWS)
+    )
+    return bands_digest(img.size, bands)
+
+
+def bands_digest(size: Tuple[int, int], bands: Iterable[Image.Image]) -> str:
+    """
+    依次喂入自上而下的水平带计算内容哈希，与对整张图调用 image_digest 的结果一致
+
+    模式、调色板与透明色取自第一条带；带高不限（如流式解码的 PNG 水平带）。
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for index, band in enumerate(bands):
+        if index == 0:
+            digest.update(f"{band.mode}:{size[0]}x{size[1]}".encode("ascii"))
+            palette = band.getpalette() if band.mode in ("P", "PA") else None
+            digest.update(repr((palette, band.info.get("transparency"))).encode("ascii"))
+        digest.update(band.tobytes())
+    return digest.hexdigest()
+
+
+class DetectionCache:
+    """拆分结果磁盘缓存（按修改时间 LRU 淘汰）"""
+
+    def __init__(self, cache_dir: str, max_size_mb: float = DEFAULT_CACHE_SIZE_MB):
+        """
+        Args:
+            cache_dir: 缓存目录（不存在时自动创建）
+            max_size_mb: 缓存总大小上限(MB)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max(0.0, max_size_mb) * 1024 * 1024)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(digest: str, mode: str, params: Dict) -> str:
+        """由内容哈希、拆分模式与参数生成缓存键"""
+        payload = json.dumps(
+            {"v": CACHE_VERSION, "image": digest, "mode": mode, "params": params},
+            sort_keys=True
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """读取缓存条目，未命中返回 None；命中时刷新修改时间"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION or not isinstance(data.get("sprites"), list):
+                raise ValueError("缓存版本不符")
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, AttributeError):
+            # 损坏或过期的条目直接丢弃
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return data["sprites"]
+
+    def put(self, key: str, sprites: List[Dict]):
+        """写入缓存条目（临时文件 + 重命名保证原子性），随后按上限淘汰"""
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "sprites": sprites}, f)
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        self.evict()
+
+    def evict(self):
+        """按修改时间从旧到新删除条目，直到总大小不超过上限"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, entry.path, stat.st_size))
+            total += stat.st_size
+
+        entries.sort()
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
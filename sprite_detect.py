@@ -0,0 +1,1597 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, numpy（可选）
+@output 导出：Component, ComponentMerger, RunMask, resolve_engine, detect_background_color,
+              build_background_mask, build_foreground_mask, mask_runs, label_runs,
+              find_components, find_components_tiled, find_components_banded, find_components_parallel,
+              find_components_pyramid,
+              merge_nearby_components, select_components, tile_size_for_memory, xy_cut, edge_connected_mask,
+              SeparatorIndex, is_separator_line, separator_line_flags, infer_grid_from_separators,
+              SEPARATOR_SCAN, NATIVE_MODES, OpacityIndex, opacity_index, OPACITY_INDEX_MAX_MB, empty_cells,
+              empty_cells_index, cells_empty,
+              frame_view, frame_separator_boxes, frame_edge_background, frame_alpha_bboxes
+@pos    精灵检测引擎：共用背景掩码构建、游程（RLE）连通域标记（NumPy 加速，纯 Pillow 回退），
+        分块限内存/多进程分带（均可直接消费流式解码的水平带）/由粗到细金字塔检测（候选区域过密时回退整图标记）、空间哈希碎片合并、递归 XY 切分、边缘连通区域掩码、
+        整表分隔线索引（智能边缘检测的逐单元格查表与网格推断；整表分隔线按水平带逐通道 uint8 比较）；掩码直接在 P/L/LA/RGB 原始模式上构建；
+        不透明像素积分图索引（区域计数/判空 O(1)，紧致包围盒 O(log)）；整表批量判断空单元格（索引可复用于多次查询）；
+        等尺寸帧的 (N, H, W, 4) 批量数组变换（边缘分隔线、边缘背景、trim 包围盒）
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+
+检测流程：
+1. 用 Pillow 的 C 级通道运算一次性生成整张图的前景掩码（不透明且不接近背景色）；
+   背景掩码构建器同时供去背景、分隔线检测使用
+2. 把掩码按行拆成前景游程（run），NumPy 用 diff，纯 Pillow 用正则在字节串上扫描
+3. 在游程上做 4 连通标记（相邻两行游程区间重叠即连通），得到每个连通域的 bbox 与像素数
+
+结果与 SpriteSplitter 中逐像素洪水填充的参考实现完全一致。
+"""
+
+import re
+from bisect import bisect_right
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageChops
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，缺失时使用纯 Pillow 路径
+    np = None
+
+
+# 与参考实现保持一致的颜色容差（RGB 三通道差值之和 < 容差 * 3 视为背景）
+COLOR_TOLERANCE = 30
+
+# 默认像素密度阈值（连通域像素数 / bbox 面积），用于过滤噪点
+MIN_DENSITY = 0.01
+
+ENGINES = ("auto", "numpy", "pillow", "reference")
+
+# 分块检测：默认分块边长、最小分块边长与每像素估算字节数
+DEFAULT_TILE_SIZE = 1024
+MIN_TILE_SIZE = 64
+TILE_BYTES_PER_PIXEL = 16
+
+# 多进程分带检测：每个进程分到的带数（略多于进程数以平衡负载）
+BANDS_PER_WORKER = 2
+
+# 金字塔检测的最大缩小倍数（保证单个前景像素在缩小后仍非零）
+PYRAMID_MAX_FACTOR = 16
+# 金字塔检测：逐区域精确标记每个区域约有固定开销，候选区域平均占有的像素少于该值
+# （区域密集，如稀疏大图上数千个小精灵）时，直接对整张掩码做一次全分辨率标记更快
+PYRAMID_PIXELS_PER_REGION = 32768
+
+# 分隔线检测：每条边最多检查的行/列数，以及分隔线首像素的最低平均亮度（浅色分隔线）
+SEPARATOR_SCAN = 10
+SEPARATOR_MIN_BRIGHTNESS = 200
+# 整表分隔线检测按该行数分带处理，内存只随带高增长（不为整张图生成 RGB 副本）
+SEPARATOR_BAND_ROWS = 256
+
+# 掩码构建与分隔线检测可直接处理、无需先整张转成 RGBA 的图片模式
+NATIVE_MODES = ("RGBA", "RGB", "LA", "L", "P")
+
+# 不透明像素积分图（int32，每像素 4 字节）的内存上限(MB)，超出时改用游程掩码回答同样的查询
+OPACITY_INDEX_MAX_MB = 128
+
+_RUN_PATTERN = re.compile(rb"[^\x00]+")
+
+
+@dataclass
+class Component:
+    """连通域统计信息"""
+    x: int
+    y: int
+    width: int
+    height: int
+    pixels: int
+    first_x: int = 0  # 连通域在最上一行中最左像素的 x，用于还原参考实现的扫描顺序
+
+
+def resolve_engine(engine: str) -> str:
+    """把 engine 参数解析为实际使用的检测引擎"""
+    engine = (engine or "auto").lower()
+    if engine not in ENGINES:
+        raise ValueError(f"不支持的检测引擎: {engine}（可选: {', '.join(ENGINES)}）")
+    if engine == "auto":
+        return "numpy" if np is not None else "pillow"
+    if engine == "numpy" and np is None:
+        raise ValueError("numpy 引擎需要安装 numpy")
+    return engine
+
+
+def detect_background_color(img: Image.Image, alpha_threshold: int = 0) -> Optional[Tuple[int, int, int]]:
+    """
+    智能检测背景色 - 从四个角采样
+
+    Returns:
+        透明背景返回 None，否则返回纯色背景的 RGB
+    """
+    width, height = img.size
+    corners = [(0, 0), (width - 1, 0), (0, height - 1), (width - 1, height - 1)]
+    corner_samples = []
+    for x, y in corners:
+        pixel = img.getpixel((x, y))
+        if img.mode != "RGBA":
+            pixel = img.crop((x, y, x + 1, y + 1)).convert("RGBA").getpixel((0, 0))
+        corner_samples.append(pixel)
+
+    if any(c[3] <= alpha_threshold for c in corner_samples):
+        return None
+
+    # 只比较RGB，忽略少许差异
+    def color_key(c):
+        return (c[0] // 10, c[1] // 10, c[2] // 10)
+
+    most_common = Counter(color_key(c) for c in corner_samples).most_common(1)[0][0]
+    for c in corner_samples:
+        if color_key(c) == most_common:
+            return tuple(c[:3])
+    return None
+
+
+def _index_colors(img: Image.Image) -> List[Tuple[int, int, int, int]]:
+    """L/P 图每个像素值（灰度或调色板索引）转成 RGBA 后的颜色，与 convert("RGBA") 逐像素一致"""
+    if img.mode == "L":
+        return [(value, value, value, 255) for value in range(256)]
+    lookup = Image.new("P", (256, 1))
+    lookup.putdata(range(256))
+    palette_mode = img.palette.mode if img.palette else "RGB"
+    lookup.putpalette(img.getpalette(palette_mode), palette_mode)
+    lookup.info = dict(img.info)
+    rgba = lookup.convert("RGBA").tobytes()
+    return [tuple(rgba[i * 4:i * 4 + 4]) for i in range(256)]
+
+
+def _index_mask(img: Image.Image, table: List[int]) -> Image.Image:
+    """按像素值（灰度或调色板索引）查表生成 "L" 掩码"""
+    if img.mode == "L":
+        return img.point(table)
+    # 调色板换成灰度 (v, v, v) 后转 L 即得到查表结果（亮度公式对灰度颜色是恒等映射）
+    keyed = img.copy()
+    keyed.info.pop("transparency", None)
+    keyed.putpalette([value for value in table for _ in range(3)])
+    return keyed.convert("L")
+
+
+def _is_background_color(pixel, color, tolerance: int, metric: str, alpha_threshold: Optional[int]) -> bool:
+    """单个 RGBA 颜色的背景判定（与 build_background_mask 的通道运算一致）"""
+    if alpha_threshold is not None and pixel[3] <= alpha_threshold:
+        return True
+    if color is None:
+        return False
+    diffs = [abs(pixel[i] - color[i]) for i in range(3)]
+    if metric == "sum":
+        return min(255, sum(diffs)) < tolerance * 3
+    return max(diffs) <= tolerance
+
+
+def build_background_mask(
+    img: Image.Image,
+    color: Optional[Tuple[int, ...]] = None,
+    tolerance: int = COLOR_TOLERANCE,
+    metric: str = "sum",
+    alpha_threshold: Optional[int] = None
+) -> Image.Image:
+    """
+    生成背景掩码（"L" 模式，背景 255，其余 0），所有背景判定共用
+
+    Args:
+        img: 整张图或裁剪区域
+        color: 背景色（只比较 RGB）；None 表示不做颜色判定
+        tolerance: 颜色容差
+        metric: "sum" - RGB 差值之和 < tolerance * 3 视为背景（Rect 检测）；
+                "channel" - 每个通道差值都 <= tolerance 视为背景（去背景/分隔线检测）
+        alpha_threshold: 不为 None 时，alpha <= alpha_threshold 的像素也视为背景
+
+    全部为 Pillow 的 C 级通道运算（ImageChops + point 查找表），不做逐像素 Python 循环。
+    L/P 图按 256 个像素值查表，LA/RGB 只在已有通道上运算，都不会整张转成 RGBA。
+    """
+    if metric not in ("sum", "channel"):
+        raise ValueError(f"不支持的颜色比较方式: {metric}")
+    if img.mode not in NATIVE_MODES:
+        img = img.convert("RGBA")
+    if img.mode in ("L", "P"):
+        table = [255 if _is_background_color(pixel, color, tolerance, metric, alpha_threshold) else 0
+                 for pixel in _index_colors(img)]
+        return _index_mask(img, table)
+
+    mask = None
+    if color is not None and img.mode == "LA":
+        table = [255 if _is_background_color((value, value, value, 255), color, tolerance, metric, None) else 0
+                 for value in range(256)]
+        mask = img.getchannel("L").point(table)
+    elif color is not None:
+        rgb = img if img.mode == "RGB" else img.convert("RGB")
+        diff = ImageChops.difference(rgb, Image.new("RGB", img.size, tuple(color[:3])))
+        red, green, blue = diff.split()
+        if metric == "sum":
+            # add 在 255 处截断，但截断不改变 "< limit" 的判断结果（limit <= 255）
+            total = ImageChops.add(ImageChops.add(red, green), blue)
+            limit = tolerance * 3
+            mask = total.point([255 if value < limit else 0 for value in range(256)])
+        else:
+            peak = ImageChops.lighter(ImageChops.lighter(red, green), blue)
+            mask = peak.point([255 if value <= tolerance else 0 for value in range(256)])
+
+    if alpha_threshold is not None and "A" in img.mode:
+        alpha = img.getchannel("A")
+        transparent = alpha.point([255 if value <= alpha_threshold else 0 for value in range(256)])
+        mask = transparent if mask is None else ImageChops.lighter(mask, transparent)
+    elif alpha_threshold is not None and alpha_threshold >= 255:
+        # 无 alpha 通道的像素视为完全不透明
+        mask = Image.new("L", img.size, 255)
+
+    if mask is None:
+        mask = Image.new("L", img.size, 0)
+    return mask
+
+
+def build_foreground_mask(
+    img: Image.Image,
+    alpha_threshold: int = 0,
+    bg_color: Optional[Tuple[int, int, int]] = None,
+    tolerance: int = COLOR_TOLERANCE
+) -> Image.Image:
+    """
+    生成前景掩码（"L" 模式，前景 255，背景 0）
+
+    即 Rect 检测背景掩码的反相：alpha <= alpha_threshold 为背景；
+    有纯色背景时，RGB 差值之和 < tolerance * 3 也视为背景。
+    """
+    return ImageChops.invert(build_background_mask(img, bg_color, tolerance, "sum", alpha_threshold))
+
+
+def mask_runs(mask: Image.Image, engine: str = "auto"):
+    """
+    把掩码拆成按行排列的前景游程
+
+    Returns:
+        (rows, starts, ends)：游程所在行、起点 x（含）、终点 x（不含），按 (行, 起点) 升序。
+        numpy 引擎返回 ndarray，pillow 引擎返回 list。
+    """
+    engine = resolve_engine(engine)
+    width, height = mask.size
+
+    if engine == "numpy":
+        data = np.asarray(mask) != 0
+        padded = np.zeros((height, width + 2), dtype=np.int8)
+        padded[:, 1:-1] = data
+        edges = np.diff(padded, axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+        return rows.astype(np.int64), starts.astype(np.int64), ends.astype(np.int64)
+
+    data = mask.tobytes()
+    rows: List[int] = []
+    starts: List[int] = []
+    ends: List[int] = []
+    finditer = _RUN_PATTERN.finditer
+    for y in range(height):
+        base = y * width
+        for match in finditer(data, base, base + width):
+            rows.append(y)
+            starts.append(match.start() - base)
+            ends.append(match.end() - base)
+    return rows, starts, ends
+
+
+def label_runs(rows, starts, ends, width: int, return_labels: bool = False):
+    """
+    对游程做 4 连通标记
+
+    相邻两行的游程区间有重叠即属于同一连通域。
+
+    Returns:
+        连通域列表；return_labels 为 True 时返回 (连通域列表, 每个游程所属连通域的下标)
+    """
+    if np is not None and isinstance(starts, np.ndarray):
+        components, labels = _label_runs_numpy(rows, starts, ends, width)
+    else:
+        components, labels = _label_runs_python(rows, starts, ends)
+    if return_labels:
+        return components, labels
+    return components
+
+
+def _label_runs_numpy(rows, starts, ends, width: int):
+    count = len(starts)
+    if count == 0:
+        return [], np.zeros(0, dtype=np.int64)
+
+    # 用 行 * (width + 1) + x 把二维位置编码成全局单调的键，
+    # 这样一次 searchsorted 就能找到上一行中与当前游程重叠的游程区间 [lo, hi)
+    stride = width + 1
+    start_keys = rows * stride + starts
+    end_keys = rows * stride + ends
+    prev_base = (rows - 1) * stride
+    lo = np.searchsorted(end_keys, prev_base + starts, side="right")
+    hi = np.searchsorted(start_keys, prev_base + ends, side="left")
+    spans = np.maximum(hi - lo, 0)
+
+    parent = np.arange(count)
+    total = int(spans.sum())
+    if total:
+        below = np.repeat(np.arange(count), spans)
+        offsets = np.arange(total) - np.repeat(np.cumsum(spans) - spans, spans)
+        above = np.repeat(lo, spans) + offsets
+
+        # 并行化的并查集：反复把较大的根挂到较小的根上，再做指针跳跃压缩
+        while True:
+            root_a = parent[above]
+            root_b = parent[below]
+            low = np.minimum(root_a, root_b)
+            high = np.maximum(root_a, root_b)
+            pending = low != high
+            if not pending.any():
+                break
+            np.minimum.at(parent, high[pending], low[pending])
+            while True:
+                jumped = parent[parent]
+                if np.array_equal(jumped, parent):
+                    break
+                parent = jumped
+
+    # 同一连通域的游程在 parent 中共享根；稳定排序后每组第一个游程就是扫描顺序中的首个游程
+    order = np.argsort(parent, kind="stable")
+    labels = parent[order]
+    group_starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+
+    sorted_rows = rows[order]
+    sorted_starts = starts[order]
+    sorted_ends = ends[order]
+    min_x = np.minimum.reduceat(sorted_starts, group_starts)
+    max_x = np.maximum.reduceat(sorted_ends, group_starts)
+    min_y = sorted_rows[group_starts]
+    max_y = np.maximum.reduceat(sorted_rows, group_starts)
+    pixels = np.add.reduceat(sorted_ends - sorted_starts, group_starts)
+    first_x = sorted_starts[group_starts]
+
+    # 每个游程所属连通域的下标（连通域按根下标升序，即扫描顺序）
+    run_labels = np.empty(count, dtype=np.int64)
+    run_labels[order] = np.cumsum(np.r_[True, labels[1:] != labels[:-1]]) - 1
+
+    components = [
+        Component(
+            x=int(x0), y=int(y0), width=int(x1 - x0), height=int(y1 - y0 + 1),
+            pixels=int(n), first_x=int(fx)
+        )
+        for x0, y0, x1, y1, n, fx in zip(
+            min_x.tolist(), min_y.tolist(), max_x.tolist(), max_y.tolist(),
+            pixels.tolist(), first_x.tolist()
+        )
+    ]
+    return components, run_labels
+
+
+def _label_runs_python(rows, starts, ends):
+    count = len(starts)
+    parent = list(range(count))
+
+    def find(i: int) -> int:
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    # 双指针合并相邻两行的游程
+    prev_begin = prev_end = 0
+    index = 0
+    while index < count:
+        row = rows[index]
+        row_end = index
+        while row_end < count and rows[row_end] == row:
+            row_end += 1
+
+        if prev_end > prev_begin and rows[prev_begin] == row - 1:
+            i, j = prev_begin, index
+            while i < prev_end and j < row_end:
+                if starts[i] < ends[j] and starts[j] < ends[i]:
+                    root_i, root_j = find(i), find(j)
+                    if root_i != root_j:
+                        if root_i < root_j:
+                            parent[root_j] = root_i
+                        else:
+                            parent[root_i] = root_j
+                if ends[i] <= ends[j]:
+                    i += 1
+                else:
+                    j += 1
+
+        prev_begin, prev_end = index, row_end
+        index = row_end
+
+    stats = {}
+    index_of = {}
+    run_labels = [0] * count
+    for i in range(count):
+        root = find(i)
+        entry = stats.get(root)
+        if entry is None:
+            # 游程按扫描顺序遍历，首次出现即为该连通域的首个游程
+            stats[root] = [starts[i], rows[i], ends[i], rows[i], ends[i] - starts[i], starts[i]]
+            index_of[root] = len(index_of)
+            run_labels[i] = index_of[root]
+        else:
+            run_labels[i] = index_of[root]
+            if starts[i] < entry[0]:
+                entry[0] = starts[i]
+            if ends[i] > entry[2]:
+                entry[2] = ends[i]
+            entry[3] = rows[i]
+            entry[4] += ends[i] - starts[i]
+
+    components = [
+        Component(x=x0, y=y0, width=x1 - x0, height=y1 - y0 + 1, pixels=n, first_x=fx)
+        for x0, y0, x1, y1, n, fx in stats.values()
+    ]
+    return components, run_labels
+
+
+class RunMask:
+    """
+    按行游程编码（RLE）的前景掩码
+
+    每行只记录前景游程 [start, end)，并用行指针 row_ptr 索引每行游程的起止下标。
+    连通域、像素计数与 bbox 查询都只遍历游程，稀疏精灵表的代价约为 O(游程数) 而非 O(像素数)。
+    """
+
+    def __init__(self, width: int, height: int, rows, starts, ends):
+        self.width = width
+        self.height = height
+        self.rows = rows
+        self.starts = starts
+        self.ends = ends
+        self.vectorized = np is not None and isinstance(starts, np.ndarray)
+        if self.vectorized:
+            self.row_ptr = np.searchsorted(rows, np.arange(height + 1), side="left")
+        else:
+            row_ptr = [0] * (height + 1)
+            for row in rows:
+                row_ptr[row + 1] += 1
+            for y in range(height):
+                row_ptr[y + 1] += row_ptr[y]
+            self.row_ptr = row_ptr
+
+    @classmethod
+    def from_mask(cls, mask: Image.Image, engine: str = "auto") -> "RunMask":
+        rows, starts, ends = mask_runs(mask, engine)
+        return cls(mask.width, mask.height, rows, starts, ends)
+
+    @classmethod
+    def from_image(
+        cls,
+        img: Image.Image,
+        alpha_threshold: int = 0,
+        bg_color: Optional[Tuple[int, int, int]] = None,
+        engine: str = "auto"
+    ) -> "RunMask":
+        """由图片构建；默认参数下前景即 alpha > 0，与 getbbox 的判定一致"""
+        return cls.from_mask(build_foreground_mask(img, alpha_threshold, bg_color), engine)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def components(self) -> List[Component]:
+        """4 连通标记，返回所有连通域"""
+        return label_runs(self.rows, self.starts, self.ends, self.width)
+
+    def to_mask(self, selected=None) -> Image.Image:
+        """
+        把游程画回 "L" 掩码（255 为前景）
+
+        Args:
+            selected: 可选，与游程一一对应的布尔序列，只画选中的游程
+        """
+        width, height = self.width, self.height
+        if self.vectorized:
+            rows, starts, ends = self.rows, self.starts, self.ends
+            if selected is not None:
+                keep = np.asarray(selected, dtype=bool)
+                rows, starts, ends = rows[keep], starts[keep], ends[keep]
+            # 差分数组：游程起点 +1、终点 -1，前缀和 > 0 即在游程内（同一位置的起点与终点相互抵消）
+            delta = np.zeros(width * height + 1, dtype=np.int8)
+            delta[rows * width + starts] += 1
+            delta[rows * width + ends] -= 1
+            data = (np.cumsum(delta[:-1], dtype=np.int8) > 0).astype(np.uint8) * 255
+            return Image.frombytes("L", (width, height), data.tobytes())
+
+        data = bytearray(width * height)
+        for i, (row, start, end) in enumerate(zip(self.rows, self.starts, self.ends)):
+            if selected is None or selected[i]:
+                base = row * width
+                data[base + start:base + end] = b"\xff" * (end - start)
+        return Image.frombytes("L", (width, height), bytes(data))
+
+    def _clip(self, box):
+        x0, y0, x1, y1 = box if box else (0, 0, self.width, self.height)
+        x0, x1 = max(0, x0), min(self.width, x1)
+        y0, y1 = max(0, y0), min(self.height, y1)
+        return x0, y0, x1, y1
+
+    def count(self, box: Optional[Tuple[int, int, int, int]] = None) -> int:
+        """统计区域内的前景像素数"""
+        x0, y0, x1, y1 = self._clip(box)
+        if x1 <= x0 or y1 <= y0:
+            return 0
+        lo, hi = self.row_ptr[y0], self.row_ptr[y1]
+        if self.vectorized:
+            lengths = np.minimum(self.ends[lo:hi], x1) - np.maximum(self.starts[lo:hi], x0)
+            return int(lengths[lengths > 0].sum())
+        total = 0
+        for i in range(lo, hi):
+            length = min(self.ends[i], x1) - max(self.starts[i], x0)
+            if length > 0:
+                total += length
+        return total
+
+    def bbox(self, box: Optional[Tuple[int, int, int, int]] = None) -> Optional[Tuple[int, int, int, int]]:
+        """
+        区域内前景的紧致包围盒（整图坐标，右/下不含），无前景返回 None
+
+        与对该区域裁剪后调用 getbbox() 的结果一致（需加上区域原点偏移）。
+        """
+        x0, y0, x1, y1 = self._clip(box)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        lo, hi = self.row_ptr[y0], self.row_ptr[y1]
+        if self.vectorized:
+            starts = np.maximum(self.starts[lo:hi], x0)
+            ends = np.minimum(self.ends[lo:hi], x1)
+            keep = ends > starts
+            if not keep.any():
+                return None
+            rows = self.rows[lo:hi][keep]
+            return int(starts[keep].min()), int(rows[0]), int(ends[keep].max()), int(rows[-1]) + 1
+
+        left = right = top = bottom = None
+        for i in range(lo, hi):
+            start = max(self.starts[i], x0)
+            end = min(self.ends[i], x1)
+            if end <= start:
+                continue
+            if top is None:
+                left, right, top = start, end, self.rows[i]
+            else:
+                left, right = min(left, start), max(right, end)
+            bottom = self.rows[i] + 1
+        if top is None:
+            return None
+        return left, top, right, bottom
+
+    def is_empty(self, box: Optional[Tuple[int, int, int, int]] = None) -> bool:
+        """区域内是否没有前景像素"""
+        return self.count(box) == 0
+
+
+class OpacityIndex:
+    """
+    前景像素的积分图（summed-area table）索引（NumPy）
+
+    table[y, x] 为 [0, x) × [0, y) 内的前景像素数，任意矩形的像素数/是否为空四次查表即得；
+    紧致包围盒对四条边分别二分（前缀计数单调），每次 O(log 边长) 次查表。
+    与 RunMask 提供相同的 count / bbox / is_empty 接口，结果一致。
+    """
+
+    def __init__(self, mask: Image.Image):
+        self.width, self.height = mask.size
+        self.table = np.zeros((self.height + 1, self.width + 1), dtype=np.int32)
+        inner = self.table[1:, 1:]
+        np.cumsum(np.asarray(mask) != 0, axis=0, dtype=np.int32, out=inner)
+        np.cumsum(inner, axis=1, dtype=np.int32, out=inner)
+
+    @classmethod
+    def from_image(
+        cls,
+        img: Image.Image,
+        alpha_threshold: int = 0,
+        bg_color: Optional[Tuple[int, int, int]] = None
+    ) -> "OpacityIndex":
+        """由图片构建；默认参数下前景即 alpha > 0，与 getbbox 的判定一致"""
+        return cls(build_foreground_mask(img, alpha_threshold, bg_color))
+
+    def _clip(self, box):
+        x0, y0, x1, y1 = box if box else (0, 0, self.width, self.height)
+        return max(0, x0), max(0, y0), min(self.width, x1), min(self.height, y1)
+
+    def _sum(self, x0: int, y0: int, x1: int, y1: int) -> int:
+        table = self.table
+        return int(table[y1, x1]) - int(table[y0, x1]) - int(table[y1, x0]) + int(table[y0, x0])
+
+    def count(self, box: Optional[Tuple[int, int, int, int]] = None) -> int:
+        """统计区域内的前景像素数"""
+        x0, y0, x1, y1 = self._clip(box)
+        if x1 <= x0 or y1 <= y0:
+            return 0
+        return self._sum(x0, y0, x1, y1)
+
+    def is_empty(self, box: Optional[Tuple[int, int, int, int]] = None) -> bool:
+        """区域内是否没有前景像素"""
+        return self.count(box) == 0
+
+    def counts(self, boxes: Sequence[Tuple[int, int, int, int]]):
+        """批量统计多个区域的前景像素数（一次数组查表，返回 int64 ndarray）"""
+        if not boxes:
+            return np.zeros(0, dtype=np.int64)
+        coords = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        x0 = np.clip(coords[:, 0], 0, self.width)
+        y0 = np.clip(coords[:, 1], 0, self.height)
+        x1 = np.maximum(np.clip(coords[:, 2], 0, self.width), x0)
+        y1 = np.maximum(np.clip(coords[:, 3], 0, self.height), y0)
+        table = self.table.astype(np.int64, copy=False)
+        return table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0]
+
+    def bbox(self, box: Optional[Tuple[int, int, int, int]] = None) -> Optional[Tuple[int, int, int, int]]:
+        """
+        区域内前景的紧致包围盒（整图坐标，右/下不含），无前景返回 None
+
+        与对该区域裁剪后调用 getbbox() 的结果一致（需加上区域原点偏移）。
+        """
+        x0, y0, x1, y1 = self._clip(box)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        total = self._sum(x0, y0, x1, y1)
+        if total == 0:
+            return None
+
+        def first(lo: int, hi: int, covered) -> int:
+            # covered(k) 单调：最小的 k 使 covered(k) 为真
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if covered(mid):
+                    hi = mid
+                else:
+                    lo = mid + 1
+            return lo
+
+        top = first(y0 + 1, y1, lambda y: self._sum(x0, y0, x1, y) > 0) - 1
+        bottom = first(top + 1, y1, lambda y: self._sum(x0, top, x1, y) == total)
+        left = first(x0 + 1, x1, lambda x: self._sum(x0, top, x, bottom) > 0) - 1
+        right = first(left + 1, x1, lambda x: self._sum(left, top, x, bottom) == total)
+        return left, top, right, bottom
+
+
+def opacity_index(
+    img: Image.Image,
+    alpha_threshold: int = 0,
+    bg_color: Optional[Tuple[int, int, int]] = None,
+    engine: str = "auto",
+    max_memory_mb: float = OPACITY_INDEX_MAX_MB
+):
+    """
+    构建整表前景区域查询索引（count / bbox / is_empty）
+
+    NumPy 可用且积分图不超过内存上限时返回 OpacityIndex，否则返回游程掩码 RunMask。
+    """
+    engine = resolve_engine(engine)
+    width, height = img.size
+    if engine == "numpy" and (width + 1) * (height + 1) * 4 <= max_memory_mb * 1024 * 1024:
+        return OpacityIndex.from_image(img, alpha_threshold, bg_color)
+    return RunMask.from_image(img, alpha_threshold, bg_color, engine)
+
+
+def empty_cells_index(
+    img: Image.Image,
+    alpha_threshold: int = 0,
+    bg_color: Optional[Tuple[int, int, int]] = None,
+    engine: str = "auto",
+    max_memory_mb: float = OPACITY_INDEX_MAX_MB
+):
+    """
+    构建批量判空用的整表索引，可供多次 cells_empty 查询复用
+
+    NumPy 可用且积分图不超过内存上限时为 OpacityIndex，否则为前景掩码（"L"）。
+    """
+    mask = build_foreground_mask(img, alpha_threshold, bg_color)
+    width, height = img.size
+    if resolve_engine(engine) == "numpy" and (width + 1) * (height + 1) * 4 <= max_memory_mb * 1024 * 1024:
+        return OpacityIndex(mask)
+    return mask
+
+
+def cells_empty(index, boxes: Sequence[Tuple[int, int, int, int]]) -> List[bool]:
+    """
+    在 empty_cells_index 构建的索引上批量判断区域是否为空
+
+    积分图一次数组查表得到全部区域的像素数；前景掩码则逐区域裁剪后调用 C 级的 getbbox()。
+    """
+    if isinstance(index, OpacityIndex):
+        return (index.counts(boxes) == 0).tolist()
+    return [index.crop(box).getbbox() is None for box in boxes]
+
+
+def empty_cells(
+    img: Image.Image,
+    boxes: Sequence[Tuple[int, int, int, int]],
+    alpha_threshold: int = 0,
+    bg_color: Optional[Tuple[int, int, int]] = None,
+    engine: str = "auto",
+    max_memory_mb: float = OPACITY_INDEX_MAX_MB
+) -> List[bool]:
+    """
+    批量判断区域是否为空：区域内所有像素 alpha <= alpha_threshold 或与背景色接近（超出图片的部分视为空）
+
+    整表只构建一次前景掩码；NumPy 下在积分图上一次数组查表得到全部区域的像素数，
+    否则逐区域对掩码裁剪后调用 C 级的 getbbox()。
+    """
+    index = empty_cells_index(img, alpha_threshold, bg_color, engine, max_memory_mb)
+    return cells_empty(index, boxes)
+
+
+def edge_connected_mask(mask: Image.Image, engine: str = "auto") -> Image.Image:
+    """
+    掩码中与图片边缘 4 连通的前景区域（"L"，255 为选中）
+
+    在游程上做连通域标记，bbox 触及边缘的连通域即与边缘连通；代价与游程数成线性关系。
+    """
+    runs = RunMask.from_mask(mask, engine)
+    components, labels = label_runs(runs.rows, runs.starts, runs.ends, runs.width, return_labels=True)
+    touching = [
+        c.x == 0 or c.y == 0 or c.x + c.width == runs.width or c.y + c.height == runs.height
+        for c in components
+    ]
+    if runs.vectorized:
+        selected = np.asarray(touching, dtype=bool)[labels] if touching else np.zeros(0, dtype=bool)
+    else:
+        selected = [touching[label] for label in labels]
+    return runs.to_mask(selected)
+
+
+def find_components(
+    img: Image.Image,
+    alpha_threshold: int = 0,
+    bg_color: Optional[Tuple[int, int, int]] = None,
+    engine: str = "auto"
+) -> List[Component]:
+    """对整张图做一次掩码 + 游程编码，在游程上标记并返回所有前景连通域"""
+    return RunMask.from_image(img, alpha_threshold, bg_color, engine).components()
+
+
+def tile_size_for_memory(max_memory_mb: float) -> int:
+    """
+    根据内存上限估算分块边长
+
+    每个像素在分块内约占 RGBA 裁剪 4 字节 + RGB/差值/掩码中间图约 8 字节 + 游程计算约 4 字节。
+    """
+    budget = max(0.0, float(max_memory_mb)) * 1024 * 1024
+    side = int((budget / TILE_BYTES_PER_PIXEL) ** 0.5)
+    return max(MIN_TILE_SIZE, side - side % MIN_TILE_SIZE)
+
+
+class ComponentMerger:
+    """
+    跨分块拼接连通域的并查集
+
+    每个分块内部的连通域登记为一个节点，边界上相接的节点再合并，
+    合并时同步聚合 bbox、像素数与扫描顺序中的首个像素。
+    """
+
+    def __init__(self):
+        self._parent: List[int] = []
+        self._stats: List[List[int]] = []
+
+    def add(self, component: Component, offset_x: int = 0, offset_y: int = 0) -> int:
+        """登记一个（分块内的）连通域，返回全局节点编号"""
+        x0 = component.x + offset_x
+        y0 = component.y + offset_y
+        self._parent.append(len(self._parent))
+        self._stats.append([
+            x0, y0, x0 + component.width, y0 + component.height,
+            component.pixels, component.first_x + offset_x
+        ])
+        return len(self._parent) - 1
+
+    def find(self, node: int) -> int:
+        parent = self._parent
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if root_b < root_a:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        keep, drop = self._stats[root_a], self._stats[root_b]
+        # 首个像素取 (y, x) 字典序最小者
+        if (drop[1], drop[5]) < (keep[1], keep[5]):
+            keep[5] = drop[5]
+        keep[0] = min(keep[0], drop[0])
+        keep[1] = min(keep[1], drop[1])
+        keep[2] = max(keep[2], drop[2])
+        keep[3] = max(keep[3], drop[3])
+        keep[4] += drop[4]
+
+    def components(self) -> List[Component]:
+        return [
+            Component(x=x0, y=y0, width=x1 - x0, height=y1 - y0, pixels=n, first_x=fx)
+            for node, (x0, y0, x1, y1, n, fx) in enumerate(self._stats)
+            if self._parent[node] == node
+        ]
+
+
+def _union_overlapping(merger: ComponentMerger, upper, lower):
+    """合并上下两行中区间重叠的游程（均为按起点升序的 (start, end, node) 列表）"""
+    i = j = 0
+    while i < len(upper) and j < len(lower):
+        start_a, end_a, node_a = upper[i]
+        start_b, end_b, node_b = lower[j]
+        if start_a < end_b and start_b < end_a:
+            merger.union(node_a, node_b)
+        if end_a <= end_b:
+            i += 1
+        else:
+            j += 1
+
+
+def find_components_tiled(
+    img: Image.Image,
+    alpha_threshold: int = 0,
+    bg_color: Optional[Tuple[int, int, int]] = None,
+    engine: str = "auto",
+    tile_size: int = 0,
+    max_memory_mb: float = 0
+) -> List[Component]:
+    """
+    分块检测连通域，内存占用只与分块大小有关
+
+    按行优先逐块生成掩码与游程并在块内标记，只保留上一行分块的底边游程和左侧分块的右边游程，
+    用于把跨越分块边界的连通域拼接起来。结果与整图检测完全一致。
+    """
+    engine = resolve_engine(engine)
+    if tile_size <= 0:
+        tile_size = tile_size_for_memory(max_memory_mb) if max_memory_mb > 0 else DEFAULT_TILE_SIZE
+    sources = ((top, img, 0) for top in range(0, img.height, tile_size))
+    return _tiled_components(img.size, sources, alpha_threshold, bg_color, engine, tile_size)
+
+
+def find_components_banded(
+    size: Tuple[int, int],
+    bands: Iterable[Tuple[int, Image.Image]],
+    alpha_threshold: int = 0,
+    bg_color: Optional[Tuple[int, int, int]] = None,
+    engine: str = "auto",
+    tile_size: int = DEFAULT_TILE_SIZE,
+    workers: int = 1
+) -> List[Component]:
+    """
+    在依次产出的水平带上分块检测连通域，整张图无需解码到内存
+
+    bands 产出 (起始行, 带图片)，带高须为 tile_size（最后一条可以更矮），
+    如 sprite_stream.PngBandReader(path, tile_size).bands()。结果与整图检测完全一致。
+    workers > 1 时各条带交给进程池整带标记（同 find_components_parallel 以 tile_size 为带高）。
+    """
+    engine = resolve_engine(engine)
+    width, height = size
+
+    def sources():
+        expected = 0
+        for top, band in bands:
+            if top != expected or band.size != (width, min(tile_size, height - top)):
+                raise ValueError(f"水平带与分块大小不符: 行 {top}，尺寸 {band.size}")
+            expected = top + band.height
+            yield top, band, top
+        if expected != height:
+            raise ValueError(f"水平带不完整: 只到第 {expected} 行，图片高 {height}")
+
+    if workers > 1:
+        checked = ((top, band) for top, band, _ in sources())
+        return _parallel_components(width, checked, alpha_threshold, bg_color, engine, int(workers))
+    return _tiled_components(size, sources(), alpha_threshold, bg_color, engine, tile_size)
+
+
+def _tiled_components(size, sources, alpha_threshold, bg_color, engine, tile_size) -> List[Component]:
+    """
+    分块检测主循环
+
+    sources 按行依次产出 (分块行起始行, 源图片, 源图片起始行)，分块从源图片中裁剪
+    （整图时源图片即整图，流式解码时为当前水平带）。
+    """
+    width, height = size
+    merger = ComponentMerger()
+    # 每一列分块的底边游程：{tile_x: [(start, end, node), ...]}（x 为全局坐标）
+    bottom_runs = {}
+
+    for top, source, source_top in sources:
+        bottom = min(height, top + tile_size)
+        next_bottom_runs = {}
+        # 左侧分块贴右边缘的游程：{全局行: node}
+        right_edge = {}
+
+        for left in range(0, width, tile_size):
+            right = min(width, left + tile_size)
+            tile = source.crop((left, top - source_top, right, bottom - source_top))
+            mask = build_foreground_mask(tile, alpha_threshold, bg_color)
+            rows, starts, ends = mask_runs(mask, engine)
+            components, labels = label_runs(rows, starts, ends, mask.width, return_labels=True)
+            del tile, mask
+
+            nodes = [merger.add(c, left, top) for c in components]
+            if np is not None and isinstance(starts, np.ndarray):
+                rows, starts, ends, labels = rows.tolist(), starts.tolist(), ends.tolist(), labels.tolist()
+
+            tile_w, tile_h = right - left, bottom - top
+            top_row = []
+            last_row = []
+            current_right = {}
+            for row, start, end, label in zip(rows, starts, ends, labels):
+                node = nodes[label]
+                if row == 0:
+                    top_row.append((start + left, end + left, node))
+                if row == tile_h - 1:
+                    last_row.append((start + left, end + left, node))
+                if start == 0 and (row + top) in right_edge:
+                    merger.union(right_edge[row + top], node)
+                if end == tile_w:
+                    current_right[row + top] = node
+
+            # 与上方分块的底边拼接（上方分块可能与本块列范围相同）
+            if top > 0:
+                _union_overlapping(merger, bottom_runs.get(left, []), top_row)
+
+            right_edge = current_right
+            next_bottom_runs[left] = last_row
+
+        bottom_runs = next_bottom_runs
+
+    return merger.components()
+
+
+def _label_band(task):
+    """
+    进程池任务：标记一条水平带内的连通域
+
+    Returns:
+        (连通域元组列表, 顶行游程, 底行游程)，游程为 (start, end, 连通域下标)
+    """
+    data, width, height, alpha_threshold, bg_color, engine = task
+    band = Image.frombytes("RGBA", (width, height), data)
+    mask = build_foreground_mask(band, alpha_threshold, bg_color)
+    rows, starts, ends = mask_runs(mask, engine)
+    components, labels = label_runs(rows, starts, ends, width, return_labels=True)
+    if np is not None and isinstance(starts, np.ndarray):
+        rows, starts, ends, labels = rows.tolist(), starts.tolist(), ends.tolist(), labels.tolist()
+
+    top_runs = []
+    bottom_runs = []
+    for row, start, end, label in zip(rows, starts, ends, labels):
+        if row == 0:
+            top_runs.append((start, end, label))
+        if row == height - 1:
+            bottom_runs.append((start, end, label))
+
+    packed = [(c.x, c.y, c.width, c.height, c.pixels, c.first_x) for c in components]
+    return packed, top_runs, bottom_runs
+
+
+def find_components_parallel(
+    img: Image.Image,
+    alpha_threshold: int = 0,
+    bg_color: Optional[Tuple[int, int, int]] = None,
+    engine: str = "auto",
+    workers: int = 2,
+    band_height: int = 0
+) -> List[Component]:
+    """
+    多进程分带检测连通域
+
+    把图片切成水平带交给进程池各自标记，主进程再把跨越带接缝的连通域合并。
+    同时在途的任务数限制为 workers 的两倍，避免一次性复制整张图的像素。
+    """
+    engine = resolve_engine(engine)
+    width, height = img.size
+    workers = max(1, int(workers))
+    if band_height <= 0:
+        band_height = -(-height // (workers * BANDS_PER_WORKER))
+    band_height = max(1, band_height)
+    bands = (
+        (top, img.crop((0, top, width, min(height, top + band_height))))
+        for top in range(0, height, band_height)
+    )
+    return _parallel_components(width, bands, alpha_threshold, bg_color, engine, workers)
+
+
+def _parallel_components(width, bands, alpha_threshold, bg_color, engine, workers) -> List[Component]:
+    """
+    多进程分带检测主循环
+
+    bands 依次产出 (起始行, 带图片)，按需取用（整图裁剪或流式解码），在途的带不超过 workers 的两倍。
+    """
+    def make_task(band):
+        if band.mode != "RGBA":
+            band = band.convert("RGBA")
+        return band.tobytes(), width, band.height, alpha_threshold, bg_color, engine
+
+    merger = ComponentMerger()
+    previous_bottom = None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for top, band in bands:
+            pending.append((top, executor.submit(_label_band, make_task(band))))
+            del band
+            if len(pending) < workers * 2:
+                continue
+            previous_bottom = _merge_band(merger, previous_bottom, *pending.popleft())
+        while pending:
+            previous_bottom = _merge_band(merger, previous_bottom, *pending.popleft())
+
+    return merger.components()
+
+
+def _merge_band(merger: ComponentMerger, previous_bottom, top: int, future):
+    """登记一条带的连通域并与上一条带的底行拼接，返回本带底行游程"""
+    packed, top_runs, bottom_runs = future.result()
+    nodes = [
+        merger.add(Component(x=x, y=y, width=w, height=h, pixels=n, first_x=fx), 0, top)
+        for x, y, w, h, n, fx in packed
+    ]
+    if previous_bottom is not None:
+        _union_overlapping(merger, previous_bottom, [(start, end, nodes[label]) for start, end, label in top_runs])
+    return [(start, end, nodes[label]) for start, end, label in bottom_runs]
+
+
+def find_components_pyramid(
+    img: Image.Image,
+    alpha_threshold: int = 0,
+    bg_color: Optional[Tuple[int, int, int]] = None,
+    engine: str = "auto",
+    factor: int = 8
+) -> List[Component]:
+    """
+    由粗到细的金字塔检测
+
+    先用 Image.reduce 把前景掩码缩小 factor 倍（块内有任一前景像素，缩小后的值即非零），
+    在小图上找到候选区域；再只在各候选区域内做全分辨率游程标记。
+    全分辨率下 4 连通的像素在小图上也 4 连通，所以每个连通域恰好落在一个候选区域内，结果逐像素精确。
+
+    逐区域标记在 Python 循环中进行，只在候选区域少而空白多时划算；候选区域平均占有的像素
+    不足 PYRAMID_PIXELS_PER_REGION 时改为对整张掩码做一次全分辨率标记（结果相同）。
+    """
+    engine = resolve_engine(engine)
+    # 块均值 >= 255 / factor² 时四舍五入仍非零，factor 不超过 PYRAMID_MAX_FACTOR 即可保证
+    factor = max(1, min(int(factor), PYRAMID_MAX_FACTOR))
+    mask = build_foreground_mask(img, alpha_threshold, bg_color)
+    if factor == 1:
+        return RunMask.from_mask(mask, engine).components()
+
+    coarse = RunMask.from_mask(mask.reduce(factor), engine)
+    regions, coarse_labels = label_runs(
+        coarse.rows, coarse.starts, coarse.ends, coarse.width, return_labels=True
+    )
+    if len(regions) * PYRAMID_PIXELS_PER_REGION > mask.width * mask.height:
+        return RunMask.from_mask(mask, engine).components()
+    if coarse.vectorized:
+        coarse_rows, coarse_starts, coarse_labels = (
+            coarse.rows.tolist(), coarse.starts.tolist(), coarse_labels.tolist()
+        )
+        row_ptr = coarse.row_ptr.tolist()
+    else:
+        coarse_rows, coarse_starts, row_ptr = coarse.rows, coarse.starts, coarse.row_ptr
+
+    def coarse_label_at(cx: int, cy: int) -> int:
+        # 候选区域的像素必然落在某个粗游程内：在该行的游程中二分查找
+        index = bisect_right(coarse_starts, cx, row_ptr[cy], row_ptr[cy + 1]) - 1
+        return coarse_labels[index]
+
+    width, height = mask.size
+    components = []
+    for label, region in enumerate(regions):
+        left, top = region.x * factor, region.y * factor
+        right = min(width, (region.x + region.width) * factor)
+        bottom = min(height, (region.y + region.height) * factor)
+        for c in RunMask.from_mask(mask.crop((left, top, right, bottom)), engine).components():
+            c.x += left
+            c.y += top
+            c.first_x += left
+            # 区域包围盒内可能混入其他候选区域的（被截断的）连通域，只保留属于本区域的
+            if coarse_label_at(c.first_x // factor, c.y // factor) == label:
+                components.append(c)
+    return components
+
+
+def _gaps_to_segments(occupied, min_gap: int) -> List[Tuple[int, int]]:
+    """把一维占用情况按长度 >= min_gap 的空白间隔切分成若干 [start, end) 段"""
+    segments = []
+    start = None
+    empty = 0
+    for index, filled in enumerate(occupied):
+        if filled:
+            if start is None:
+                start = index
+            elif empty >= min_gap:
+                segments.append((start, index - empty))
+                start = index
+            empty = 0
+        elif start is not None:
+            empty += 1
+    if start is not None:
+        segments.append((start, len(occupied) - empty))
+    return segments
+
+
+def xy_cut(mask: Image.Image, min_gap: int = 1, engine: str = "auto") -> List[Tuple[int, int, int, int]]:
+    """
+    递归 XY 切分：沿整行/整列都是背景的间隔把图片切开
+
+    每个节点先收紧到前景包围盒，再用行投影切成若干横条；切不开时改用列投影切成若干竖条；
+    两个方向都切不开即为一个精灵。投影由 NumPy 的 any() 或字节串查找完成，不做逐像素 Python 循环。
+
+    Returns:
+        阅读顺序（从上到下，每行从左到右）的精灵框 (left, top, right, bottom)
+    """
+    engine = resolve_engine(engine)
+    min_gap = max(1, int(min_gap))
+
+    if engine == "numpy":
+        data = np.asarray(mask) != 0
+
+        def bbox(box):
+            left, top, right, bottom = box
+            region = data[top:bottom, left:right]
+            rows = np.flatnonzero(region.any(axis=1))
+            if not len(rows):
+                return None
+            cols = np.flatnonzero(region.any(axis=0))
+            return left + int(cols[0]), top + int(rows[0]), left + int(cols[-1]) + 1, top + int(rows[-1]) + 1
+
+        def projection(box, axis):
+            left, top, right, bottom = box
+            return data[top:bottom, left:right].any(axis=1 - axis).tolist()
+    else:
+        def bbox(box):
+            found = mask.crop(box).getbbox()
+            if not found:
+                return None
+            return box[0] + found[0], box[1] + found[1], box[0] + found[2], box[1] + found[3]
+
+        def projection(box, axis):
+            region = mask.crop(box)
+            if axis == 1:
+                # 列投影：转置后按行查找
+                region = region.transpose(Image.Transpose.TRANSPOSE)
+            width, height = region.size
+            raw = region.tobytes()
+            return [_RUN_PATTERN.search(raw, y * width, (y + 1) * width) is not None for y in range(height)]
+
+    leaves = []
+    root = bbox((0, 0, mask.width, mask.height))
+    # 栈中保存 (框, 优先切分方向)；逆序压栈以保证阅读顺序输出
+    stack = [(root, 0)] if root else []
+    while stack:
+        box, axis = stack.pop()
+        children = None
+        for attempt in (axis, 1 - axis):
+            segments = _gaps_to_segments(projection(box, attempt), min_gap)
+            if len(segments) > 1:
+                if attempt == 0:
+                    children = [(box[0], box[1] + a, box[2], box[1] + b) for a, b in segments]
+                else:
+                    children = [(box[0] + a, box[1], box[0] + b, box[3]) for a, b in segments]
+                next_axis = 1 - attempt
+                break
+        if children is None:
+            leaves.append(box)
+            continue
+        for child in reversed(children):
+            tight = bbox(child)
+            if tight:
+                stack.append((tight, next_axis))
+    return leaves
+
+
+def _separator_flags(lines, tolerance: int):
+    """
+    批量判断线段是否为浅色均匀分隔线（NumPy）
+
+    Args:
+        lines: (N, L, 通道) 的像素数组，每个元素是一条行/列线段
+    Returns:
+        长度 N 的布尔数组：首像素平均亮度 > SEPARATOR_MIN_BRIGHTNESS，且每个像素各 RGB 通道与首像素差值都 <= tolerance
+    """
+    first = lines[:, 0, :3]
+    return _light_flags(first) & _uniform_flags(lines, first, tolerance)
+
+
+def _light_flags(first):
+    """(N, 通道) 的首像素是否为浅色"""
+    return first.astype(np.int32).sum(axis=1) > SEPARATOR_MIN_BRIGHTNESS * 3
+
+
+def _uniform_flags(lines, first, tolerance: int):
+    """
+    (N, L, 通道) 的每条线段各 RGB 通道与 first（(N, 通道)）的差值是否都 <= tolerance
+
+    逐通道在 uint8 上比较，不生成整块的有符号副本：v - low（按 uint8 回绕）<= high - low
+    当且仅当 low <= v <= high，其中 [low, high] 为首像素 ± tolerance 截断到 0~255。
+    """
+    uniform = np.ones(len(lines), dtype=bool)
+    for channel in range(3):
+        base = first[:, channel].astype(np.int16)
+        low = np.clip(base - tolerance, 0, 255).astype(np.uint8)[:, None]
+        span = (np.clip(base + tolerance, 0, 255).astype(np.uint8)[:, None] - low)
+        uniform &= ((lines[..., channel] - low) <= span).all(axis=1)
+    return uniform
+
+
+def is_separator_line(line: Image.Image, tolerance: int) -> bool:
+    """判断单条行/列是否为浅色均匀分隔线（纯 Pillow，以首个像素为基准用背景掩码整行判定）"""
+    if line.mode != "RGBA":
+        line = line.convert("RGBA")
+    first_color = line.getpixel((0, 0))
+    # 浅色（白色或接近白色）
+    if (first_color[0] + first_color[1] + first_color[2]) / 3 <= SEPARATOR_MIN_BRIGHTNESS:
+        return False
+    mask = build_background_mask(line, first_color, tolerance, "channel")
+    return mask.getextrema()[0] == 255
+
+
+def _rgb_source(img: Image.Image):
+    """
+    分隔线检测的像素来源（NumPy）：(原始像素数组, 查找表)
+
+    L/P 图返回像素值数组与 (256, 3) 的 RGB 查找表，取出所需行/列后再查表，避免整张转换；
+    RGB/RGBA 直接返回像素数组（查找表为 None）。
+    """
+    if img.mode in ("L", "P"):
+        return np.asarray(img), np.array([pixel[:3] for pixel in _index_colors(img)], dtype=np.uint8)
+    if img.mode == "LA":
+        gray = np.arange(256, dtype=np.uint8)
+        return np.asarray(img.getchannel("L")), np.stack([gray, gray, gray], axis=1)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA")
+    return np.asarray(img), None
+
+
+def _gather(source, rows, columns):
+    """从 _rgb_source 的结果中取出指定行/列的 RGB(A) 像素"""
+    data, table = source
+    lines = data[rows, columns]
+    return lines if table is None else table[lines]
+
+
+def separator_line_flags(img: Image.Image, tolerance: int = COLOR_TOLERANCE, engine: str = "auto"):
+    """
+    整张图每一行、每一列（贯穿全图）是否为浅色均匀分隔线
+
+    Returns:
+        (行标记列表, 列标记列表)
+    """
+    width, height = img.size
+    if resolve_engine(engine) == "numpy":
+        # 按水平带处理：行直接逐带判定；列与首行像素比较，逐带累积各列是否一直均匀
+        rows = []
+        first_row = columns = None
+        for top in range(0, height, SEPARATOR_BAND_ROWS):
+            band = img.crop((0, top, width, min(height, top + SEPARATOR_BAND_ROWS)))
+            data = _gather(_rgb_source(band), slice(None), slice(None))
+            rows.extend(_separator_flags(data, tolerance).tolist())
+            if first_row is None:
+                first_row = data[0, :, :3].copy()
+                columns = _light_flags(first_row)
+            columns &= _uniform_flags(data.transpose(1, 0, 2), first_row, tolerance)
+        return rows, columns.tolist() if columns is not None else [False] * width
+    rows = [is_separator_line(img.crop((0, y, width, y + 1)), tolerance) for y in range(height)]
+    columns = [is_separator_line(img.crop((x, 0, x + 1, height)), tolerance) for x in range(width)]
+    return rows, columns
+
+
+def _segments(flags) -> List[Tuple[int, int]]:
+    """非分隔线的连续区间 [start, end)"""
+    segments = []
+    start = None
+    for index, flag in enumerate(flags):
+        if not flag and start is None:
+            start = index
+        elif flag and start is not None:
+            segments.append((start, index))
+            start = None
+    if start is not None:
+        segments.append((start, len(flags)))
+    return segments
+
+
+def infer_grid_from_separators(row_flags, column_flags) -> Optional[dict]:
+    """
+    由贯穿全图的分隔行/列推断等距网格
+
+    单元格尺寸、间距一致，且四周边距相同时返回可直接传给 split_by_grid 的参数
+    （columns, rows, sprite_width, sprite_height, padding, margin），否则返回 None。
+    """
+    row_segments = _segments(row_flags)
+    column_segments = _segments(column_flags)
+    if not row_segments or not column_segments:
+        return None
+
+    def axis_layout(segments, length):
+        sizes = {end - start for start, end in segments}
+        gaps = {segments[i + 1][0] - segments[i][1] for i in range(len(segments) - 1)}
+        if len(sizes) != 1 or len(gaps) > 1:
+            return None
+        return sizes.pop(), (gaps.pop() if gaps else None), segments[0][0], length - segments[-1][1]
+
+    column_layout = axis_layout(column_segments, len(column_flags))
+    row_layout = axis_layout(row_segments, len(row_flags))
+    if column_layout is None or row_layout is None:
+        return None
+    sprite_width, column_gap, left, right = column_layout
+    sprite_height, row_gap, top, bottom = row_layout
+
+    gaps = {gap for gap in (column_gap, row_gap) if gap is not None}
+    if len(gaps) > 1 or len({left, top}) != 1:
+        return None
+    padding = gaps.pop() if gaps else 0
+    margin = left
+    # split_by_grid 的边距两侧相同，右/下侧余量不足一个单元格即可
+    if right < margin or bottom < margin or right - margin >= sprite_width + padding \
+            or bottom - margin >= sprite_height + padding:
+        return None
+    return {
+        "columns": len(column_segments),
+        "rows": len(row_segments),
+        "sprite_width": sprite_width,
+        "sprite_height": sprite_height,
+        "padding": padding,
+        "margin": margin,
+    }
+
+
+class SeparatorIndex:
+    """
+    整表分隔线索引：智能边缘检测的逐单元格查表
+
+    按单元格的列区间（检测行）/行区间（检测列）分组，每组只取各单元格靠边的
+    SEPARATOR_SCAN 行/列，一次向量化判定；之后每个单元格的裁剪框只需查表。
+    结果与逐单元格裁剪后逐行判定完全一致。需要 NumPy。
+    """
+
+    def __init__(self, img: Image.Image, boxes, tolerance: int = COLOR_TOLERANCE):
+        source = _rgb_source(img)
+        self._cells = set()
+        row_requests = {}
+        column_requests = {}
+        for left, top, right, bottom in boxes:
+            height, width = bottom - top, right - left
+            if height <= 0 or width <= 0:
+                continue
+            self._cells.add((left, top, right, bottom))
+            rows = row_requests.setdefault((left, right), set())
+            rows.update(range(top, top + min(SEPARATOR_SCAN, height)))
+            rows.update(range(max(bottom - SEPARATOR_SCAN, top), bottom))
+            columns = column_requests.setdefault((top, bottom), set())
+            columns.update(range(left, left + min(SEPARATOR_SCAN, width)))
+            columns.update(range(max(right - SEPARATOR_SCAN, left), right))
+
+        self._rows = {}
+        for (left, right), ys in row_requests.items():
+            ys = sorted(ys)
+            flags = _separator_flags(_gather(source, ys, slice(left, right)), tolerance)
+            self._rows[(left, right)] = dict(zip(ys, flags.tolist()))
+        self._columns = {}
+        for (top, bottom), xs in column_requests.items():
+            xs = sorted(xs)
+            flags = _separator_flags(_gather(source, slice(top, bottom), xs).transpose(1, 0, 2), tolerance)
+            self._columns[(top, bottom)] = dict(zip(xs, flags.tolist()))
+
+    def covers(self, box: Tuple[int, int, int, int]) -> bool:
+        """该单元格（整表坐标）是否已收录"""
+        return tuple(box) in self._cells
+
+    def crop_box(self, box: Tuple[int, int, int, int]) -> Optional[Tuple[int, int, int, int]]:
+        """
+        单元格（整表坐标）去掉边缘分隔线后的裁剪框，坐标相对单元格左上角；无需裁剪时返回 None
+        """
+        left, top, right, bottom = box
+        width, height = right - left, bottom - top
+        rows = self._rows[(left, right)]
+        columns = self._columns[(top, bottom)]
+
+        crop_top = 0
+        for y in range(min(SEPARATOR_SCAN, height)):
+            if not rows[top + y]:
+                break
+            crop_top = y + 1
+        crop_bottom = 0
+        for y in range(height - 1, max(height - SEPARATOR_SCAN - 1, -1), -1):
+            if not rows[top + y]:
+                break
+            crop_bottom = height - y
+        crop_left = 0
+        for x in range(min(SEPARATOR_SCAN, width)):
+            if not columns[left + x]:
+                break
+            crop_left = x + 1
+        crop_right = 0
+        for x in range(width - 1, max(width - SEPARATOR_SCAN - 1, -1), -1):
+            if not columns[left + x]:
+                break
+            crop_right = width - x
+
+        new_right, new_bottom = width - crop_right, height - crop_bottom
+        if new_right > crop_left and new_bottom > crop_top:
+            return crop_left, crop_top, new_right, new_bottom
+        return None
+
+
+def frame_view(pixels, boxes: Sequence[Tuple[int, int, int, int]]):
+    """
+    把精灵表像素数组上的等尺寸区域取成 (N, H, W, 通道) 数组（NumPy）
+
+    区域同处一行且等间距排列（网格的一行单元格）时返回跨步视图，不复制像素；否则逐个区域拷贝后堆叠。
+    区域必须完全位于图内。
+    """
+    left, top, right, bottom = boxes[0]
+    width, height = right - left, bottom - top
+    step = boxes[1][0] - left if len(boxes) > 1 else width
+    if step > 0 and all(box[1] == top and box[0] == left + i * step for i, box in enumerate(boxes)):
+        row_stride, column_stride, channel_stride = pixels.strides
+        return np.lib.stride_tricks.as_strided(
+            pixels[top:, left:],
+            shape=(len(boxes), height, width, pixels.shape[2]),
+            strides=(step * column_stride, row_stride, column_stride, channel_stride),
+            writeable=False
+        )
+    return np.stack([pixels[y0:y1, x0:x1] for x0, y0, x1, y1 in boxes])
+
+
+def _leading_true(flags):
+    """(N, K) 布尔数组每行开头连续为真的个数"""
+    return np.where(flags.all(axis=1), flags.shape[1], flags.argmin(axis=1))
+
+
+def frame_separator_boxes(frames, tolerance: int = COLOR_TOLERANCE) -> List[Optional[Tuple[int, int, int, int]]]:
+    """
+    批量计算等尺寸帧去掉边缘分隔线后的裁剪框（相对帧左上角），无需裁剪的帧为 None
+
+    四条边各取靠边的 SEPARATOR_SCAN 行/列，所有帧一起向量化判定；与逐帧智能边缘检测结果一致。
+    """
+    count, height, width = frames.shape[:3]
+    scan_h, scan_w = min(SEPARATOR_SCAN, height), min(SEPARATOR_SCAN, width)
+
+    def flags(lines, length: int, scan: int):
+        return _separator_flags(lines.reshape(-1, length, lines.shape[-1]), tolerance).reshape(count, scan)
+
+    top = _leading_true(flags(frames[:, :scan_h], width, scan_h))
+    bottom = _leading_true(flags(frames[:, height - scan_h:][:, ::-1], width, scan_h))
+    columns = frames.transpose(0, 2, 1, 3)
+    left = _leading_true(flags(columns[:, :scan_w], height, scan_w))
+    right = _leading_true(flags(columns[:, width - scan_w:][:, ::-1], height, scan_w))
+
+    boxes: List[Optional[Tuple[int, int, int, int]]] = []
+    for box in zip(left.tolist(), top.tolist(), (width - right).tolist(), (height - bottom).tolist()):
+        boxes.append(box if box[2] > box[0] and box[3] > box[1] else None)
+    return boxes
+
+
+def frame_edge_background(frames, tolerance: int = COLOR_TOLERANCE):
+    """
+    批量去除等尺寸 RGBA 帧与边缘连通的纯色背景（NumPy）
+
+    逐帧规则与 SpriteSplitter 的去背景一致：以左上角颜色为背景色，四角中至少两个相近才处理；
+    各通道差值都 <= tolerance 且与帧边缘 4 连通的像素置为全透明。
+    各帧之间插入一行空行后竖直拼接，在一张掩码上一次完成游程连通域标记。
+
+    Returns:
+        (结果数组 (N, H, W, 4)（新拷贝）, 长度 N 的布尔数组：该帧是否做了去背景)
+    """
+    count, height, width = frames.shape[:3]
+    rgb = frames[..., :3].astype(np.int16)
+    corners = rgb[:, [0, 0, height - 1, height - 1], [0, width - 1, 0, width - 1]]
+    background = corners[:, 0]
+    active = (np.abs(corners - background[:, None]).sum(axis=2) < tolerance * 3).sum(axis=1) >= 2
+
+    matches = np.zeros((count, height + 1, width), dtype=np.uint8)
+    matches[:, :height] = (np.abs(rgb - background[:, None, None]) <= tolerance).all(axis=3) & active[:, None, None]
+    matches *= 255
+    pitch = height + 1
+    runs = RunMask.from_mask(Image.frombytes("L", (width, count * pitch), matches.tobytes()), "numpy")
+    components, labels = label_runs(runs.rows, runs.starts, runs.ends, width, return_labels=True)
+    # 连通域触及所在帧的边缘即与边缘连通（空行保证连通域不跨帧）
+    touching = np.asarray([
+        c.x == 0 or c.x + c.width == width or c.y % pitch == 0 or (c.y + c.height) % pitch == height
+        for c in components
+    ], dtype=bool)
+    selected = touching[labels] if len(components) else np.zeros(0, dtype=bool)
+    fill = np.asarray(runs.to_mask(selected)).reshape(count, pitch, width)[:, :height] != 0
+
+    result = np.array(frames)
+    result[fill] = 0
+    return result, active
+
+
+def frame_alpha_bboxes(alpha, regions=None) -> List[Optional[Tuple[int, int, int, int]]]:
+    """
+    批量计算等尺寸帧 alpha > 0 像素的包围盒（帧内坐标），全透明的帧为 None（NumPy）
+
+    regions 给出时只统计每帧对应区域 (left, top, right, bottom) 内的像素，等价于对该区域裁剪后 getbbox()。
+    """
+    count, height, width = alpha.shape
+    opaque = alpha > 0
+    if regions is not None:
+        regions = np.asarray(regions, dtype=np.int64).reshape(-1, 4)
+        ys, xs = np.arange(height), np.arange(width)
+        inside_rows = (ys >= regions[:, 1, None]) & (ys < regions[:, 3, None])
+        inside_columns = (xs >= regions[:, 0, None]) & (xs < regions[:, 2, None])
+        opaque &= inside_rows[:, :, None] & inside_columns[:, None, :]
+    rows = opaque.any(axis=2)
+    columns = opaque.any(axis=1)
+    top, bottom = rows.argmax(axis=1), height - rows[:, ::-1].argmax(axis=1)
+    left, right = columns.argmax(axis=1), width - columns[:, ::-1].argmax(axis=1)
+    return [
+        (l, t, r, b) if filled else None
+        for l, t, r, b, filled in zip(left.tolist(), top.tolist(), right.tolist(), bottom.tolist(), rows.any(axis=1).tolist())
+    ]
+
+
+def merge_nearby_components(components: List[Component], distance: int) -> List[Component]:
+    """
+    合并彼此距离不超过 distance 像素的连通域（用于火花、粒子、发丝等碎片）
+
+    两个包围盒在 x、y 方向的间隙都不超过 distance 即合并，合并后的包围盒可能继续靠近其他碎片，
+    因此重复若干轮直到不再发生合并。每轮用均匀网格空间哈希查找候选，避免 O(n²) 两两比较。
+    """
+    if distance <= 0 or len(components) < 2:
+        return components
+
+    while True:
+        merger = ComponentMerger()
+        nodes = [merger.add(c) for c in components]
+
+        # 网格边长取包围盒边长的中位数（至少 distance + 1），大多数盒子只落在少量格子里
+        sides = sorted(max(c.width, c.height) for c in components)
+        cell = max(distance + 1, sides[len(sides) // 2])
+        grid = {}
+        for node, c in zip(nodes, components):
+            for gy in range(c.y // cell, (c.y + c.height - 1) // cell + 1):
+                for gx in range(c.x // cell, (c.x + c.width - 1) // cell + 1):
+                    grid.setdefault((gx, gy), []).append(node)
+
+        merged = False
+        for node, c in zip(nodes, components):
+            # 间隙 <= distance 等价于外扩 distance + 1 后与对方相交
+            reach = distance + 1
+            x0, y0 = c.x - reach, c.y - reach
+            x1, y1 = c.x + c.width + reach, c.y + c.height + reach
+            seen = set()
+            for gy in range(y0 // cell, (y1 - 1) // cell + 1):
+                for gx in range(x0 // cell, (x1 - 1) // cell + 1):
+                    for other in grid.get((gx, gy), ()):
+                        if other <= node or other in seen:
+                            continue
+                        seen.add(other)
+                        o = components[other]
+                        if o.x < x1 and x0 < o.x + o.width and o.y < y1 and y0 < o.y + o.height:
+                            if merger.find(node) != merger.find(other):
+                                merger.union(node, other)
+                                merged = True
+
+        if not merged:
+            return components
+        components = merger.components()
+
+
+def select_components(
+    components: List[Component],
+    min_width: int = 1,
+    min_height: int = 1,
+    min_density: float = MIN_DENSITY
+) -> List[Component]:
+    """
+    按最小尺寸与像素密度过滤，并按参考实现的顺序（从上到下，从左到右）排序
+    """
+    selected = [
+        c for c in components
+        if c.width >= min_width and c.height >= min_height
+        and c.pixels / (c.width * c.height) > min_density
+    ]
+    # 参考实现按扫描顺序发现连通域后再按 (y, x) 稳定排序，first_x 还原了平局时的发现顺序
+    selected.sort(key=lambda c: (c.y, c.x, c.first_x))
+    return selected
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow
+@output 导出：run_pipeline, encode_image, atomic_write, image_format_for, PIPELINE_DEPTH_PER_WORKER,
+              MANIFEST_NAME, load_manifest, save_manifest, options_digest, bytes_digest, DEDUPE_MODES, link_file,
+              OutputSink, DirectorySink, ZipSink, TarSink, open_sink, is_archive_target,
+              ENCODING_PROFILES, DEFAULT_PROFILE, REPORT_NAME, ARCHIVE_MTIME, ordered
+@pos    精灵导出流水线：有界队列串联的分阶段线程（变换 → 编码为字节 → 原子写入；输入或任一阶段出错时所有线程都会退出）；增量导出清单；重复帧链接；输出目标（抽象基类 OutputSink；目录/zip/tar/标准输出 tar 流；归档成员按精灵序号写入、使用固定修改时间，输出可复现）；编码档位
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+
+流水线模型：
+- 每个阶段由若干线程消费上一阶段的有界队列，结果放入下一阶段的队列
+- 队列有界，内存占用受队列深度限制；写入阶段独立，磁盘延迟不阻塞编码
+- 任一阶段出错后停止投递，各阶段继续排空队列以免阻塞，最后在调用线程重新抛出
+
+增量导出清单（输出目录下的 _export_manifest.json）：
+- 以输出文件名为键，记录源像素哈希、生效的处理参数哈希、输出文件哈希与大小/修改时间
+- 源像素与参数都未变、且输出文件的大小/修改时间与记录一致时跳过该精灵
+
+输出目标（sink）：
+- 目录：每个文件原子写入
+- .zip / .tar / .tar.gz / .tgz：编码结果直接流式写入归档，不落地到输出目录
+- "-"：tar 流写到标准输出
+- 归档成员按精灵序号顺序写入（先编码完成的暂存），修改时间固定为 ARCHIVE_MTIME，同样的输入得到相同的归档
+"""
+
+import abc
+import gzip
+import hashlib
+import io
+import json
+import os
+import queue
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+
+# 每个工作线程对应的队列深度（队列容量 = 线程数 × 该值）
+PIPELINE_DEPTH_PER_WORKER = 2
+
+# 增量导出清单文件名与格式版本
+MANIFEST_NAME = "_export_manifest.json"
+MANIFEST_VERSION = 1
+
+# 重复帧去重方式：不去重 / 只写一份并在数据文件中记录别名 / 硬链接 / 符号链接
+DEDUPE_MODES = ("none", "alias", "hardlink", "symlink")
+
+# 归档输出目标的扩展名 → tarfile 流模式（zip 单独处理）；"-" 表示 tar 流写到标准输出
+STDOUT_TARGET = "-"
+_TAR_MODES = {".tar": "w|", ".tar.gz": "w|gz", ".tgz": "w|gz"}
+
+# 编码档位：按 Pillow 格式名给出保存参数；balanced 与以往默认行为一致（PNG 压缩级别 6、WebP method 4、JPEG 质量 95）
+ENCODING_PROFILES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "fast": {
+        "PNG": {"compress_level": 1},
+        "WEBP": {"method": 0},
+        "JPEG": {"quality": 95},
+    },
+    "balanced": {
+        "PNG": {},
+        "WEBP": {},
+        "JPEG": {"quality": 95},
+    },
+    "smallest": {
+        "PNG": {"optimize": True},
+        "WEBP": {"method": 6},
+        "JPEG": {"quality": 95, "optimize": True},
+    },
+}
+DEFAULT_PROFILE = "balanced"
+
+# 导出运行报告文件名
+REPORT_NAME = "_report.json"
+
+# 归档成员（及 gzip 头）统一使用的修改时间：1980-01-01 00:00:00 UTC（zip 能表示的最早时间），
+# 同样的输入总是得到逐字节相同的归档
+ARCHIVE_MTIME = 315532800
+
+_DONE = object()
+
+
+def run_pipeline(items: Iterable[Any], stages: Sequence[Tuple[Callable[[Any], Any], int]], depth: int):
+    """
+    按阶段并发处理 items
+
+    Args:
+        items: 输入序列（在调用线程中依次投递）
+        stages: [(处理函数, 线程数), ...]；前一阶段的返回值作为后一阶段的输入，返回 None 表示该项到此为止，
+                最后一阶段的返回值丢弃
+        depth: 各阶段输入队列的容量
+    """
+    queues = [queue.Queue(maxsize=max(1, depth)) for _ in stages]
+    errors: List[BaseException] = []
+    failed = threading.Event()
+
+    def worker(func: Callable[[Any], Any], inbox: queue.Queue, outbox):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            if failed.is_set():
+                # 出错后只排空队列，保证上游 put 不会阻塞
+                continue
+            try:
+                result = func(item)
+            except BaseException as e:
+                errors.append(e)
+                failed.set()
+                continue
+            if outbox is not None and result is not None:
+                outbox.put(result)
+
+    groups = []
+    for index, (func, threads) in enumerate(stages):
+        outbox = queues[index + 1] if index + 1 < len(stages) else None
+        group = [
+            threading.Thread(target=worker, args=(func, queues[index], outbox), daemon=True)
+            for _ in range(max(1, threads))
+        ]
+        for thread in group:
+            thread.start()
+        groups.append(group)
+
+    try:
+        for item in items:
+            if failed.is_set():
+                break
+            queues[0].put(item)
+    except BaseException:
+        # 输入生成器出错（如流式解码遇到截断的 PNG）：其余项不再处理，异常在各阶段线程退出后抛出
+        failed.set()
+        raise
+    finally:
+        # 逐阶段结束：上一阶段线程全部退出后，下一阶段的输入才不会再增加
+        for index, group in enumerate(groups):
+            for _ in group:
+                queues[index].put(_DONE)
+            for thread in group:
+                thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+def ordered(func: Callable[[Tuple], Any], keys: Iterable[Any]) -> Callable[[Tuple], None]:
+    """
+    把乱序到达的 (键, ...) 项按 keys 的顺序交给 func
+
+    先到的项暂存，直到前面的键全部到达；用作流水线的单线程写入阶段，使归档成员顺序与并发度无关。
+    keys 中的每个键都必须恰好到达一次。
+    """
+    order = iter(keys)
+    pending: Dict[Any, Tuple] = {}
+    expected = next(order, _DONE)
+
+    def write(item: Tuple):
+        nonlocal expected
+        pending[item[0]] = item
+        while expected in pending:
+            func(pending.pop(expected))
+            expected = next(order, _DONE)
+
+    return write
+
+
+def image_format_for(format: str) -> str:
+    """把输出扩展名（png/jpg/webp 等）解析为 Pillow 的格式名"""
+    name = Image.registered_extensions().get(f".{format.lower()}")
+    if name is None:
+        raise ValueError(f"unknown file extension: .{format}")
+    return name
+
+
+def encode_image(img: Image.Image, format: str, profile: str = DEFAULT_PROFILE) -> bytes:
+    """按输出格式与编码档位把图片编码为字节（jpg 会先合成到白色背景）"""
+    if profile not in ENCODING_PROFILES:
+        raise ValueError(f"不支持的编码档位: {profile}")
+    options = ENCODING_PROFILES[profile]
+    buffer = io.BytesIO()
+    if format.lower() in ['jpg', 'jpeg']:
+        # 创建白色背景
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'RGBA':
+            background.paste(img, mask=img.split()[3])
+        else:
+            background.paste(img)
+        background.save(buffer, format="JPEG", **options["JPEG"])
+    else:
+        name = image_format_for(format)
+        img.save(buffer, format=name, **options.get(name, {}))
+    return buffer.getvalue()
+
+
+def atomic_write(path: str, data: bytes):
+    """先写入同目录临时文件再重命名，读者不会看到写了一半的文件"""
+    directory, name = os.path.split(path)
+    temp_path = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def bytes_digest(data: bytes) -> str:
+    """输出文件内容哈希"""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def options_digest(options: Dict) -> str:
+    """处理参数哈希（参数字典按键排序后序列化）"""
+    payload = json.dumps(options, sort_keys=True)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+
+def load_manifest(output_dir: str) -> Dict[str, Dict]:
+    """读取输出目录的增量导出清单，不存在、损坏或版本不符时返回空字典"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def save_manifest(output_dir: str, entries: Dict[str, Dict]):
+    """原子写入增量导出清单"""
+    payload = json.dumps({"version": MANIFEST_VERSION, "entries": entries}, indent=2, sort_keys=True)
+    atomic_write(os.path.join(output_dir, MANIFEST_NAME), payload.encode("utf-8"))
+
+
+def link_file(source: str, path: str, mode: str):
+    """
+    在 path 处创建指向 source 的硬链接或符号链接（同目录相对链接），已存在的文件被原子替换
+
+    文件系统不支持时抛出 OSError，由调用方回退为写入完整文件
+    """
+    directory, name = os.path.split(path)
+    temp_path = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.lnk")
+    try:
+        if mode == "hardlink":
+            os.link(source, temp_path)
+        elif mode == "symlink":
+            os.symlink(os.path.relpath(source, directory or "."), temp_path)
+        else:
+            raise ValueError(f"不支持的链接方式: {mode}")
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class OutputSink(abc.ABC):
+    """导出文件的写入目标（同一时刻只由一个写入线程调用 write；子类未实现 write 时创建即报错）"""
+
+    # 是否为归档（归档内不支持增量、链接等依赖文件系统的功能）
+    is_archive = False
+
+    @abc.abstractmethod
+    def write(self, name: str, data: bytes):
+        """以 name 写入一个文件"""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class DirectorySink(OutputSink):
+    """输出到目录，每个文件原子写入"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def write(self, name: str, data: bytes):
+        atomic_write(self.path(name), data)
+
+
+class ZipSink(OutputSink):
+    """输出到 zip 归档（图片已压缩，成员不再二次压缩）"""
+
+    is_archive = True
+
+    def __init__(self, path: str):
+        self.path = path
+        _ensure_parent(path)
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED)
+
+    def write(self, name: str, data: bytes):
+        info = zipfile.ZipInfo(name, date_time=time.gmtime(ARCHIVE_MTIME)[:6])
+        info.external_attr = 0o644 << 16
+        self._zip.writestr(info, data)
+
+    def close(self):
+        self._zip.close()
+
+
+class TarSink(OutputSink):
+    """以流模式输出 tar 归档（写入文件或标准输出）"""
+
+    is_archive = True
+
+    def __init__(self, path: Optional[str] = None, fileobj: Optional[BinaryIO] = None, mode: str = "w|"):
+        self.path = path
+        self._file = self._gzip = None
+        if path:
+            _ensure_parent(path)
+        if mode == "w|gz":
+            # tarfile 的 gzip 流头写入当前时间与文件名，改由 GzipFile 写入固定时间、不含文件名
+            if fileobj is None:
+                fileobj = self._file = open(path, "wb")
+            fileobj = self._gzip = gzip.GzipFile(filename="", mode="wb", fileobj=fileobj, mtime=ARCHIVE_MTIME)
+            mode = "w|"
+        self._tar = tarfile.open(name=path, fileobj=fileobj, mode=mode)
+
+    def write(self, name: str, data: bytes):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = ARCHIVE_MTIME
+        info.mode = 0o644
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self._tar.close()
+        for handle in (self._gzip, self._file):
+            if handle is not None:
+                handle.close()
+
+
+def _ensure_parent(path: str):
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+
+def _tar_mode(target: str) -> Optional[str]:
+    lower = target.lower()
+    for suffix, mode in _TAR_MODES.items():
+        if lower.endswith(suffix):
+            return mode
+    return None
+
+
+def is_archive_target(target: str) -> bool:
+    """输出路径是否为归档目标（zip/tar/tar.gz/tgz 或标准输出 "-"）"""
+    return target == STDOUT_TARGET or target.lower().endswith(".zip") or _tar_mode(target) is not None
+
+
+def open_sink(target: str, stdout: Optional[BinaryIO] = None) -> OutputSink:
+    """
+    按输出路径打开写入目标
+
+    Args:
+        target: 目录、.zip/.tar/.tar.gz/.tgz 归档路径，或 "-"（tar 流写到标准输出）
+        stdout: "-" 时写入的二进制流（默认 sys.stdout.buffer）
+    """
+    if target == STDOUT_TARGET:
+        return TarSink(fileobj=stdout or sys.stdout.buffer, mode="w|")
+    if target.lower().endswith(".zip"):
+        return ZipSink(target)
+    mode = _tar_mode(target)
+    if mode is not None:
+        return TarSink(path=target, mode=mode)
+    return DirectorySink(target)
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 """
-@input  依赖：Pillow, i18n
+@input  依赖：Pillow, i18n, sprite_detect, sprite_cache, sprite_export, sprite_stream
 @output 导出：SpriteSplitter, SpriteRect
-@pos    精灵表拆分的核心逻辑（含导出批量缩放：fit 等比缩放 + 智能透明补边对齐）
+@pos    精灵表拆分的核心逻辑（含导出批量缩放：fit 等比缩放 + 智能透明补边对齐；Rect 模式可选检测引擎、分块限内存检测（延迟加载时按水平带流式解码，整图不进内存，可与多进程分带同时使用）与多进程检测；trim 复用整表不透明像素索引（积分图/游程掩码）；碎片合并；金字塔检测（候选区域过密时回退整图标记）；XY-Cut 模式；按图缓存检测结果，调整尺寸/密度阈值时只重新过滤；可选按内容哈希的磁盘缓存；分阶段流水线导出：变换/编码/原子写入；增量导出跳过未变化精灵；重复帧去重；可直接流式写入 zip/tar 归档或标准输出（成员按精灵序号写入、固定修改时间，输出可复现）；编码档位与导出运行报告（按需写入）；数据文件原子写入；线性时间边缘去背景；智能边缘检测按整表分隔线索引查表，并可由分隔线推断网格；等尺寸单元格批量缩放；精灵表保持 P/L/LA/RGB 原始模式加载，只在裁剪区域转 RGBA；Data 模式可延迟加载（PNG 文件头直接解析，不受 Pillow 像素数上限限制）并按水平带流式解码导出；Grid 模式可批量跳过空单元格（判空索引按阈值与背景色缓存）；逐精灵变换预编译为变换链，裁剪阶段合并为一次裁剪；等尺寸帧可按行批量数组变换）
 
 ⚠️ 一旦本文件被更新，务必更新以上注释
 
@@ -13,19 +13,30 @@
 1. Grid模式 - 按固定网格拆分
 2. Rectangular模式 - 自动检测矩形区域（通过透明像素边界）
 3. Data File模式 - 使用JSON数据文件拆分
+4. XY-Cut模式 - 沿整行/整列透明间隔递归切分
 
 作者: AI Assistant
 日期: 2024
 """
 
 import os
+import sys
 import json
+import contextlib
 import argparse
+import multiprocessing
+import threading
+import time
 from PIL import Image
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from i18n import i18n
-from typing import List, Tuple, Optional, Dict
+import sprite_detect
+import sprite_cache
+import sprite_export
+import sprite_stream
+from typing import Iterator, List, Tuple, Optional, Dict
 from pathlib import Path
+from collections import OrderedDict
 
 
 def resolve_image_path_from_data_file(data_path: str) -> Optional[str]:
@@ -73,24 +84,90 @@ class SpriteRect:
     off_y: int = 0
     source_w: int = 0
     source_h: int = 0
+    alias: str = ""
+
+
+@dataclass
+class _ExportPlan:
+    """导出时逐精灵执行的变换参数（已处理还原尺寸与裁剪选项的互斥）"""
+    trim: bool
+    edge_crop: int
+    smart_edge: bool
+    remove_bg: bool
+    restore: bool
+    origin_mode: str
+    resize_mode: str
+    resize_scale: float
+    resize_width: int
+    resize_height: int
+    pad_align: str
+    pad_smart: bool
+
+
+@dataclass
+class _TransformChain:
+    """
+    由导出计划编译出的逐精灵变换链（每次导出编译一次，无效阶段在编译时剔除）
+
+    固定裁边、查表的智能边缘检测、查索引的 trim 都只移动整表坐标上的裁剪框，合并为一次裁剪；
+    只有去背景等需要像素的阶段才取出中间图片。
+    """
+    edge_crop: int
+    smart_edge: bool
+    separators: Optional["sprite_detect.SeparatorIndex"]
+    remove_bg: bool
+    trim: bool
+    restore: bool
+    origin_mode: str
+    # (模式, 比例, 目标宽, 目标高, 补边对齐, 智能补边)；不缩放或参数无效时为 None
+    resize: Optional[Tuple[str, float, int, int, str, bool]]
 
 
 class SpriteSplitter:
     """精灵表拆分器主类"""
 
-    def __init__(self, image_path: str):
+    # 检测缓存最多保留的条目数（每个条目对应一组 alpha 阈值 + 合并距离）
+    DETECT_CACHE_SIZE = 8
+
+    # 等尺寸批量缩放时每批拼接的单元格数
+    RESIZE_BATCH_CELLS = 64
+
+    # 批量数组变换时每批的最多帧数（同一行的单元格一批）
+    TRANSFORM_BATCH_CELLS = 256
+
+    # fit 智能补边：alpha 大于该值才算实体像素（查找表避免每次用 Python 函数生成）
+    PAD_ALPHA_THRESHOLD = 10
+    _PAD_ALPHA_LUT = [0] * (PAD_ALPHA_THRESHOLD + 1) + [255] * (255 - PAD_ALPHA_THRESHOLD)
+
+    def __init__(self, image_path: str, cache: Optional[sprite_cache.DetectionCache] = None,
+                 defer_load: bool = False):
         """
         初始化拆分器
 
         Args:
             image_path: 精灵表图片路径
+            cache: 拆分结果磁盘缓存（可选，Rect/XY-Cut 模式命中时跳过检测）
+            defer_load: 只读取图片尺寸、不解码像素（Data 模式导出时按水平带流式解码；
+                        不支持流式解码的图片在导出时整图加载）
         """
         self.image_path = image_path
         self.image: Optional[Image.Image] = None
+        self.image_size: Tuple[int, int] = (0, 0)
         self.sprites: List[SpriteRect] = []
         self.restore_source = False
         self.offset_origin = "top"
-        self._load_image()
+        # 整表不透明像素索引（积分图或游程掩码），trim 等区域查询共用，每张图只构建一次
+        self._opacity = None
+        # Grid 判空索引：((alpha_threshold, 背景色), 索引)，网格参数变化时复用
+        self._empty_index = None
+        self._detect_cache: "OrderedDict[Tuple[int, int], List[sprite_detect.Component]]" = OrderedDict()
+        self.cache = cache
+        self.export_report: Optional[Dict] = None
+        self._content_digest: Optional[str] = None
+        if defer_load:
+            self._read_image_header()
+        else:
+            self._load_image()
 
     def _load_image(self):
         """加载图片"""
@@ -98,18 +175,75 @@ class SpriteSplitter:
             raise FileNotFoundError(f"找不到图片文件: {self.image_path}")
 
         # Pillow 会延迟读取像素数据；这里强制加载并断开文件句柄，避免导出/测试阶段资源泄漏
+        # P/L/LA/RGB 保持原始模式（调色板图每像素 1 字节），导出时只把裁剪区域转成 RGBA；
+        # 带透明色键的 L/RGB 图转成 RGBA，保证检测掩码与透明度一致
         with Image.open(self.image_path) as handle:
-            if handle.mode != "RGBA":
+            if self._needs_rgba(handle):
                 loaded = handle.convert("RGBA")
             else:
                 loaded = handle.copy()
             loaded.load()
             self.image = loaded
+            self.image_size = loaded.size
+        self._opacity = None
+        self._empty_index = None
+        self._detect_cache.clear()
+        self._content_digest = None
 
         print(f"✓ 已加载图片: {self.image_path}")
         print(f"  尺寸: {self.image.width} x {self.image.height}")
         print(f"  模式: {self.image.mode}")
 
+    @staticmethod
+    def _needs_rgba(img: Image.Image) -> bool:
+        """非原始模式或带透明色键的 L/RGB 图需转成 RGBA 处理"""
+        keyed = img.mode in ("L", "RGB") and "transparency" in img.info
+        return img.mode not in sprite_detect.NATIVE_MODES or keyed
+
+    def _stream_bands(self, band_rows: int) -> Iterator[Tuple[int, Image.Image]]:
+        """按水平带流式解码精灵表，产出 (起始行, 带图片)；模式换算与整图加载一致"""
+        for top, band in sprite_stream.PngBandReader(self.image_path, band_rows).bands():
+            yield top, band.convert("RGBA") if self._needs_rgba(band) else band
+
+    def _stream_corners(self, band_rows: int) -> Image.Image:
+        """流式解码一遍，取四个角的像素拼成 2x2 的 RGBA 图（供背景色检测）"""
+        width, height = self.image_size
+        first = last = None
+        for top, band in self._stream_bands(band_rows):
+            if first is None:
+                first = band.crop((0, 0, width, 1))
+            if top + band.height == height:
+                last = band.crop((0, band.height - 1, width, band.height))
+        corners = Image.new("RGBA", (2, 2))
+        for y, row in enumerate((first, last)):
+            corners.paste(row.crop((0, 0, 1, 1)).convert("RGBA"), (0, y))
+            corners.paste(row.crop((width - 1, 0, width, 1)).convert("RGBA"), (1, y))
+        return corners
+
+    def _read_image_header(self):
+        """
+        只读取图片尺寸与模式，不解码像素
+
+        可流式解码的 PNG 直接解析 IHDR，不经过 Pillow 的像素数上限检查（超大图也能延迟加载）；
+        其他图片回退为 Image.open 读取文件头。
+        """
+        if not os.path.exists(self.image_path):
+            raise FileNotFoundError(f"找不到图片文件: {self.image_path}")
+        try:
+            reader = sprite_stream.PngBandReader(self.image_path)
+        except (OSError, ValueError):
+            reader = None
+        if reader is not None:
+            self.image_size, mode = reader.size, reader.mode
+        else:
+            with Image.open(self.image_path) as handle:
+                self.image_size = handle.size
+                mode = handle.mode
+
+        print(f"✓ 已读取图片信息（延迟解码）: {self.image_path}")
+        print(f"  尺寸: {self.image_size[0]} x {self.image_size[1]}")
+        print(f"  模式: {mode}")
+
     @staticmethod
     def _safe_int(value, default: int = 0) -> int:
         try:
@@ -134,6 +268,18 @@ class SpriteSplitter:
 
         return x, y, width, height, off_x, off_y, source_w, source_h
 
+    def infer_grid(self, tolerance: int = 30) -> Optional[Dict[str, int]]:
+        """
+        由贯穿整表的浅色分隔行/列推断网格参数
+
+        与智能边缘检测使用同一分隔线判定；单元格尺寸与间距均匀时返回可直接传给
+        split_by_grid 的参数（columns, rows, sprite_width, sprite_height, padding, margin），否则返回 None
+        """
+        if not self.image:
+            raise ValueError("请先加载图片")
+        row_flags, column_flags = sprite_detect.separator_line_flags(self.image, tolerance)
+        return sprite_detect.infer_grid_from_separators(row_flags, column_flags)
+
     def split_by_grid(
         self,
         columns: int = 0,
@@ -141,7 +287,9 @@ class SpriteSplitter:
         sprite_width: int = 0,
         sprite_height: int = 0,
         padding: int = 0,
-        margin: int = 0
+        margin: int = 0,
+        skip_empty: bool = False,
+        alpha_threshold: int = 0
     ) -> List[SpriteRect]:
         """
         Grid模式 - 按固定网格拆分
@@ -155,6 +303,8 @@ class SpriteSplitter:
             sprite_height: 精灵高度 (可选)
             padding: 精灵之间的间距
             margin: 边缘间距
+            skip_empty: 跳过全透明或只有背景色的单元格（名称保留网格序号）
+            alpha_threshold: skip_empty 时 alpha 不超过此值视为透明
 
         Returns:
             精灵矩形列表
@@ -205,96 +355,243 @@ class SpriteSplitter:
                 self.sprites.append(sprite)
                 sprite_index += 1
 
+        if skip_empty and self.sprites:
+            boxes = [(s.x, s.y, s.x + s.width, s.y + s.height) for s in self.sprites]
+            empty = self.empty_cells(boxes, alpha_threshold)
+            kept = [sprite for sprite, is_empty in zip(self.sprites, empty) if not is_empty]
+            print(f"  跳过空单元格: {len(self.sprites) - len(kept)} 个")
+            self.sprites = kept
+
         print(f"  共检测到 {len(self.sprites)} 个精灵")
         return self.sprites
 
+    def empty_cells(self, boxes: List[Tuple[int, int, int, int]], alpha_threshold: int = 0) -> List[bool]:
+        """
+        批量判断单元格 (left, top, right, bottom) 是否为空
+
+        全部像素 alpha <= alpha_threshold，或与四角检测出的纯色背景接近即为空；
+        整表一次构建前景掩码后批量查询，不逐单元格扫描像素；判空索引按 (alpha_threshold, 背景色)
+        缓存在当前图片上，网格参数变化时（如 GUI 实时预览）只重新查询。
+        """
+        bg_color = sprite_detect.detect_background_color(self.image, alpha_threshold)
+        key = (alpha_threshold, bg_color)
+        if self._empty_index is None or self._empty_index[0] != key:
+            self._empty_index = (key, sprite_detect.empty_cells_index(self.image, alpha_threshold, bg_color))
+        return sprite_detect.cells_empty(self._empty_index[1], boxes)
+
     def split_by_rectangle(
         self,
         min_width: int = 1,
         min_height: int = 1,
-        alpha_threshold: int = 0
+        alpha_threshold: int = 0,
+        engine: str = "auto",
+        tile_size: int = 0,
+        max_memory_mb: float = 0,
+        workers: int = 1,
+        merge_distance: int = 0,
+        pyramid: int = 0,
+        min_density: float = sprite_detect.MIN_DENSITY
     ) -> List[SpriteRect]:
         """
         Rectangular模式 - 自动检测精灵区域
 
-        智能检测：自动识别背景色（透明或纯色），然后检测非背景区域
+        智能检测：自动识别背景色（透明或纯色），然后检测非背景区域。
+        连通区域统计（边界框、像素数）按 (alpha_threshold, merge_distance) 缓存在当前图片上，
+        只调整最小尺寸或密度阈值时直接重新过滤缓存，无需重新检测。
 
         Args:
             min_width: 最小精灵宽度
             min_height: 最小精灵高度
             alpha_threshold: alpha阈值，低于此值视为透明
+            engine: 检测引擎 - "auto"(有numpy用numpy，否则pillow), "numpy", "pillow",
+                    "reference"(逐像素洪水填充的参考实现)
+            tile_size: 分块检测的分块边长（>0 时启用分块检测）
+            max_memory_mb: 分块检测的内存上限(MB)，未指定 tile_size 时据此估算分块边长
+            workers: 并行进程数（>1 时按水平带多进程检测，带高不超过分块边长）
+            merge_distance: 碎片合并距离，间隙不超过该像素数的区域合并为一个精灵（0 表示不合并）
+            pyramid: 金字塔检测的缩小倍数（如 4 或 8，0 表示不启用）；先在缩小图上定位候选区域，
+                     再在区域内全分辨率精确检测（候选区域过密时回退整图标记）。同时启用并行/分块时以并行/分块为准
+            min_density: 最小像素密度（像素数/边界框面积），不高于该值的区域视为噪点过滤
 
         Returns:
             精灵矩形列表
         """
-        if not self.image:
-            raise ValueError("请先加载图片")
+        engine = sprite_detect.resolve_engine(engine)
+        if merge_distance > 0 and engine == "reference":
+            raise ValueError("参考实现不支持碎片合并（merge_distance）")
 
         self.restore_source = False
         print(f"\n🔍 Rectangular模式拆分:")
         print(f"  最小尺寸: {min_width} x {min_height}")
         print(f"  Alpha阈值: {alpha_threshold}")
+        print(f"  最小密度: {min_density:.2%}")
+        print(f"  检测引擎: {engine}")
+        tiled = engine != "reference" and (tile_size > 0 or max_memory_mb > 0)
+        if tiled:
+            if tile_size <= 0:
+                tile_size = sprite_detect.tile_size_for_memory(max_memory_mb)
+            print(f"  分块检测: {tile_size} x {tile_size}")
+        parallel = engine != "reference" and workers > 1
+        if parallel:
+            print(f"  并行进程: {workers}")
+        use_pyramid = engine != "reference" and pyramid > 1 and not (parallel or tiled)
+        if use_pyramid:
+            print(f"  金字塔检测: 1/{min(pyramid, sprite_detect.PYRAMID_MAX_FACTOR)}")
+        if merge_distance > 0:
+            print(f"  碎片合并距离: {merge_distance}px")
+        # 延迟加载时分块检测直接消费流式解码的水平带，整张图不进内存（也不受 Pillow 像素数上限限制）
+        streamed = self.image is None and tiled and sprite_stream.is_streamable(self.image_path)
+        if streamed:
+            print("  流式解码: 按分块行逐带解码")
+        elif self.image is None:
+            self._load_image()
+
+        # 不同检测方式（引擎/分块/并行/金字塔）结果一致，缓存键只含影响结果的参数；参考实现始终重新检测
+        cache_params = {
+            "min_width": min_width,
+            "min_height": min_height,
+            "alpha_threshold": alpha_threshold,
+            "merge_distance": merge_distance,
+            "min_density": min_density,
+        }
+        if engine != "reference" and self._load_cached_sprites("rect", cache_params):
+            return self.sprites
+
+        corners = self._stream_corners(tile_size) if streamed else self.image
+        bg_color = sprite_detect.detect_background_color(corners, alpha_threshold)
+        if bg_color is None:
+            print("  检测到透明背景")
+        else:
+            print(f"  检测到纯色背景: RGB{bg_color}")
 
-        # 获取像素数据
-        if self.image.mode != 'RGBA':
-            img = self.image.convert('RGBA')
+        cached = self.is_detection_cached(alpha_threshold, merge_distance)
+        if engine == "reference":
+            self.sprites = self._split_by_rectangle_reference(
+                min_width, min_height, alpha_threshold, bg_color, min_density
+            )
+        elif cached:
+            print("  使用缓存的检测结果")
+            components = self._detect_cache[(alpha_threshold, merge_distance)]
+            self._detect_cache.move_to_end((alpha_threshold, merge_distance))
+        elif self.is_detection_cached(alpha_threshold, 0):
+            print("  使用缓存的检测结果，仅重新合并碎片")
+            components = sprite_detect.merge_nearby_components(
+                self._detect_cache[(alpha_threshold, 0)], merge_distance
+            )
+            self._cache_detection(alpha_threshold, merge_distance, components)
         else:
-            img = self.image
+            if streamed:
+                components = sprite_detect.find_components_banded(
+                    self.image_size, self._stream_bands(tile_size), alpha_threshold, bg_color, engine,
+                    tile_size=tile_size, workers=workers if parallel else 1
+                )
+            elif parallel:
+                components = sprite_detect.find_components_parallel(
+                    self.image, alpha_threshold, bg_color, engine,
+                    workers=workers, band_height=tile_size if tiled else 0
+                )
+            elif tiled:
+                components = sprite_detect.find_components_tiled(
+                    self.image, alpha_threshold, bg_color, engine, tile_size=tile_size
+                )
+            elif use_pyramid:
+                components = sprite_detect.find_components_pyramid(
+                    self.image, alpha_threshold, bg_color, engine, factor=pyramid
+                )
+            else:
+                components = sprite_detect.find_components(self.image, alpha_threshold, bg_color, engine)
+            self._cache_detection(alpha_threshold, 0, components)
+            if merge_distance > 0:
+                components = sprite_detect.merge_nearby_components(components, merge_distance)
+                self._cache_detection(alpha_threshold, merge_distance, components)
+
+        if engine != "reference":
+            self.sprites = [
+                SpriteRect(x=c.x, y=c.y, width=c.width, height=c.height)
+                for c in sprite_detect.select_components(components, min_width, min_height, min_density)
+            ]
 
-        pixels = img.load()
-        width, height = img.size
+        # 重新命名
+        for i, sprite in enumerate(self.sprites):
+            sprite.name = f"sprite_{i:04d}"
 
-        # 智能检测背景色 - 从四个角采样
-        corner_samples = [
-            pixels[0, 0],
-            pixels[width-1, 0],
-            pixels[0, height-1],
-            pixels[width-1, height-1]
-        ]
+        if engine != "reference":
+            self._store_cached_sprites("rect", cache_params)
+        print(f"  共检测到 {len(self.sprites)} 个精灵")
+        return self.sprites
 
-        # 检测是否有透明背景
-        has_transparent_bg = any(c[3] <= alpha_threshold for c in corner_samples)
+    def _disk_cache_key(self, mode: str, params: Dict) -> str:
+        """磁盘缓存键：解码后像素的内容哈希（每张图只计算一次）+ 模式 + 参数"""
+        if self._content_digest is None and self.image is None:
+            self._content_digest = sprite_cache.bands_digest(
+                self.image_size, (band for _, band in self._stream_bands(sprite_cache.HASH_BAND_ROWS))
+            )
+        elif self._content_digest is None:
+            self._content_digest = sprite_cache.image_digest(self.image)
+        return self.cache.make_key(self._content_digest, mode, params)
 
-        if has_transparent_bg:
-            print("  检测到透明背景")
-            bg_color = None
-        else:
-            # 找到最常见的角落颜色作为背景色
-            from collections import Counter
-            # 只比较RGB，忽略少许差异
-            def color_key(c):
-                return (c[0] // 10, c[1] // 10, c[2] // 10)
+    def _load_cached_sprites(self, mode: str, params: Dict) -> bool:
+        """尝试从磁盘缓存载入拆分结果，命中时写入 self.sprites 并返回 True"""
+        if self.cache is None:
+            return False
+        entries = self.cache.get(self._disk_cache_key(mode, params))
+        if entries is None:
+            return False
+        try:
+            sprites = [SpriteRect(**entry) for entry in entries]
+        except TypeError:
+            return False
+        self.sprites = sprites
+        print("  命中磁盘缓存，跳过检测")
+        print(f"  共检测到 {len(self.sprites)} 个精灵")
+        return True
 
-            color_counts = Counter(color_key(c) for c in corner_samples)
-            most_common = color_counts.most_common(1)[0][0]
+    def _store_cached_sprites(self, mode: str, params: Dict):
+        """把当前拆分结果写入磁盘缓存（写入失败不影响拆分）"""
+        if self.cache is None:
+            return
+        try:
+            self.cache.put(self._disk_cache_key(mode, params), [asdict(s) for s in self.sprites])
+        except OSError as e:
+            print(f"  ⚠️ 写入磁盘缓存失败: {e}")
 
-            # 从角落采样中找到最接近的实际颜色
-            for c in corner_samples:
-                if color_key(c) == most_common:
-                    bg_color = c[:3]
-                    break
+    def is_detection_cached(self, alpha_threshold: int, merge_distance: int = 0) -> bool:
+        """当前图片是否已缓存该 alpha 阈值（及合并距离）下的检测结果"""
+        return (alpha_threshold, merge_distance) in self._detect_cache
 
-            print(f"  检测到纯色背景: RGB{bg_color}")
+    def _cache_detection(
+        self,
+        alpha_threshold: int,
+        merge_distance: int,
+        components: List[sprite_detect.Component]
+    ):
+        """写入检测缓存，超出容量时淘汰最久未使用的条目"""
+        self._detect_cache[(alpha_threshold, merge_distance)] = components
+        self._detect_cache.move_to_end((alpha_threshold, merge_distance))
+        while len(self._detect_cache) > self.DETECT_CACHE_SIZE:
+            self._detect_cache.popitem(last=False)
+
+    def _split_by_rectangle_reference(
+        self,
+        min_width: int,
+        min_height: int,
+        alpha_threshold: int,
+        bg_color: Optional[Tuple[int, int, int]],
+        min_density: float = sprite_detect.MIN_DENSITY
+    ) -> List[SpriteRect]:
+        """Rect模式参考实现：逐像素洪水填充（用于校验其他检测引擎）"""
+        width, height = self.image.size
 
-        # 定义背景检测函数
-        color_tolerance = 30  # 颜色容差
+        # 背景掩码一次性生成（alpha 阈值 + 背景色容差），逐像素判断只做查表
+        background = sprite_detect.build_background_mask(
+            self.image, bg_color, sprite_detect.COLOR_TOLERANCE, "sum", alpha_threshold
+        ).tobytes()
 
         def is_background(x: int, y: int) -> bool:
             """检查像素是否是背景"""
             if x < 0 or x >= width or y < 0 or y >= height:
                 return True
-            pixel = pixels[x, y]
-
-            # 检查透明度
-            if pixel[3] <= alpha_threshold:
-                return True
-
-            # 如果有非透明背景色，检查颜色是否接近背景
-            if bg_color:
-                diff = sum(abs(pixel[i] - bg_color[i]) for i in range(3))
-                return diff < color_tolerance * 3
-
-            return False
+            return background[y * width + x] != 0
 
         # 创建访问标记矩阵
         visited = [[False] * width for _ in range(height)]
@@ -337,7 +634,7 @@ class SpriteSplitter:
                 # 检查区域内像素密度，过滤噪点
                 area = sprite_width * sprite_height
                 density = pixel_count / area
-                if density > 0.01:  # 至少1%的填充率
+                if density > min_density:  # 默认至少1%的填充率
                     return SpriteRect(
                         x=min_x,
                         y=min_y,
@@ -346,25 +643,80 @@ class SpriteSplitter:
                     )
             return None
 
-        self.sprites = []
-        sprite_index = 0
+        sprites = []
 
         # 扫描整个图片
         for y in range(height):
             for x in range(width):
                 sprite = find_sprite_bounds(x, y)
                 if sprite:
-                    sprite.name = f"sprite_{sprite_index:04d}"
-                    self.sprites.append(sprite)
-                    sprite_index += 1
+                    sprites.append(sprite)
 
         # 按位置排序（从上到下，从左到右）
-        self.sprites.sort(key=lambda s: (s.y, s.x))
+        sprites.sort(key=lambda s: (s.y, s.x))
+        return sprites
 
-        # 重新命名
-        for i, sprite in enumerate(self.sprites):
-            sprite.name = f"sprite_{i:04d}"
+    def split_by_xycut(
+        self,
+        min_width: int = 1,
+        min_height: int = 1,
+        alpha_threshold: int = 0,
+        min_gap: int = 1,
+        engine: str = "auto"
+    ) -> List[SpriteRect]:
+        """
+        XY-Cut模式 - 沿透明间隔递归切分（适合按行列排布、单元尺寸不一的精灵表）
+
+        背景判定与Rectangular模式相同（透明或纯色背景），按整行/整列背景间隔递归切分，
+        结果按阅读顺序（从上到下，每行从左到右）排列。
+
+        Args:
+            min_width: 最小精灵宽度
+            min_height: 最小精灵高度
+            alpha_threshold: alpha阈值，低于此值视为透明
+            min_gap: 最小间隔宽度，窄于此值的背景间隔不切分
+            engine: 投影计算引擎 - "auto", "numpy", "pillow"
+
+        Returns:
+            精灵矩形列表
+        """
+        if not self.image:
+            raise ValueError("请先加载图片")
+
+        engine = sprite_detect.resolve_engine(engine)
+        if engine == "reference":
+            engine = "pillow"
 
+        self.restore_source = False
+        print(f"\n✂️ XY-Cut模式拆分:")
+        print(f"  最小尺寸: {min_width} x {min_height}")
+        print(f"  Alpha阈值: {alpha_threshold}")
+        print(f"  最小间隔: {min_gap}px")
+
+        cache_params = {
+            "min_width": min_width,
+            "min_height": min_height,
+            "alpha_threshold": alpha_threshold,
+            "min_gap": min_gap,
+        }
+        if self._load_cached_sprites("xycut", cache_params):
+            return self.sprites
+
+        bg_color = sprite_detect.detect_background_color(self.image, alpha_threshold)
+        mask = sprite_detect.build_foreground_mask(self.image, alpha_threshold, bg_color)
+
+        self.sprites = []
+        for left, top, right, bottom in sprite_detect.xy_cut(mask, min_gap, engine):
+            if right - left >= min_width and bottom - top >= min_height:
+                self.sprites.append(SpriteRect(
+                    x=left,
+                    y=top,
+                    width=right - left,
+                    height=bottom - top,
+                    name=f"sprite_{len(self.sprites):04d}"
+                ))
+
+        self._store_cached_sprites("xycut", cache_params)
         print(f"  共检测到 {len(self.sprites)} 个精灵")
         return self.sprites
 
@@ -553,13 +905,21 @@ class SpriteSplitter:
         pad_align: str = "top_left",
         pad_smart: bool = True,
         restore_source: Optional[bool] = None,
-        offset_origin: Optional[str] = None
+        offset_origin: Optional[str] = None,
+        workers: int = 1,
+        incremental: bool = False,
+        prune: bool = False,
+        dedupe: str = "none",
+        sink: Optional[sprite_export.OutputSink] = None,
+        profile: str = sprite_export.DEFAULT_PROFILE,
+        band_rows: int = sprite_stream.DEFAULT_BAND_ROWS,
+        batch: bool = False
     ) -> List[str]:
         """
         保存拆分后的精灵图片
 
         Args:
-            output_dir: 输出目录
+            output_dir: 输出目录；以 .zip/.tar/.tar.gz/.tgz 结尾或为 "-" 时输出为归档（"-" 为写到标准输出的 tar 流）
             name_template: 命名模板，支持 {name}, {index}, {x}, {y}, {width}, {height}
             format: 输出格式 (png, jpg, webp等)
             trim: 是否裁剪透明边缘
@@ -574,29 +934,60 @@ class SpriteSplitter:
             pad_smart: 是否启用智能补边（按不透明像素bbox对齐，减少脚底抖动）
             restore_source: 是否还原原始尺寸（offX/offY/sourceW/sourceH）
             offset_origin: 偏移原点（"top" 或 "bottom"）
+            workers: 变换/编码阶段的线程数（写入由独立线程完成；文件与返回顺序不变，内存占用受队列深度限制）
+            incremental: 增量导出 - 在输出目录维护导出清单，源像素与处理参数都未变的精灵跳过重新导出
+            prune: 增量导出时删除清单中记录、但本次不再输出的旧文件
+            dedupe: 重复帧去重 - "none"(不去重), "alias"(只写一份，重复帧在数据文件中记为别名),
+                    "hardlink"/"symlink"(只编码一份，重复帧创建链接；文件系统不支持时写入完整文件)
+            sink: 已打开的归档写入目标（由调用方关闭，便于把数据文件、预览图写入同一归档）；
+                  为 None 时按 output_dir 打开并在导出结束后关闭
+            profile: 编码档位 - "fast"(编码最快), "balanced"(默认，与以往输出一致), "smallest"(文件最小)；
+                     本次导出的档位、耗时与写入字节数记录在 self.export_report 中
+            band_rows: 延迟加载（defer_load）时流式解码的带高（行数）
+            batch: 等尺寸帧批量数组变换 - 所有精灵同尺寸时，按行把单元格取成 (N, H, W, 4) 数组，
+                   一次算出整行的智能边缘/去背景/trim 结果（需要 NumPy，结果与逐个处理一致）
 
         Returns:
-            保存的文件路径列表
+            保存的文件路径列表（归档输出时为归档内的成员名）
         """
-        if not self.image:
-            raise ValueError("请先加载图片")
-
+        # 运行报告的耗时覆盖整个导出（含延迟加载时的整图加载）
+        started = time.perf_counter()
         if not self.sprites:
             raise ValueError("请先执行拆分操作")
 
-        # 创建输出目录
-        os.makedirs(output_dir, exist_ok=True)
+        # 延迟加载：能按水平带解码的 PNG 流式导出，其他图片退回整图加载
+        streaming = self.image is None and sprite_stream.is_streamable(self.image_path)
+        if self.image is None and not streaming:
+            self._load_image()
+
+        if profile not in sprite_export.ENCODING_PROFILES:
+            raise ValueError(f"不支持的编码档位: {profile}")
+        if dedupe not in sprite_export.DEDUPE_MODES:
+            raise ValueError(f"不支持的去重方式: {dedupe}")
+        if dedupe == "alias" and incremental:
+            # 别名帧没有输出文件，无法按清单判断是否变化；链接方式的重复帧有真实文件，可与增量导出同时使用
+            raise ValueError("增量导出不支持 alias 去重，请使用 hardlink 或 symlink")
+
+        archive_output = (sink is not None and sink.is_archive) or (
+            sink is None and sprite_export.is_archive_target(output_dir)
+        )
+        if archive_output and (incremental or dedupe != "none"):
+            # 归档内没有可供比对或链接的文件
+            raise ValueError("归档输出不支持增量导出与重复帧去重")
+        if sink is not None and not sink.is_archive:
+            output_dir = sink.directory
+            sink = None
 
         print(f"\n💾 保存精灵图片:")
-        print(f"  输出目录: {output_dir}")
+        print(f"  {'输出归档' if archive_output else '输出目录'}: {output_dir}")
         print(f"  命名模板: {name_template}")
         print(f"  格式: {format}")
+        print(f"  编码档位: {profile}")
         print(f"  裁剪透明边缘: {trim}")
         print(f"  边缘裁剪: {edge_crop}px")
         print(f"  智能边缘检测: {smart_edge_detect}")
         print(f"  还原原始尺寸: {self.restore_source if restore_source is None else restore_source}")
 
-        saved_files = []
         restore_active = self.restore_source if restore_source is None else restore_source
         origin_mode = (offset_origin or self.offset_origin or "top").lower()
 
@@ -615,87 +1006,482 @@ class SpriteSplitter:
         if not name_template.strip():
             name_template = "{name}"
 
-        for index, sprite in enumerate(self.sprites):
-            # 裁剪精灵区域
-            sprite_img = self.image.crop((
-                sprite.x,
-                sprite.y,
-                sprite.x + sprite.width,
-                sprite.y + sprite.height
-            ))
-
-            # 边缘裁剪（方案2）- 固定像素数裁剪
-            if edge_crop_active > 0:
-                w, h = sprite_img.size
-                left = min(edge_crop_active, w // 2)
-                top = min(edge_crop_active, h // 2)
-                right = max(0, w - edge_crop_active)
-                bottom = max(0, h - edge_crop_active)
-                if right > left and bottom > top:
-                    sprite_img = sprite_img.crop((left, top, right, bottom))
-
-            # 智能边缘检测（方案3）- 自动检测并移除边缘纯色分隔线
-            if smart_edge_active:
-                sprite_img = self._smart_crop_edges(sprite_img)
-
-            # 智能去除边缘背景 - 从边缘开始去除纯色背景
-            if remove_bg_active:
-                sprite_img = self._remove_edge_background(sprite_img)
-
-            # 裁剪透明边缘
-            if trim_active:
-                bbox = sprite_img.getbbox()
-                if bbox:
-                    sprite_img = sprite_img.crop(bbox)
-
-            # 还原原始尺寸（基于offX/offY/sourceW/sourceH）
-            if restore_active and sprite.source_w > 0 and sprite.source_h > 0:
-                sprite_img = self._restore_sprite(sprite_img, sprite, origin_mode)
-
-            # 批量调整大小
-            if resize_mode != "none" and sprite_img.size[0] > 0 and sprite_img.size[1] > 0:
-                sprite_img = self._resize_image(
-                    sprite_img, resize_mode, resize_scale, resize_width, resize_height, pad_align, pad_smart
-                )
+        plan = _ExportPlan(
+            trim=trim_active,
+            edge_crop=edge_crop_active,
+            smart_edge=smart_edge_active,
+            remove_bg=remove_bg_active,
+            restore=restore_active,
+            origin_mode=origin_mode,
+            resize_mode=resize_mode,
+            resize_scale=resize_scale,
+            resize_width=resize_width,
+            resize_height=resize_height,
+            pad_align=pad_align,
+            pad_smart=pad_smart,
+        )
 
-            # 生成文件名 - 使用手动替换以支持更灵活的模板
-            # 支持: {name}, {index}, {x}, {y}, {width}, {height}
-            filename = name_template
-            filename = filename.replace('{name}', sprite.name)
-            filename = filename.replace('{index}', str(index))
-            filename = filename.replace('{x}', str(sprite.x))
-            filename = filename.replace('{y}', str(sprite.y))
-            filename = filename.replace('{width}', str(sprite.width))
-            filename = filename.replace('{height}', str(sprite.height))
-
-            # 如果模板中没有任何变量，则添加索引以避免文件名冲突
-            if filename == name_template and '{' not in filename:
-                filename = f"{filename}_{index}"
-
-            # 确保有正确的扩展名
-            if not filename.lower().endswith(f'.{format}'):
-                filename = f"{filename}.{format}"
-
-            # 保存
-            filepath = os.path.join(output_dir, filename)
-
-            # 如果是jpg格式，需要转换为RGB
-            if format.lower() in ['jpg', 'jpeg']:
-                # 创建白色背景
-                background = Image.new('RGB', sprite_img.size, (255, 255, 255))
-                if sprite_img.mode == 'RGBA':
-                    background.paste(sprite_img, mask=sprite_img.split()[3])
-                else:
-                    background.paste(sprite_img)
-                background.save(filepath, quality=95)
+        names = [self._sprite_filename(sprite, index, name_template, format) for index, sprite in enumerate(self.sprites)]
+        saved_files = names if archive_output else [os.path.join(output_dir, name) for name in names]
+        # 同名文件按顺序写入时后者覆盖前者，只需处理每个路径的最后一个精灵
+        last_index = {path: index for index, path in enumerate(saved_files)}
+        jobs = [(index, sprite) for index, sprite in enumerate(self.sprites) if last_index[saved_files[index]] == index]
+
+        # 分阶段流水线：裁剪+变换 → 编码为字节 → 独立写入线程原子写盘，各阶段间为有界队列
+        workers = max(1, workers)
+        if workers > 1:
+            print(f"  导出线程: {workers}")
+        if incremental:
+            print(f"  增量导出: 是{'（清理过期文件）' if prune else ''}")
+        previous_manifest = sprite_export.load_manifest(output_dir) if incremental else {}
+        manifest: Dict[str, Dict] = {}
+        records: Dict[int, Dict] = {}
+        skipped: List[int] = []
+        plan_fields = asdict(plan)
+        if dedupe != "none":
+            print(f"  重复帧去重: {dedupe}")
+        for sprite in self.sprites:
+            sprite.alias = ""
+        # 去重：最终像素哈希 → 首个完成编码的精灵（claimed），以及各重复帧对应的哈希
+        dedupe_lock = threading.Lock()
+        claimed: Dict[str, int] = {}
+        duplicates: Dict[int, str] = {}
+        batched = batch and not streaming and not incremental and self._batch_transform_eligible(jobs, plan)
+        # trim 包围盒查询共用整表游程掩码，先在主线程构建避免并发重复构建
+        if plan.trim and not plan.remove_bg and not streaming and not batched:
+            self._opacity_index()
+        # 智能边缘检测：整表只建一次分隔线索引，各单元格查表得到裁剪框
+        separators = None
+        if plan.smart_edge and not streaming and not batched:
+            separators = self._separator_index([sprite for _, sprite in jobs], plan)
+        chain = self._compile_transform(plan, separators)
+
+        # 投递项：(序号, 精灵, 已裁剪的源图或 None, 已完成变换的结果或 None)
+        if streaming:
+            # 按水平带解码，精灵所在行就绪即投递，内存只随带高与在途精灵增长
+            print(f"  流式解码: 每带 {band_rows} 行")
+            items = self._stream_jobs(jobs, band_rows)
+        elif batched:
+            # 等尺寸帧按行整体做数组变换，之后每帧只剩取出像素、缩放与编码
+            print("  批量数组变换: 是")
+            items = self._batch_transform_jobs(jobs, chain)
+        elif workers == 1 and not incremental and self._batch_resize_eligible(jobs, plan):
+            # 等尺寸单元格只需缩放时，按批拼接成条带整体缩放（结果与逐个缩放逐字节一致）；
+            # 批量缩放在投递线程中进行，多线程导出时逐个缩放本身已并行，不走此路径
+            items = self._batch_resize_jobs(jobs, plan)
+        else:
+            items = ((index, sprite, None, None) for index, sprite in jobs)
+
+        def transform(
+            job: Tuple[int, SpriteRect, Optional[Image.Image], Optional[Image.Image]]
+        ) -> Optional[Tuple[int, Image.Image, Optional[Dict]]]:
+            index, sprite, sprite_img, transformed = job
+            if transformed is not None:
+                return index, transformed, None
+            record = None
+            if incremental:
+                if sprite_img is None:
+                    sprite_img = self._crop_sprite(sprite)
+                geometry = asdict(sprite)
+                del geometry["name"], geometry["alias"]
+                record = {
+                    "source": sprite_cache.image_digest(sprite_img),
+                    "options": sprite_export.options_digest({
+                        "plan": plan_fields, "format": format, "profile": profile, "sprite": geometry
+                    }),
+                }
+                name = os.path.basename(saved_files[index])
+                previous = previous_manifest.get(name)
+                if previous and self._export_unchanged(previous, record, saved_files[index]):
+                    manifest[name] = previous
+                    skipped.append(index)
+                    return None
+            return index, self._apply_transform(chain, sprite, sprite_img), record
+
+        def encode(item: Tuple[int, Image.Image, Optional[Dict]]) -> Optional[Tuple[int, bytes, Optional[Dict]]]:
+            index, sprite_img, record = item
+            if record is not None:
+                records[index] = record
+            if dedupe != "none":
+                pixels = sprite_cache.image_digest(sprite_img)
+                with dedupe_lock:
+                    if pixels in claimed:
+                        duplicates[index] = pixels
+                        return None
+                    claimed[pixels] = index
+            data = sprite_export.encode_image(sprite_img, format, profile=profile)
+            if record is not None:
+                record["output"] = sprite_export.bytes_digest(data)
+            return index, data, record
+
+        owned_sink = None
+        if archive_output and sink is None:
+            sink = owned_sink = sprite_export.open_sink(output_dir)
+        elif not archive_output:
+            # 创建输出目录
+            os.makedirs(output_dir, exist_ok=True)
+
+        written = {"files": 0, "bytes": 0}
+
+        def write(item: Tuple[int, bytes, Optional[Dict]]):
+            index, data, record = item
+            written["files"] += 1
+            written["bytes"] += len(data)
+            if archive_output:
+                sink.write(names[index], data)
             else:
-                sprite_img.save(filepath)
+                sprite_export.atomic_write(saved_files[index], data)
 
-            saved_files.append(filepath)
+        if archive_output:
+            # 归档成员顺序即写入顺序：按精灵序号写入，与编码完成的先后无关（归档不支持增量/去重，每项都会到达）
+            write = sprite_export.ordered(write, [index for index, _ in jobs])
 
+        try:
+            sprite_export.run_pipeline(
+                items,
+                [(transform, workers), (encode, workers), (write, 1)],
+                depth=workers * sprite_export.PIPELINE_DEPTH_PER_WORKER
+            )
+        finally:
+            if owned_sink is not None:
+                owned_sink.close()
+
+        if duplicates:
+            saved_files = self._link_duplicates(saved_files, claimed, duplicates, records, dedupe)
+
+        if incremental:
+            for index, record in records.items():
+                path = saved_files[index]
+                name = os.path.basename(path)
+                if os.path.isfile(path) and name not in manifest:
+                    stat = os.stat(path)
+                    record["size"] = stat.st_size
+                    record["mtime_ns"] = stat.st_mtime_ns
+                    manifest[name] = record
+            if skipped:
+                print(f"  跳过未变化: {len(skipped)} 个")
+            if prune:
+                removed = 0
+                for name in previous_manifest:
+                    path = os.path.join(output_dir, name)
+                    if name not in manifest and os.path.isfile(path):
+                        os.remove(path)
+                        removed += 1
+                if removed:
+                    print(f"  已清理过期文件: {removed} 个")
+            else:
+                # 未清理的旧条目继续保留，以便之后清理
+                for name, entry in previous_manifest.items():
+                    manifest.setdefault(name, entry)
+            sprite_export.save_manifest(output_dir, manifest)
+
+        self.export_report = {
+            "profile": profile,
+            "format": format,
+            "workers": workers,
+            "sprites": len(saved_files),
+            "encoded": written["files"],
+            "skipped": len(skipped),
+            "duplicates": len(duplicates),
+            "bytes": written["bytes"],
+            "seconds": round(time.perf_counter() - started, 4),
+        }
         print(f"  ✓ 已保存 {len(saved_files)} 个精灵图片")
         return saved_files
 
+    def export_report_file(self, output_path: str, sink: Optional[sprite_export.OutputSink] = None) -> str:
+        """
+        导出最近一次 save_sprites 的运行报告（编码档位、编码数量、写入字节数、耗时）
+
+        Args:
+            output_path: 输出路径
+            sink: 归档写入目标（可选，给出时以 output_path 的文件名写入归档）
+
+        Returns:
+            保存的文件路径
+        """
+        if self.export_report is None:
+            raise ValueError("请先保存精灵图片")
+        data = json.dumps(self.export_report, indent=2, ensure_ascii=False).encode('utf-8')
+        if sink is not None:
+            sink.write(os.path.basename(output_path), data)
+        else:
+            sprite_export.atomic_write(output_path, data)
+        return output_path
+
+    def _link_duplicates(
+        self,
+        saved_files: List[str],
+        claimed: Dict[str, int],
+        duplicates: Dict[int, str],
+        records: Dict[int, Dict],
+        dedupe: str
+    ) -> List[str]:
+        """
+        整理重复帧：每组相同像素以序号最小的精灵为正本（与线程调度无关），
+        其余精灵按去重方式记为别名或创建链接；返回每个精灵实际对应的文件路径
+        """
+        groups: Dict[str, List[int]] = {}
+        for pixels, index in claimed.items():
+            groups[pixels] = [index]
+        for index, pixels in duplicates.items():
+            groups[pixels].append(index)
+
+        saved_files = list(saved_files)
+        linked = 0
+        for pixels, members in groups.items():
+            if len(members) == 1:
+                continue
+            writer = members[0]
+            members.sort()
+            canonical = members[0]
+            canonical_path = saved_files[canonical]
+            if writer != canonical:
+                # 实际编码写入的是其他成员，改名到正本路径
+                os.replace(saved_files[writer], canonical_path)
+            if writer in records and canonical in records:
+                records[canonical]["output"] = records[writer]["output"]
+            for index in members[1:]:
+                if index in records and canonical in records:
+                    records[index]["output"] = records[canonical]["output"]
+                path = saved_files[index]
+                if dedupe == "alias":
+                    self.sprites[index].alias = self.sprites[canonical].name
+                    if os.path.isfile(path) or os.path.islink(path):
+                        os.remove(path)
+                    saved_files[index] = canonical_path
+                else:
+                    try:
+                        sprite_export.link_file(canonical_path, path, dedupe)
+                    except OSError:
+                        # 文件系统不支持链接时写入完整副本
+                        with open(canonical_path, "rb") as f:
+                            sprite_export.atomic_write(path, f.read())
+                linked += 1
+        print(f"  重复帧: {linked} 个（{dedupe}）")
+        return saved_files
+
+    def _crop_sprite(self, sprite: SpriteRect) -> Image.Image:
+        """从精灵表裁剪精灵区域（统一为 RGBA，精灵表本身保持原始模式）"""
+        return self._crop_box((sprite.x, sprite.y, sprite.x + sprite.width, sprite.y + sprite.height))
+
+    def _crop_box(self, box: Tuple[int, int, int, int]) -> Image.Image:
+        """从精灵表裁剪整表坐标的区域，统一为 RGBA，超出图片的部分补透明像素"""
+        if self.image.mode == "RGBA":
+            return self.image.crop(box)
+
+        width, height = self.image.size
+        inner = (max(0, box[0]), max(0, box[1]), min(width, box[2]), min(height, box[3]))
+        if inner == box:
+            return self.image.crop(box).convert("RGBA")
+        # 超出图片的部分与 RGBA 图一致补透明像素（而不是原始模式下的 0 值）
+        sprite_img = Image.new("RGBA", (max(0, box[2] - box[0]), max(0, box[3] - box[1])), (0, 0, 0, 0))
+        if inner[2] > inner[0] and inner[3] > inner[1]:
+            sprite_img.paste(self.image.crop(inner).convert("RGBA"), (inner[0] - box[0], inner[1] - box[1]))
+        return sprite_img
+
+    @staticmethod
+    def _export_unchanged(previous: Dict, record: Dict, path: str) -> bool:
+        """增量导出：源像素与参数一致，且输出文件未被改动（大小与修改时间同清单记录）"""
+        if previous.get("source") != record["source"] or previous.get("options") != record["options"]:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == previous.get("size") and stat.st_mtime_ns == previous.get("mtime_ns")
+
+    def _transform_sprite(
+        self,
+        sprite: SpriteRect,
+        plan: _ExportPlan,
+        sprite_img: Optional[Image.Image] = None,
+        separators: Optional["sprite_detect.SeparatorIndex"] = None
+    ) -> Image.Image:
+        """
+        按导出计划裁剪并变换单个精灵（裁边 → 去背景 → trim → 还原 → 缩放）
+
+        separators 为整表分隔线索引时，智能边缘检测改为查表（与逐单元格检测结果一致）
+        """
+        return self._apply_transform(self._compile_transform(plan, separators), sprite, sprite_img)
+
+    def _compile_transform(
+        self,
+        plan: _ExportPlan,
+        separators: Optional["sprite_detect.SeparatorIndex"] = None
+    ) -> _TransformChain:
+        """把导出计划编译为变换链：剔除不起作用的阶段（如比例为 1 的缩放）"""
+        resize = None
+        if plan.resize_mode != "none":
+            # 缩放参数是否有效与尺寸无关；scale 模式比例为 1 时尺寸不变，Pillow 只会复制一份
+            probe = (1000, 1000)
+            new_size = self._resize_size(probe, plan.resize_mode, plan.resize_scale, plan.resize_width, plan.resize_height)
+            if new_size is not None and not (plan.resize_mode == "scale" and plan.resize_scale == 1):
+                resize = (plan.resize_mode, plan.resize_scale, plan.resize_width, plan.resize_height,
+                          plan.pad_align, plan.pad_smart)
+        return _TransformChain(
+            edge_crop=max(0, plan.edge_crop),
+            smart_edge=plan.smart_edge,
+            separators=separators if plan.smart_edge else None,
+            remove_bg=plan.remove_bg,
+            trim=plan.trim,
+            restore=plan.restore,
+            origin_mode=plan.origin_mode,
+            resize=resize,
+        )
+
+    def _apply_transform(
+        self,
+        chain: _TransformChain,
+        sprite: SpriteRect,
+        sprite_img: Optional[Image.Image] = None
+    ) -> Image.Image:
+        """
+        对单个精灵执行编译好的变换链
+
+        box 始终是当前结果在精灵表上的区域；source 为取像素的来源图片（None 表示直接从精灵表裁剪），
+        origin 为其左上角的整表坐标。裁剪阶段只移动 box，最后一次性取出像素。
+        """
+        box = (sprite.x, sprite.y, sprite.x + sprite.width, sprite.y + sprite.height)
+        source = sprite_img
+        origin = (sprite.x, sprite.y)
+
+        def shrink(inner: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+            return box[0] + inner[0], box[1] + inner[1], box[0] + inner[2], box[1] + inner[3]
+
+        # 边缘裁剪（方案2）- 固定像素数裁剪
+        inner = self._edge_crop_box((box[2] - box[0], box[3] - box[1]), chain.edge_crop)
+        if inner:
+            box = shrink(inner)
+
+        # 智能边缘检测（方案3）- 自动检测并移除边缘纯色分隔线
+        if chain.smart_edge:
+            if chain.separators is not None and chain.separators.covers(box):
+                inner = chain.separators.crop_box(box)
+            else:
+                source, origin = self._region_image(source, origin, box), box[:2]
+                inner = self._smart_edge_box(source)
+            if inner:
+                box = shrink(inner)
+
+        # 智能去除边缘背景 - 从边缘开始去除纯色背景
+        if chain.remove_bg:
+            source, origin = self._remove_edge_background(self._region_image(source, origin, box)), box[:2]
+
+        # 裁剪透明边缘
+        if chain.trim:
+            if chain.remove_bg or self.image is None:
+                # 去背景改变了像素、或流式导出时没有整表，只能在裁剪结果上重新扫描
+                source, origin = self._region_image(source, origin, box), box[:2]
+                inner = source.getbbox()
+            else:
+                inner = self._trim_bbox(box[0], box[1], (box[2] - box[0], box[3] - box[1]))
+            if inner:
+                box = shrink(inner)
+
+        sprite_img = self._region_image(source, origin, box)
+
+        # 还原原始尺寸（基于offX/offY/sourceW/sourceH）
+        if chain.restore and sprite.source_w > 0 and sprite.source_h > 0:
+            sprite_img = self._restore_sprite(sprite_img, sprite, chain.origin_mode)
+
+        # 批量调整大小
+        if chain.resize and sprite_img.size[0] > 0 and sprite_img.size[1] > 0:
+            sprite_img = self._resize_image(sprite_img, *chain.resize)
+
+        return sprite_img
+
+    def _region_image(
+        self,
+        source: Optional[Image.Image],
+        origin: Tuple[int, int],
+        box: Tuple[int, int, int, int]
+    ) -> Image.Image:
+        """取出整表坐标 box 的像素：source 为 None 时从精灵表裁剪，否则在左上角位于 origin 的 source 上裁剪"""
+        if source is None:
+            return self._crop_box(box)
+        local = (box[0] - origin[0], box[1] - origin[1], box[2] - origin[0], box[3] - origin[1])
+        if local == (0, 0) + source.size:
+            return source
+        return source.crop(local)
+
+    @staticmethod
+    def _edge_crop_box(size: Tuple[int, int], edge_crop: int) -> Optional[Tuple[int, int, int, int]]:
+        """固定像素数边缘裁剪的裁剪框（每边最多裁掉一半）；无需裁剪或裁剪后为空时返回 None"""
+        if edge_crop <= 0:
+            return None
+        w, h = size
+        left = min(edge_crop, w // 2)
+        top = min(edge_crop, h // 2)
+        right = max(0, w - edge_crop)
+        bottom = max(0, h - edge_crop)
+        if right > left and bottom > top:
+            return left, top, right, bottom
+        return None
+
+    def _separator_index(self, sprites: List[SpriteRect], plan: _ExportPlan,
+                         tolerance: int = 30) -> Optional["sprite_detect.SeparatorIndex"]:
+        """
+        为智能边缘检测构建整表分隔线索引（需要 NumPy，否则返回 None 走逐单元格检测）
+
+        只收录固定裁边后仍完全位于图内的单元格；越界单元格裁剪时会补透明像素，仍逐单元格检测。
+        """
+        if sprite_detect.resolve_engine("auto") != "numpy":
+            return None
+        cells = []
+        for sprite in sprites:
+            cell = (sprite.x, sprite.y, sprite.x + sprite.width, sprite.y + sprite.height)
+            box = self._edge_crop_box((sprite.width, sprite.height), plan.edge_crop)
+            if box:
+                cell = (sprite.x + box[0], sprite.y + box[1], sprite.x + box[2], sprite.y + box[3])
+            if cell[0] >= 0 and cell[1] >= 0 and cell[2] <= self.image.width and cell[3] <= self.image.height:
+                cells.append(cell)
+        return sprite_detect.SeparatorIndex(self.image, cells, tolerance)
+
+    @staticmethod
+    def _sprite_filename(sprite: SpriteRect, index: int, name_template: str, format: str) -> str:
+        """按命名模板生成精灵文件名（含扩展名）"""
+        # 生成文件名 - 使用手动替换以支持更灵活的模板
+        # 支持: {name}, {index}, {x}, {y}, {width}, {height}
+        filename = name_template
+        filename = filename.replace('{name}', sprite.name)
+        filename = filename.replace('{index}', str(index))
+        filename = filename.replace('{x}', str(sprite.x))
+        filename = filename.replace('{y}', str(sprite.y))
+        filename = filename.replace('{width}', str(sprite.width))
+        filename = filename.replace('{height}', str(sprite.height))
+
+        # 如果模板中没有任何变量，则添加索引以避免文件名冲突
+        if filename == name_template and '{' not in filename:
+            filename = f"{filename}_{index}"
+
+        # 确保有正确的扩展名
+        if not filename.lower().endswith(f'.{format}'):
+            filename = f"{filename}.{format}"
+
+        return filename
+
+    def _opacity_index(self):
+        """
+        整表不透明像素（alpha > 0）索引：NumPy 可用时为积分图（计数/判空 O(1)、包围盒 O(log)），
+        否则或超出内存上限时为游程掩码；每张图只构建一次
+        """
+        if self._opacity is None:
+            self._opacity = sprite_detect.opacity_index(self.image)
+        return self._opacity
+
+    def _trim_bbox(self, origin_x: int, origin_y: int, size: Tuple[int, int]) -> Optional[Tuple[int, int, int, int]]:
+        """
+        在整表不透明像素索引上查询裁剪区域的不透明包围盒
+
+        等价于对该区域裁剪后调用 getbbox()，返回相对区域原点的坐标。
+        """
+        width, height = size
+        bbox = self._opacity_index().bbox((origin_x, origin_y, origin_x + width, origin_y + height))
+        if not bbox:
+            return None
+        return bbox[0] - origin_x, bbox[1] - origin_y, bbox[2] - origin_x, bbox[3] - origin_y
+
     def _smart_crop_edges(self, img: Image.Image, tolerance: int = 30) -> Image.Image:
         """
         智能边缘检测 - 自动移除边缘的纯色分隔线
@@ -710,28 +1496,28 @@ class SpriteSplitter:
         Returns:
             裁剪后的图片
         """
+        box = self._smart_edge_box(img, tolerance)
+        if box:
+            if img.mode != 'RGBA':
+                img = img.convert('RGBA')
+            return img.crop(box)
+        return img
+
+    def _smart_edge_box(self, img: Image.Image, tolerance: int = 30) -> Optional[Tuple[int, int, int, int]]:
+        """
+        计算智能边缘检测的裁剪框
+
+        Returns:
+            裁剪框 (left, top, right, bottom)；无需裁剪时返回 None
+        """
         if img.mode != 'RGBA':
             img = img.convert('RGBA')
 
-        pixels = img.load()
         width, height = img.size
 
-        def is_uniform_color(line_pixels: list, tolerance: int) -> bool:
-            """检查一行/列像素是否为均匀颜色（可能是分隔线）"""
-            if not line_pixels:
-                return False
-            first_color = line_pixels[0]
-            for pixel in line_pixels:
-                for i in range(3):  # RGB通道
-                    if abs(pixel[i] - first_color[i]) > tolerance:
-                        return False
-            return True
-
-        def is_light_color(color: tuple) -> bool:
-            """检查是否为浅色（白色或接近白色）"""
-            if len(color) >= 3:
-                return (color[0] + color[1] + color[2]) / 3 > 200
-            return False
+        def is_separator(box: Tuple[int, int, int, int]) -> bool:
+            """检查一行/列是否为浅色均匀分隔线"""
+            return sprite_detect.is_separator_line(img.crop(box), tolerance)
 
         crop_top = 0
         crop_bottom = 0
@@ -739,33 +1525,29 @@ class SpriteSplitter:
         crop_right = 0
 
         # 检测顶部边缘
-        for y in range(min(10, height)):
-            row_pixels = [pixels[x, y] for x in range(width)]
-            if is_uniform_color(row_pixels, tolerance) and is_light_color(row_pixels[0]):
+        for y in range(min(sprite_detect.SEPARATOR_SCAN, height)):
+            if is_separator((0, y, width, y + 1)):
                 crop_top = y + 1
             else:
                 break
 
         # 检测底部边缘
-        for y in range(height - 1, max(height - 11, -1), -1):
-            row_pixels = [pixels[x, y] for x in range(width)]
-            if is_uniform_color(row_pixels, tolerance) and is_light_color(row_pixels[0]):
+        for y in range(height - 1, max(height - sprite_detect.SEPARATOR_SCAN - 1, -1), -1):
+            if is_separator((0, y, width, y + 1)):
                 crop_bottom = height - y
             else:
                 break
 
         # 检测左边缘
-        for x in range(min(10, width)):
-            col_pixels = [pixels[x, y] for y in range(height)]
-            if is_uniform_color(col_pixels, tolerance) and is_light_color(col_pixels[0]):
+        for x in range(min(sprite_detect.SEPARATOR_SCAN, width)):
+            if is_separator((x, 0, x + 1, height)):
                 crop_left = x + 1
             else:
                 break
 
         # 检测右边缘
-        for x in range(width - 1, max(width - 11, -1), -1):
-            col_pixels = [pixels[x, y] for y in range(height)]
-            if is_uniform_color(col_pixels, tolerance) and is_light_color(col_pixels[0]):
+        for x in range(width - 1, max(width - sprite_detect.SEPARATOR_SCAN - 1, -1), -1):
+            if is_separator((x, 0, x + 1, height)):
                 crop_right = width - x
             else:
                 break
@@ -776,36 +1558,182 @@ class SpriteSplitter:
         bottom = height - crop_bottom
 
         if right > left and bottom > top:
-            return img.crop((left, top, right, bottom))
+            return left, top, right, bottom
 
-        return img
+        return None
 
-    def _resize_image(
-        self,
-        img: Image.Image,
-        mode: str,
-        scale: float,
-        target_width: int,
-        target_height: int,
-        pad_align: str = "top_left",
-        pad_smart: bool = True,
-    ) -> Image.Image:
+    # 整表缩放捷径支持的模式（Pillow 对 RGBA/LA 先转为预乘 alpha 再重采样）
+    _BATCH_RESIZE_MODES = {"RGBA": "RGBa", "LA": "La", "RGB": "RGB", "L": "L"}
+
+    def _batch_resize_eligible(self, jobs: List[Tuple[int, SpriteRect]], plan: _ExportPlan) -> bool:
         """
-        调整图像大小
+        是否可走等尺寸批量缩放：只做 scale/width/height/custom 缩放，不做任何裁剪/去背景/还原，
+        所有单元格尺寸相同且缩放后尺寸确实改变
+        """
+        if len(jobs) < 2 or plan.resize_mode not in ("scale", "width", "height", "custom"):
+            return False
+        if plan.edge_crop > 0 or plan.smart_edge or plan.remove_bg or plan.trim or plan.restore:
+            return False
+        size = (jobs[0][1].width, jobs[0][1].height)
+        if size[0] <= 0 or size[1] <= 0 or any((s.width, s.height) != size for _, s in jobs):
+            return False
+        new_size = self._resize_size(size, plan.resize_mode, plan.resize_scale, plan.resize_width, plan.resize_height)
+        # 尺寸不变时 Pillow 直接复制；极高的窄图 Pillow 会先做垂直方向，两者都不适用
+        return new_size is not None and new_size != size and size[1] <= size[0] * 100
 
-        Args:
-            img: 输入图片
-            mode: 缩放模式 - "scale"(按比例), "width"(固定宽度), "height"(固定高度), "custom"(自定义), "fit"(等比适应并补边)
-            scale: 缩放比例 (0.5 = 50%, 2.0 = 200%)
-            target_width: 目标宽度
-            target_height: 目标高度
-            pad_align: fit模式补边对齐
-            pad_smart: 是否启用智能补边（按不透明像素bbox对齐）
+    def _batch_transform_eligible(self, jobs: List[Tuple[int, SpriteRect]], plan: _ExportPlan) -> bool:
+        """是否可走批量数组变换：需要 NumPy，有智能边缘/去背景/trim 之一，且所有单元格尺寸相同"""
+        if len(jobs) < 2 or sprite_detect.resolve_engine("auto") != "numpy":
+            return False
+        if plan.restore or not (plan.trim or plan.smart_edge or plan.remove_bg):
+            return False
+        size = (jobs[0][1].width, jobs[0][1].height)
+        return size[0] > 0 and size[1] > 0 and all((s.width, s.height) == size for _, s in jobs)
 
-        Returns:
-            调整大小后的图片
+    def _batch_transform_jobs(self, jobs: List[Tuple[int, SpriteRect]], chain: _TransformChain):
+        """
+        按行批量变换等尺寸单元格，生成 (index, sprite, None, 变换结果)
+
+        同一行的单元格取成 (N, H, W, 4) 数组（等间距时是精灵表像素的跨步视图，不复制），
+        一次算出整行的分隔线裁剪框、去背景结果与 trim 包围盒；越界单元格逐个处理。
+        """
+        width, height = jobs[0][1].width, jobs[0][1].height
+        sheet = self.image if self.image.mode == "RGBA" else self.image.convert("RGBA")
+        pixels = sprite_detect.np.asarray(sheet)
+        edge = self._edge_crop_box((width, height), chain.edge_crop) or (0, 0, width, height)
+
+        rows: Dict[int, List[Tuple[int, SpriteRect]]] = {}
+        for index, sprite in jobs:
+            if sprite.x < 0 or sprite.y < 0 or sprite.x + width > sheet.width or sprite.y + height > sheet.height:
+                yield index, sprite, None, None
+            else:
+                rows.setdefault(sprite.y, []).append((index, sprite))
+
+        for row in rows.values():
+            for start in range(0, len(row), self.TRANSFORM_BATCH_CELLS):
+                batch = row[start:start + self.TRANSFORM_BATCH_CELLS]
+                cells = sprite_detect.frame_view(pixels, [(s.x, s.y, s.x + width, s.y + height) for _, s in batch])
+
+                # 裁剪区域（单元格内坐标）：固定裁边对所有帧相同，智能边缘检测逐帧不同
+                regions = [edge] * len(batch)
+                if chain.smart_edge:
+                    frames = cells[:, edge[1]:edge[3], edge[0]:edge[2]]
+                    regions = [
+                        (edge[0] + inner[0], edge[1] + inner[1], edge[0] + inner[2], edge[1] + inner[3]) if inner else edge
+                        for inner in sprite_detect.frame_separator_boxes(frames, 30)
+                    ]
+
+                if chain.remove_bg:
+                    images = self._batch_remove_background(cells, regions, chain.trim)
+                else:
+                    boxes = regions
+                    if chain.trim:
+                        bboxes = sprite_detect.frame_alpha_bboxes(cells[..., 3], regions)
+                        boxes = [bbox or region for bbox, region in zip(bboxes, regions)]
+                    images = [
+                        self._crop_box((s.x + box[0], s.y + box[1], s.x + box[2], s.y + box[3]))
+                        for (_, s), box in zip(batch, boxes)
+                    ]
+
+                for (index, sprite), sprite_img in zip(batch, images):
+                    if chain.resize and sprite_img.size[0] > 0 and sprite_img.size[1] > 0:
+                        sprite_img = self._resize_image(sprite_img, *chain.resize)
+                    yield index, sprite, None, sprite_img
+
+    @staticmethod
+    def _batch_remove_background(cells, regions: List[Tuple[int, int, int, int]], trim: bool) -> List[Image.Image]:
+        """对一批单元格的裁剪区域批量去背景（按区域尺寸分组），trim 时再批量求包围盒"""
+        images: List[Optional[Image.Image]] = [None] * len(regions)
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for i, (left, top, right, bottom) in enumerate(regions):
+            groups.setdefault((right - left, bottom - top), []).append(i)
+
+        for members in groups.values():
+            left, top, right, bottom = regions[members[0]]
+            if len(members) == len(regions) and len(set(regions)) == 1:
+                frames = cells[:, top:bottom, left:right]
+            else:
+                frames = sprite_detect.np.stack([cells[i, y0:y1, x0:x1] for i in members for x0, y0, x1, y1 in [regions[i]]])
+            result, _ = sprite_detect.frame_edge_background(frames, 30)
+            bboxes = sprite_detect.frame_alpha_bboxes(result[..., 3]) if trim else [None] * len(members)
+            full = (0, 0, right - left, bottom - top)
+            for frame, i, bbox in zip(result, members, bboxes):
+                x0, y0, x1, y1 = bbox or full
+                images[i] = Image.fromarray(frame[y0:y1, x0:x1])
+        return images
+
+    def _stream_jobs(self, jobs: List[Tuple[int, SpriteRect]], band_rows: int):
+        """按水平带流式解码精灵表，生成 (index, sprite, RGBA 裁剪结果, None)，顺序为各精灵所在行就绪的顺序"""
+        boxes = [(sprite.x, sprite.y, sprite.x + sprite.width, sprite.y + sprite.height) for _, sprite in jobs]
+        for position, sprite_img in sprite_stream.iter_sprite_crops(self.image_path, boxes, band_rows):
+            index, sprite = jobs[position]
+            yield index, sprite, sprite_img, None
+
+    def _batch_resize_jobs(self, jobs: List[Tuple[int, SpriteRect]], plan: _ExportPlan):
+        """
+        按批生成已缩放的单元格 (index, sprite, None, 缩放结果)
+
+        首批的第一个单元格与逐个缩放的结果比对，不一致时其余单元格全部回退为逐个处理（缩放结果为 None）。
+        """
+        first = jobs[0][1]
+        new_size = self._resize_size(
+            (first.width, first.height), plan.resize_mode, plan.resize_scale, plan.resize_width, plan.resize_height
+        )
+        verified = False
+        for start in range(0, len(jobs), self.RESIZE_BATCH_CELLS):
+            batch = jobs[start:start + self.RESIZE_BATCH_CELLS]
+            resized = self._resize_uniform([self._crop_sprite(sprite) for _, sprite in batch], new_size)
+            if not verified:
+                expected = self._transform_sprite(first, plan)
+                if expected.tobytes() != resized[0].tobytes() or expected.mode != resized[0].mode:
+                    yield from ((index, sprite, None, None) for index, sprite in jobs[start:])
+                    return
+                verified = True
+            for (index, sprite), img in zip(batch, resized):
+                yield index, sprite, None, img
+
+    @classmethod
+    def _resize_uniform(cls, cells: List[Image.Image], new_size: Tuple[int, int]) -> List[Image.Image]:
+        """
+        把一批同尺寸同模式的单元格用 LANCZOS 缩放到 new_size，等价于逐个 resize
+
+        Pillow 的重采样先水平后垂直，每一遍都只在行（或列）内部取样：
+        单元格竖向拼成列条带做水平缩放，再横向拼成行带做垂直缩放，两次调用即完成整批。
         """
-        orig_width, orig_height = img.size
+        width, height = cells[0].size
+        new_width, new_height = new_size
+        mode = cells[0].mode
+        work_mode = cls._BATCH_RESIZE_MODES[mode]
+        count = len(cells)
+
+        if new_width != width:
+            strip = Image.new(mode, (width, height * count))
+            for i, cell in enumerate(cells):
+                strip.paste(cell, (0, i * height))
+            strip = strip.convert(work_mode).resize((new_width, height * count), Image.Resampling.LANCZOS)
+            cells = [strip.crop((0, i * height, new_width, (i + 1) * height)) for i in range(count)]
+        else:
+            cells = [cell.convert(work_mode) for cell in cells]
+
+        if new_height != height:
+            band = Image.new(work_mode, (new_width * count, height))
+            for i, cell in enumerate(cells):
+                band.paste(cell, (i * new_width, 0))
+            band = band.resize((new_width * count, new_height), Image.Resampling.LANCZOS)
+            cells = [band.crop((i * new_width, 0, (i + 1) * new_width, new_height)) for i in range(count)]
+
+        return [cell.convert(mode) for cell in cells]
+
+    @staticmethod
+    def _resize_size(
+        size: Tuple[int, int],
+        mode: str,
+        scale: float,
+        target_width: int,
+        target_height: int
+    ) -> Optional[Tuple[int, int]]:
+        """按缩放模式计算缩放后的尺寸（fit 模式为补边前的内容尺寸）；参数无效时返回 None"""
+        orig_width, orig_height = size
 
         if mode == "scale" and scale > 0:
             # 按比例缩放
@@ -836,15 +1764,43 @@ class SpriteSplitter:
             new_height = min(target_height, int(orig_height * ratio))
 
         else:
-            # 无效参数，返回原图
-            return img
+            return None
 
         # 确保最小尺寸为1
-        new_width = max(1, new_width)
-        new_height = max(1, new_height)
+        return max(1, new_width), max(1, new_height)
+
+    def _resize_image(
+        self,
+        img: Image.Image,
+        mode: str,
+        scale: float,
+        target_width: int,
+        target_height: int,
+        pad_align: str = "top_left",
+        pad_smart: bool = True,
+    ) -> Image.Image:
+        """
+        调整图像大小
 
-        # 使用高质量缩放
-        resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        Args:
+            img: 输入图片
+            mode: 缩放模式 - "scale"(按比例), "width"(固定宽度), "height"(固定高度), "custom"(自定义), "fit"(等比适应并补边)
+            scale: 缩放比例 (0.5 = 50%, 2.0 = 200%)
+            target_width: 目标宽度
+            target_height: 目标高度
+            pad_align: fit模式补边对齐
+            pad_smart: 是否启用智能补边（按不透明像素bbox对齐）
+
+        Returns:
+            调整大小后的图片
+        """
+        new_size = self._resize_size(img.size, mode, scale, target_width, target_height)
+        if new_size is None:
+            # 无效参数，返回原图
+            return img
+
+        # 使用高质量缩放（尺寸不变时 Pillow 只会复制一份，直接复用原图）
+        resized = img if new_size == img.size else img.resize(new_size, Image.Resampling.LANCZOS)
 
         # fit模式：补透明边到目标画布（输出严格等于target_width/target_height）
         if mode == "fit":
@@ -858,12 +1814,9 @@ class SpriteSplitter:
 
             if pad_smart:
                 # 使用 alpha 通道 bbox 来做“智能补边对齐”，避免因为原始矩形里包含透明边导致脚底上下抖动
-                alpha = resized.split()[-1]
                 # 抗锯齿会在边缘产生极小 alpha，直接用 getbbox 会导致对齐抖动
-                # 这里做一个轻量阈值化，让 bbox 更接近“肉眼看到的实体边界”
-                alpha_threshold = 10
-                alpha_mask = alpha.point(lambda p: 255 if p > alpha_threshold else 0)
-                bbox = alpha_mask.getbbox()
+                # 这里用预先算好的查找表做一个轻量阈值化，让 bbox 更接近“肉眼看到的实体边界”
+                bbox = resized.getchannel("A").point(self._PAD_ALPHA_LUT).getbbox()
             else:
                 bbox = (0, 0, resized.size[0], resized.size[1])
 
@@ -909,7 +1862,7 @@ class SpriteSplitter:
         """
         智能去除边缘背景 - 从边缘开始去除纯色背景
 
-        使用洪水填充算法，从图片四个边缘开始，将与边缘颜色相近的像素设为透明。
+        等价于从图片四个边缘开始的洪水填充，将与边缘颜色相近的像素设为透明（在游程上做连通域标记，线性时间）。
         只影响从边缘连通的区域，不会影响图像内部的相同颜色。
 
         Args:
@@ -954,48 +1907,13 @@ class SpriteSplitter:
             # 角落颜色不一致，可能不是纯色背景，直接返回
             return img
 
-        def colors_match(c1, c2, tol):
-            """检查两个颜色是否相近"""
-            return all(abs(c1[i] - c2[i]) <= tol for i in range(3))
-
-        # 使用BFS从边缘开始填充
-        visited = [[False] * width for _ in range(height)]
-        to_make_transparent = []
-
-        # 从四条边缘开始
-        edge_pixels = []
-        for x in range(width):
-            edge_pixels.append((x, 0))           # 顶边
-            edge_pixels.append((x, height - 1))  # 底边
-        for y in range(height):
-            edge_pixels.append((0, y))           # 左边
-            edge_pixels.append((width - 1, y))   # 右边
-
-        queue = []
-        for x, y in edge_pixels:
-            if not visited[y][x]:
-                pixel_color = pixels[x, y][:3]
-                if colors_match(pixel_color, bg_color, tolerance):
-                    queue.append((x, y))
-                    visited[y][x] = True
-
-        # BFS洪水填充
-        while queue:
-            x, y = queue.pop(0)
-            to_make_transparent.append((x, y))
-
-            # 检查4个相邻像素
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < width and 0 <= ny < height and not visited[ny][nx]:
-                    pixel_color = pixels[nx, ny][:3]
-                    if colors_match(pixel_color, bg_color, tolerance):
-                        visited[ny][nx] = True
-                        queue.append((nx, ny))
+        # 与背景色相近（各通道差值 <= 容差）的像素一次性生成掩码，
+        # 在游程上标记与边缘 4 连通的区域（等价于从四条边缘出发的洪水填充，线性时间）
+        matches = sprite_detect.build_background_mask(result, bg_color, tolerance, "channel")
+        fill = sprite_detect.edge_connected_mask(matches)
 
         # 将所有标记的像素设为透明
-        for x, y in to_make_transparent:
-            pixels[x, y] = (0, 0, 0, 0)
+        result.paste((0, 0, 0, 0), (0, 0), fill)
 
         return result
 
@@ -1003,7 +1921,8 @@ class SpriteSplitter:
     def export_data_file(
         self,
         output_path: str,
-        format: str = "json"
+        format: str = "json",
+        sink: Optional[sprite_export.OutputSink] = None
     ) -> str:
         """
         导出精灵数据文件
@@ -1011,6 +1930,7 @@ class SpriteSplitter:
         Args:
             output_path: 输出路径
             format: 格式 (json, 后续可支持xml等)
+            sink: 归档写入目标（可选，给出时以 output_path 的文件名写入归档）
 
         Returns:
             保存的文件路径
@@ -1025,33 +1945,45 @@ class SpriteSplitter:
             data = {
                 "image": os.path.basename(self.image_path),
                 "size": {
-                    "width": self.image.width,
-                    "height": self.image.height
+                    "width": self.image_size[0],
+                    "height": self.image_size[1]
                 },
                 "sprites": [
-                    {
-                        "name": sprite.name,
-                        "x": sprite.x,
-                        "y": sprite.y,
-                        "width": sprite.width,
-                        "height": sprite.height
-                    }
+                    self._sprite_data_entry(sprite)
                     for sprite in self.sprites
                 ]
             }
 
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            payload = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+            if sink is not None:
+                sink.write(os.path.basename(output_path), payload)
+            else:
+                sprite_export.atomic_write(output_path, payload)
 
         print(f"  ✓ 已导出数据文件")
         return output_path
 
-    def preview_sprites(self, output_path: str = None) -> Image.Image:
+    @staticmethod
+    def _sprite_data_entry(sprite: SpriteRect) -> Dict:
+        """数据文件中的单个精灵条目（去重为别名的精灵记录其正本名称）"""
+        entry = {
+            "name": sprite.name,
+            "x": sprite.x,
+            "y": sprite.y,
+            "width": sprite.width,
+            "height": sprite.height
+        }
+        if sprite.alias:
+            entry["alias"] = sprite.alias
+        return entry
+
+    def preview_sprites(self, output_path: str = None, sink: Optional[sprite_export.OutputSink] = None) -> Image.Image:
         """
         生成预览图（在原图上标记精灵区域）
 
         Args:
             output_path: 可选，保存预览图的路径
+            sink: 归档写入目标（可选，给出时以 output_path 的文件名写入归档）
 
         Returns:
             预览图Image对象
@@ -1065,7 +1997,7 @@ class SpriteSplitter:
         from PIL import ImageDraw, ImageFont
 
         # 复制原图
-        preview = self.image.copy()
+        preview = self.image.convert("RGBA")
         draw = ImageDraw.Draw(preview)
 
         # 颜色列表，用于区分不同的精灵
@@ -1091,7 +2023,10 @@ class SpriteSplitter:
             # 标注索引
             draw.text((sprite.x + 2, sprite.y + 2), str(i), fill=color[:3])
 
-        if output_path:
+        if output_path and sink is not None:
+            sink.write(os.path.basename(output_path), sprite_export.encode_image(preview, "png"))
+            print(f"✓ 预览图已保存: {output_path}")
+        elif output_path:
             preview.save(output_path)
             print(f"✓ 预览图已保存: {output_path}")
 
@@ -1111,109 +2046,219 @@ def main():
   # Grid模式 - 按行列数拆分
   python sprite_splitter.py image.png -m grid -c 4 -r 4 -o output/
 
+  # Grid模式 - 跳过最后一行等全透明的空单元格
+  python sprite_splitter.py image.png -m grid -c 8 -r 8 --skip-empty -o output/
+
   # Rectangular模式 - 自动检测
   python sprite_splitter.py image.png -m rect -o output/
 
+  # Rectangular模式 - 启用磁盘缓存（未改动的图片重复拆分时跳过检测）
+  python sprite_splitter.py image.png -m rect --cache-dir .sprite_cache -o output/
+
+  # XY-Cut模式 - 按行列间隔递归切分
+  python sprite_splitter.py image.png -m xycut -o output/
+
+  # 输出为 zip 归档 / 把 tar 流写到标准输出
+  python sprite_splitter.py image.png -m rect -o sprites.zip
+  python sprite_splitter.py image.png -m rect -o - > sprites.tar
+
   # Data File模式 - 使用JSON文件
   python sprite_splitter.py image.png -m data -d sprites.json -o output/
+
+  # Data File模式 - 超大精灵表按水平带流式解码导出
+  python sprite_splitter.py huge.png -m data -d sprites.json --stream -o output/
         '''
     )
 
     parser.add_argument('image', nargs='?', help='精灵表图片路径 (data模式可省略)')
-    parser.add_argument('-m', '--mode', choices=['grid', 'rect', 'data'], default='grid',
-                        help='拆分模式: grid(网格), rect(矩形检测), data(数据文件)')
-    parser.add_argument('-o', '--output', default='./output', help='输出目录')
+    parser.add_argument('-m', '--mode', choices=['grid', 'rect', 'data', 'xycut'], default='grid',
+                        help='拆分模式: grid(网格), rect(矩形检测), data(数据文件), xycut(XY递归切分)')
+    parser.add_argument('-o', '--output', default='./output',
+                        help='输出目录；以 .zip/.tar/.tar.gz/.tgz 结尾时输出为归档，"-" 表示把 tar 流写到标准输出')
     parser.add_argument('-f', '--format', default='png', help='输出格式 (png, jpg, webp)')
     parser.add_argument('-t', '--template', default='{name}', help='命名模板')
     parser.add_argument('--trim', action='store_true', help='裁剪透明边缘')
     parser.add_argument('--preview', action='store_true', help='生成预览图')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量导出：按输出目录中的导出清单跳过源像素与参数都未变化的精灵')
+    parser.add_argument('--prune', action='store_true', help='增量导出时删除本次不再输出的旧文件')
+    parser.add_argument('--profile', choices=list(sprite_export.ENCODING_PROFILES), default=sprite_export.DEFAULT_PROFILE,
+                        help='编码档位: fast(编码最快), balanced(默认), smallest(文件最小)')
+    parser.add_argument('--report', default='', metavar='PATH',
+                        help='把导出运行报告（编码档位、编码数量、写入字节数、耗时）写到该路径（默认不写）')
+    parser.add_argument('--batch', action='store_true',
+                        help='等尺寸帧批量数组变换：trim/智能边缘/去背景按行整体计算（需要 NumPy）')
+    parser.add_argument('--dedupe', choices=list(sprite_export.DEDUPE_MODES), default='none',
+                        help='重复帧去重: alias(只写一份，数据文件记录别名), hardlink/symlink(链接到同一文件)')
 
     # Grid模式参数
-    parser.add_argument('-c', '--columns', type=int, default=0, help='Grid模式: 列数')
+    parser.add_argument('-c', '--columns', type=int, default=0, help='Grid模式: 列数（未指定列数行数或精灵尺寸时由浅色分隔线推断网格）')
     parser.add_argument('-r', '--rows', type=int, default=0, help='Grid模式: 行数')
     parser.add_argument('-sw', '--sprite-width', type=int, default=0, help='Grid模式: 精灵宽度')
     parser.add_argument('-sh', '--sprite-height', type=int, default=0, help='Grid模式: 精灵高度')
     parser.add_argument('-p', '--padding', type=int, default=0, help='Grid模式: 精灵间距')
     parser.add_argument('--margin', type=int, default=0, help='Grid模式: 边缘间距')
+    parser.add_argument('--skip-empty', action='store_true',
+                        help='Grid模式: 跳过全透明（alpha 不超过 --alpha-threshold）或只有背景色的单元格')
 
     # Rectangular模式参数
-    parser.add_argument('--min-width', type=int, default=1, help='Rect模式: 最小宽度')
-    parser.add_argument('--min-height', type=int, default=1, help='Rect模式: 最小高度')
-    parser.add_argument('--alpha-threshold', type=int, default=0, help='Rect模式: Alpha阈值')
+    parser.add_argument('--min-width', type=int, default=1, help='Rect/XY-Cut模式: 最小宽度')
+    parser.add_argument('--min-height', type=int, default=1, help='Rect/XY-Cut模式: 最小高度')
+    parser.add_argument('--alpha-threshold', type=int, default=0, help='Rect/XY-Cut模式（及 Grid --skip-empty）: Alpha阈值')
+    parser.add_argument('--min-gap', type=int, default=1, help='XY-Cut模式: 最小切分间隔(px)')
+    parser.add_argument('--engine', choices=list(sprite_detect.ENGINES), default='auto',
+                        help='Rect模式: 检测引擎 auto/numpy/pillow/reference(参考实现)')
+    parser.add_argument('--tile-size', type=int, default=0, help='Rect模式: 分块检测的分块边长（0 表示不分块；PNG 按分块行流式解码，整图不进内存，-j 时各带交给多进程）')
+    parser.add_argument('--max-memory', type=float, default=0,
+                        help='Rect模式: 分块检测的内存上限(MB)，未指定 --tile-size 时据此估算分块大小')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='并行数：Rect模式检测进程数，同时也是导出线程数')
+    parser.add_argument('--pyramid', type=int, default=0,
+                        help='Rect模式: 金字塔检测缩小倍数，如 4/8（0 表示不启用）。适合空白多、精灵少的大图；'
+                             '候选区域过密（如稀疏大图上数千个小精灵）时逐区域标记反而更慢，自动回退为整图标记')
+    parser.add_argument('--merge-distance', type=int, default=0,
+                        help='Rect模式: 合并间隙不超过N像素的碎片（0 表示不合并）')
+    parser.add_argument('--min-density', type=float, default=sprite_detect.MIN_DENSITY,
+                        help='Rect模式: 最小像素密度(0~1)，低于此值的区域视为噪点')
+    parser.add_argument('--cache-dir', default='',
+                        help='Rect/XY-Cut模式: 拆分结果磁盘缓存目录（按像素内容哈希+参数命中，留空不启用）')
+    parser.add_argument('--cache-size', type=float, default=sprite_cache.DEFAULT_CACHE_SIZE_MB,
+                        help='磁盘缓存大小上限(MB)，超出时淘汰最久未使用的条目')
 
     # Data File模式参数
     parser.add_argument('-d', '--data-file', help='Data模式: JSON数据文件路径')
     parser.add_argument('--restore-source', action='store_true', help='还原原始尺寸 (offX/offY/sourceW/sourceH)')
     parser.add_argument('--offset-origin', choices=['top', 'bottom'], default='top', help='偏移原点: top(左上), bottom(左下)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Data模式: 按水平带流式解码精灵表，内存只随带高增长（非隔行 8 位 PNG；其他图片整图加载；不生成预览图）')
+    parser.add_argument('--band-rows', type=int, default=sprite_stream.DEFAULT_BAND_ROWS,
+                        help='流式解码每带的行数')
 
     args = parser.parse_args()
 
-    try:
-        image_path = args.image
-        if args.mode == 'data':
-            if not args.data_file:
-                print("错误: Data模式需要指定 -d/--data-file 参数")
-                return 1
-            if not image_path:
-                image_path = resolve_image_path_from_data_file(args.data_file)
-                if not image_path:
-                    print("错误: Data模式需要图片路径或JSON包含file/meta.image")
+    # tar 流写到标准输出时，日志改写到标准错误
+    streaming = args.output == sprite_export.STDOUT_TARGET
+    stdout_stream = sys.stdout.buffer if streaming else None
+    with contextlib.redirect_stdout(sys.stderr if streaming else sys.stdout):
+        try:
+            image_path = args.image
+            if args.mode == 'data':
+                if not args.data_file:
+                    print("错误: Data模式需要指定 -d/--data-file 参数")
                     return 1
+                if not image_path:
+                    image_path = resolve_image_path_from_data_file(args.data_file)
+                    if not image_path:
+                        print("错误: Data模式需要图片路径或JSON包含file/meta.image")
+                        return 1
 
-        if not image_path:
-            print("错误: 请指定图片路径")
-            return 1
+            if not image_path:
+                print("错误: 请指定图片路径")
+                return 1
 
-        # 创建拆分器
-        splitter = SpriteSplitter(image_path)
-        splitter.offset_origin = args.offset_origin
-
-        # 执行拆分
-        if args.mode == 'grid':
-            splitter.split_by_grid(
-                columns=args.columns,
-                rows=args.rows,
-                sprite_width=args.sprite_width,
-                sprite_height=args.sprite_height,
-                padding=args.padding,
-                margin=args.margin
-            )
-        elif args.mode == 'rect':
-            splitter.split_by_rectangle(
-                min_width=args.min_width,
-                min_height=args.min_height,
-                alpha_threshold=args.alpha_threshold
-            )
-        elif args.mode == 'data':
-            splitter.split_by_data_file(args.data_file)
-            if args.restore_source:
-                splitter.restore_source = True
-
-        # 生成预览
-        if args.preview:
-            preview_path = os.path.join(args.output, '_preview.png')
-            os.makedirs(args.output, exist_ok=True)
-            splitter.preview_sprites(preview_path)
-
-        # 保存精灵
-        splitter.save_sprites(
-            output_dir=args.output,
-            name_template=args.template,
-            format=args.format,
-            trim=args.trim
-        )
+            # 创建拆分器
+            cache = sprite_cache.DetectionCache(args.cache_dir, args.cache_size) if args.cache_dir else None
+            # Data 模式 --stream 流式导出；Rect 模式分块检测（含 -j 多进程分带）时流式检测，整张图不进内存
+            tiled_rect = args.mode == 'rect' and (args.tile_size > 0 or args.max_memory > 0)
+            splitter = SpriteSplitter(image_path, cache=cache,
+                                      defer_load=(args.stream and args.mode == 'data') or tiled_rect)
+            splitter.offset_origin = args.offset_origin
+
+            # 执行拆分
+            if args.mode == 'grid':
+                grid = dict(
+                    columns=args.columns,
+                    rows=args.rows,
+                    sprite_width=args.sprite_width,
+                    sprite_height=args.sprite_height,
+                    padding=args.padding,
+                    margin=args.margin
+                )
+                if not (args.columns > 0 and args.rows > 0) and not (args.sprite_width > 0 and args.sprite_height > 0):
+                    # 未指定网格时尝试由整表分隔线推断
+                    inferred = splitter.infer_grid()
+                    if inferred:
+                        print(f"  已由分隔线推断网格: {inferred}")
+                        grid = inferred
+                splitter.split_by_grid(**grid, skip_empty=args.skip_empty, alpha_threshold=args.alpha_threshold)
+            elif args.mode == 'rect':
+                splitter.split_by_rectangle(
+                    min_width=args.min_width,
+                    min_height=args.min_height,
+                    alpha_threshold=args.alpha_threshold,
+                    engine=args.engine,
+                    tile_size=args.tile_size,
+                    max_memory_mb=args.max_memory,
+                    workers=args.workers,
+                    merge_distance=args.merge_distance,
+                    pyramid=args.pyramid,
+                    min_density=args.min_density
+                )
+            elif args.mode == 'xycut':
+                splitter.split_by_xycut(
+                    min_width=args.min_width,
+                    min_height=args.min_height,
+                    alpha_threshold=args.alpha_threshold,
+                    min_gap=args.min_gap
+                )
+            elif args.mode == 'data':
+                splitter.split_by_data_file(args.data_file)
+                if args.restore_source:
+                    splitter.restore_source = True
+
+            # 归档输出：精灵、数据文件与预览图写入同一个归档
+            archive = None
+            if sprite_export.is_archive_target(args.output):
+                archive = sprite_export.open_sink(args.output, stdout=stdout_stream)
+            try:
+                # 生成预览（流式导出时没有整张图，跳过）
+                if args.preview and splitter.image is None:
+                    print("  ⚠️ 流式导出不生成预览图")
+                elif args.preview:
+                    if archive is not None:
+                        splitter.preview_sprites('_preview.png', sink=archive)
+                    else:
+                        preview_path = os.path.join(args.output, '_preview.png')
+                        os.makedirs(args.output, exist_ok=True)
+                        splitter.preview_sprites(preview_path)
+
+                # 保存精灵
+                splitter.save_sprites(
+                    output_dir=args.output,
+                    name_template=args.template,
+                    format=args.format,
+                    trim=args.trim,
+                    workers=args.workers,
+                    incremental=args.incremental or args.prune,
+                    prune=args.prune,
+                    dedupe=args.dedupe,
+                    sink=archive,
+                    profile=args.profile,
+                    band_rows=args.band_rows,
+                    batch=args.batch
+                )
+
+                # 导出数据文件
+                if archive is not None:
+                    splitter.export_data_file('_sprites.json', sink=archive)
+                else:
+                    data_path = os.path.join(args.output, '_sprites.json')
+                    splitter.export_data_file(data_path)
+            finally:
+                if archive is not None:
+                    archive.close()
 
-        # 导出数据文件
-        data_path = os.path.join(args.output, '_sprites.json')
-        splitter.export_data_file(data_path)
+            # 运行报告只在指定 --report 时写入（写到文件系统，与输出目标无关）
+            if args.report:
+                splitter.export_report_file(args.report)
 
-        print("\n✅ 拆分完成!")
-        return 0
+            print("\n✅ 拆分完成!")
+            return 0
 
-    except Exception as e:
-        print(f"\n❌ 错误: {e}")
-        return 1
+        except Exception as e:
+            print(f"\n❌ 错误: {e}")
+            return 1
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     exit(main())
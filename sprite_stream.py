@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow
+@output 导出：PngBandReader, is_streamable, iter_sprite_crops, DEFAULT_BAND_ROWS
+@pos    大图按水平带流式解码：Data 模式导出时按精灵 y 坐标逐带解码 PNG，精灵所在行就绪即裁剪，已用完的带立即释放
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+
+流式解码原理：
+- 只支持非隔行、每通道 8 位的 PNG（灰度/RGB/调色板/灰度+alpha/RGBA），其他图片由调用方回退为整图加载
+- IDAT 数据用 zlib 逐块解压，每凑够一带的扫描行，就把这些行连同上一带最后一行（已还原像素、滤波类型 0）
+  拼成一个只有该带的小 PNG 交给 Pillow 解码；PNG 的行滤波只依赖上一行，因此结果与整图解码逐字节一致
+- 内存占用约为 带高 × 图宽，加上尚未导出完的精灵跨越的行
+"""
+
+import heapq
+import io
+import struct
+import zlib
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+
+# 每次解码的行数
+DEFAULT_BAND_ROWS = 256
+
+# 每次解压输出的字节上限
+_INFLATE_LIMIT = 1 << 20
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG 颜色类型 → (Pillow 解码模式, 每像素字节数)，仅 8 位深度
+_COLOR_TYPES = {0: ("L", 1), 2: ("RGB", 3), 3: ("P", 1), 4: ("LA", 2), 6: ("RGBA", 4)}
+
+# 复制到每个带的小 PNG 中、影响像素解码结果的辅助块
+_COPIED_CHUNKS = (b"PLTE", b"tRNS")
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def _read_chunks(fp):
+    """依次产出 (块类型, 数据)"""
+    while True:
+        header = fp.read(8)
+        if len(header) < 8:
+            return
+        length, kind = struct.unpack(">I4s", header)
+        data = fp.read(length)
+        fp.read(4)
+        yield kind, data
+        if kind == b"IEND":
+            return
+
+
+class PngBandReader:
+    """按水平带解码 PNG；不支持的图片在构造时抛出 ValueError"""
+
+    def __init__(self, path: str, band_rows: int = DEFAULT_BAND_ROWS):
+        self.path = path
+        self.band_rows = max(1, int(band_rows))
+        with open(path, "rb") as fp:
+            if fp.read(8) != _PNG_SIGNATURE:
+                raise ValueError("不是 PNG 图片")
+            chunks = _read_chunks(fp)
+            kind, ihdr = next(chunks, (None, b""))
+            if kind != b"IHDR" or len(ihdr) != 13:
+                raise ValueError("PNG 缺少 IHDR")
+            width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", ihdr)
+            if depth != 8 or interlace or color_type not in _COLOR_TYPES:
+                raise ValueError("只支持非隔行、8 位深度的 PNG")
+            self._ihdr = ihdr
+            self._extra = []
+            for kind, data in chunks:
+                if kind in (b"IDAT", b"IEND"):
+                    break
+                if kind == b"acTL":
+                    raise ValueError("不支持动画 PNG")
+                if kind in _COPIED_CHUNKS:
+                    self._extra.append(_chunk(kind, data))
+        self.size = (width, height)
+        self.mode, channels = _COLOR_TYPES[color_type]
+        self._stride = width * channels
+
+    def _band_png(self, rows: int, payload: bytes) -> bytes:
+        ihdr = struct.pack(">I", self.size[0]) + struct.pack(">I", rows) + self._ihdr[8:]
+        return b"".join([
+            _PNG_SIGNATURE, _chunk(b"IHDR", ihdr), *self._extra,
+            _chunk(b"IDAT", zlib.compress(payload, 0)), _chunk(b"IEND", b""),
+        ])
+
+    def _decode(self, rows: int, payload: bytes) -> Image.Image:
+        with Image.open(io.BytesIO(self._band_png(rows, payload))) as band:
+            band.load()
+            if band.mode != self.mode:
+                raise ValueError(f"带解码模式不符: {band.mode}")
+            return band.copy()
+
+    def _scanlines(self) -> Iterator[bytes]:
+        """产出已解压、仍带滤波类型字节的扫描行"""
+        line_size = self._stride + 1
+        inflater = zlib.decompressobj()
+        pending = b""
+        with open(self.path, "rb") as fp:
+            fp.read(8)
+            for kind, data in _read_chunks(fp):
+                if kind != b"IDAT":
+                    continue
+                # 高压缩率的数据可能一块就解压出整张图，按上限分段解压
+                while data:
+                    pending += inflater.decompress(data, _INFLATE_LIMIT)
+                    data = inflater.unconsumed_tail
+                    lines = len(pending) // line_size
+                    for index in range(lines):
+                        yield pending[index * line_size:(index + 1) * line_size]
+                    pending = pending[lines * line_size:]
+        pending += inflater.flush()
+        for index in range(len(pending) // line_size):
+            yield pending[index * line_size:(index + 1) * line_size]
+
+    def bands(self) -> Iterator[Tuple[int, Image.Image]]:
+        """依次产出 (起始行, 该带图片)，图片模式与整图解码一致"""
+        width, height = self.size
+        top = 0
+        previous: Optional[bytes] = None
+        lines: List[bytes] = []
+
+        def flush():
+            nonlocal previous
+            if previous is None:
+                band = self._decode(len(lines), b"".join(lines))
+            else:
+                # 首行放上一带的最后一行（已还原，滤波类型 0），供本带第一行的滤波参考，解码后丢弃
+                band = self._decode(len(lines) + 1, b"\x00" + previous + b"".join(lines))
+                band = band.crop((0, 1, width, band.height))
+            previous = band.crop((0, band.height - 1, width, band.height)).tobytes()
+            return band
+
+        for line in self._scanlines():
+            lines.append(line)
+            if len(lines) == self.band_rows or top + len(lines) == height:
+                yield top, flush()
+                top += len(lines)
+                lines = []
+                if top == height:
+                    return
+        if top < height:
+            raise ValueError("PNG 数据不完整")
+
+
+def is_streamable(path: str) -> bool:
+    """图片能否按水平带流式解码"""
+    try:
+        PngBandReader(path)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def iter_sprite_crops(
+    path: str,
+    boxes: Sequence[Tuple[int, int, int, int]],
+    band_rows: int = DEFAULT_BAND_ROWS
+) -> Iterator[Tuple[int, Image.Image]]:
+    """
+    按水平带解码图片，逐个产出 (boxes 中的序号, RGBA 裁剪结果)
+
+    精灵按 y 排序，所在行全部解码后立即产出；所有未产出精灵都不再需要的带随即释放。
+    超出图片的部分补透明像素，与整图裁剪后转 RGBA 一致。
+    """
+    reader = PngBandReader(path, band_rows)
+    width, height = reader.size
+    order = sorted(range(len(boxes)), key=lambda i: (boxes[i][1], i))
+    next_start = 0
+    # 已进入窗口、尚未产出的精灵：按底边排序用于产出，按顶边排序用于释放（惰性删除）
+    by_bottom: List[Tuple[int, int]] = []
+    by_top: List[Tuple[int, int]] = []
+    emitted = set()
+    window: List[Tuple[int, Image.Image]] = []
+
+    def crop(index: int) -> Image.Image:
+        left, top, right, bottom = boxes[index]
+        sprite_img = Image.new("RGBA", (max(0, right - left), max(0, bottom - top)), (0, 0, 0, 0))
+        for band_top, band in window:
+            inner = (max(0, left), max(top, band_top), min(width, right), min(bottom, band_top + band.height))
+            if inner[2] > inner[0] and inner[3] > inner[1]:
+                piece = band.crop((inner[0], inner[1] - band_top, inner[2], inner[3] - band_top)).convert("RGBA")
+                sprite_img.paste(piece, (inner[0] - left, inner[1] - top))
+        return sprite_img
+
+    def ready(decoded: int) -> Iterator[Tuple[int, Image.Image]]:
+        nonlocal next_start
+        while next_start < len(order) and boxes[order[next_start]][1] < decoded:
+            index = order[next_start]
+            heapq.heappush(by_bottom, (boxes[index][3], index))
+            heapq.heappush(by_top, (boxes[index][1], index))
+            next_start += 1
+        while by_bottom and (by_bottom[0][0] <= decoded or decoded >= height):
+            _, index = heapq.heappop(by_bottom)
+            emitted.add(index)
+            yield index, crop(index)
+
+    for band_top, band in reader.bands():
+        window.append((band_top, band))
+        yield from ready(band_top + band.height)
+        # 释放所有剩余精灵都用不到的带
+        while by_top and by_top[0][1] in emitted:
+            heapq.heappop(by_top)
+        keep_from = height
+        if by_top:
+            keep_from = by_top[0][0]
+        if next_start < len(order):
+            keep_from = min(keep_from, boxes[order[next_start]][1])
+        window = [(top, band) for top, band in window if top + band.height > keep_from]
+
+    # 完全位于图片下方的精灵只包含透明像素
+    window = []
+    yield from ready(max(height, max((box[3] for box in boxes), default=0)))
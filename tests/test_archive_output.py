@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_export
+@output 导出：archive output tests
+@pos    归档输出（zip/tar/标准输出 tar 流，并发导出时成员顺序与内容可复现）的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import io
+import json
+import os
+import random
+import tarfile
+import tempfile
+import time
+import unittest
+import zipfile
+from unittest import mock
+
+from PIL import Image
+
+import sprite_export
+from sprite_splitter import SpriteSplitter
+
+
+class ArchiveOutputTests(unittest.TestCase):
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self._temp.name, "sheet.png")
+        img = Image.new("RGBA", (48, 16), (0, 0, 0, 0))
+        for index in range(3):
+            img.paste((80 * index, 200, 40, 255), (index * 16 + 2, 2, index * 16 + 14, 14))
+        img.save(self.image_path)
+        self.splitter = SpriteSplitter(self.image_path)
+        self.splitter.split_by_grid(columns=3, rows=1)
+        self.loose_dir = os.path.join(self._temp.name, "loose")
+        self.loose = self.splitter.save_sprites(self.loose_dir)
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def _loose_bytes(self):
+        result = {}
+        for path in self.loose:
+            with open(path, "rb") as f:
+                result[os.path.basename(path)] = f.read()
+        return result
+
+    def test_zip_matches_loose_files(self):
+        target = os.path.join(self._temp.name, "nested", "sprites.zip")
+        members = self.splitter.save_sprites(target, workers=2)
+        self.assertEqual(members, ["sprite_0000.png", "sprite_0001.png", "sprite_0002.png"])
+        with zipfile.ZipFile(target) as archive:
+            self.assertEqual({name: archive.read(name) for name in archive.namelist()}, self._loose_bytes())
+        self.assertFalse(os.path.isdir(os.path.join(self._temp.name, "nested", "sprites.zip")))
+
+    def test_tar_stream_includes_data_and_preview(self):
+        stream = io.BytesIO()
+        with sprite_export.open_sink("-", stdout=stream) as sink:
+            self.splitter.preview_sprites("_preview.png", sink=sink)
+            self.splitter.save_sprites("-", sink=sink)
+            self.splitter.export_data_file("_sprites.json", sink=sink)
+
+        stream.seek(0)
+        with tarfile.open(fileobj=stream, mode="r|") as archive:
+            contents = {member.name: archive.extractfile(member).read() for member in archive}
+        self.assertEqual(sorted(contents), ["_preview.png", "_sprites.json", "sprite_0000.png", "sprite_0001.png", "sprite_0002.png"])
+        for name, data in self._loose_bytes().items():
+            self.assertEqual(contents[name], data)
+        self.assertEqual(len(json.loads(contents["_sprites.json"])["sprites"]), 3)
+
+    def test_archives_are_reproducible(self):
+        img = Image.new("RGBA", (128, 32), (0, 0, 0, 0))
+        for index in range(32):
+            x, y = (index % 16) * 8, (index // 16) * 16
+            img.paste((index * 8, 90, 200, 255), (x + 1, y + 1, x + 7, y + 15))
+        img.save(self.image_path)
+        splitter = SpriteSplitter(self.image_path)
+        splitter.split_by_grid(columns=16, rows=2)
+        rng = random.Random(4)
+        original = sprite_export.encode_image
+
+        def jittered(*args, **kwargs):
+            # 编码耗时随机，使完成顺序与投递顺序不同
+            time.sleep(rng.random() * 0.004)
+            return original(*args, **kwargs)
+
+        names = [f"sprite_{i:04d}.png" for i in range(32)]
+        for suffix in ("zip", "tar", "tar.gz"):
+            outputs = []
+            for run in range(3):
+                target = os.path.join(self._temp.name, f"run{run}.{suffix}")
+                with mock.patch.object(sprite_export, "encode_image", jittered):
+                    splitter.save_sprites(target, workers=8)
+                with open(target, "rb") as f:
+                    outputs.append(f.read())
+            self.assertEqual(outputs[0], outputs[1], suffix)
+            self.assertEqual(outputs[0], outputs[2], suffix)
+            if suffix == "zip":
+                with zipfile.ZipFile(io.BytesIO(outputs[0])) as archive:
+                    self.assertEqual(archive.namelist(), names)
+                    self.assertEqual({info.date_time for info in archive.infolist()}, {(1980, 1, 1, 0, 0, 0)})
+            else:
+                with tarfile.open(fileobj=io.BytesIO(outputs[0])) as archive:
+                    self.assertEqual(archive.getnames(), names)
+                    self.assertEqual({member.mtime for member in archive}, {sprite_export.ARCHIVE_MTIME})
+
+    def test_sink_without_write_fails_on_creation(self):
+        class IncompleteSink(sprite_export.OutputSink):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteSink()
+
+    def test_archive_rejects_directory_only_features(self):
+        with self.assertRaises(ValueError):
+            self.splitter.save_sprites(os.path.join(self._temp.name, "a.tar"), incremental=True)
+        with self.assertRaises(ValueError):
+            self.splitter.save_sprites(os.path.join(self._temp.name, "a.tgz"), dedupe="alias")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_detect
+@output 导出：background mask tests
+@pos    共用背景掩码构建器与逐像素判定一致性的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import random
+import unittest
+
+from PIL import Image
+
+import sprite_detect
+
+
+def _noise(seed: int, size=(23, 17)) -> Image.Image:
+    rng = random.Random(seed)
+    img = Image.new("RGBA", size)
+    img.putdata([
+        (rng.randrange(256), rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        for _ in range(size[0] * size[1])
+    ])
+    return img
+
+
+class BackgroundMaskTests(unittest.TestCase):
+    def test_sum_metric_with_alpha(self):
+        img = _noise(1)
+        color = (120, 130, 140)
+        mask = sprite_detect.build_background_mask(img, color, 30, "sum", alpha_threshold=40)
+        for y in range(img.height):
+            for x in range(img.width):
+                pixel = img.getpixel((x, y))
+                expected = pixel[3] <= 40 or sum(abs(pixel[i] - color[i]) for i in range(3)) < 90
+                self.assertEqual(mask.getpixel((x, y)) == 255, expected, (x, y))
+
+    def test_channel_metric_ignores_alpha(self):
+        img = _noise(2)
+        color = (128, 128, 128)
+        mask = sprite_detect.build_background_mask(img, color, 60, "channel")
+        for y in range(img.height):
+            for x in range(img.width):
+                pixel = img.getpixel((x, y))
+                expected = all(abs(pixel[i] - color[i]) <= 60 for i in range(3))
+                self.assertEqual(mask.getpixel((x, y)) == 255, expected, (x, y))
+
+    def test_foreground_is_inverse(self):
+        img = _noise(3)
+        background = sprite_detect.build_background_mask(img, None, alpha_threshold=100)
+        foreground = sprite_detect.build_foreground_mask(img, alpha_threshold=100)
+        self.assertEqual(
+            [255 - value for value in background.tobytes()],
+            list(foreground.tobytes())
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter
+@output 导出：batch resize tests
+@pos    等尺寸网格导出批量缩放与逐个缩放逐字节一致的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from sprite_splitter import SpriteSplitter
+
+
+def _random_image(rng, mode, size):
+    return Image.frombytes(mode, size, bytes(rng.getrandbits(8) for _ in range(size[0] * size[1] * len(mode))))
+
+
+class BatchResizeTests(unittest.TestCase):
+    def test_resize_uniform_matches_per_cell(self):
+        rng = random.Random(11)
+        for mode in ("RGBA", "LA", "RGB", "L"):
+            for _ in range(15):
+                size = (rng.randint(1, 24), rng.randint(1, 24))
+                cells = [_random_image(rng, mode, size) for _ in range(rng.randint(2, 6))]
+                new_size = (rng.randint(1, 50), rng.randint(1, 50))
+                if new_size == size:
+                    continue
+                for cell, resized in zip(cells, SpriteSplitter._resize_uniform(cells, new_size)):
+                    expected = cell.resize(new_size, Image.Resampling.LANCZOS)
+                    self.assertEqual(resized.mode, expected.mode)
+                    self.assertEqual(resized.tobytes(), expected.tobytes(), (mode, size, new_size))
+
+    def test_grid_export_matches_per_sprite(self):
+        rng = random.Random(4)
+        with tempfile.TemporaryDirectory() as temp:
+            image_path = os.path.join(temp, "sheet.png")
+            _random_image(rng, "RGBA", (90, 60)).save(image_path)
+            splitter = SpriteSplitter(image_path)
+            splitter.split_by_grid(sprite_width=30, sprite_height=20)
+
+            for mode, options in (("scale", {"resize_scale": 1.5}), ("width", {"resize_width": 13}),
+                                  ("height", {"resize_height": 7}), ("custom", {"resize_width": 40, "resize_height": 9})):
+                with mock.patch.object(SpriteSplitter, "_resize_uniform",
+                                       wraps=SpriteSplitter._resize_uniform) as resize_uniform:
+                    batched = splitter.save_sprites(os.path.join(temp, f"batch_{mode}"), resize_mode=mode, **options)
+                self.assertEqual(resize_uniform.call_count, 1)
+                with mock.patch.object(SpriteSplitter, "_batch_resize_eligible", return_value=False):
+                    plain = splitter.save_sprites(os.path.join(temp, f"plain_{mode}"), resize_mode=mode, **options)
+                for left, right in zip(batched, plain):
+                    with open(left, "rb") as a, open(right, "rb") as b:
+                        self.assertEqual(a.read(), b.read(), left)
+
+    def test_falls_back_when_self_check_fails(self):
+        with tempfile.TemporaryDirectory() as temp:
+            image_path = os.path.join(temp, "sheet.png")
+            _random_image(random.Random(6), "RGBA", (40, 40)).save(image_path)
+            splitter = SpriteSplitter(image_path)
+            splitter.split_by_grid(columns=2, rows=2)
+
+            def broken(cells, new_size):
+                return [Image.new(cell.mode, new_size) for cell in cells]
+
+            with mock.patch.object(SpriteSplitter, "_resize_uniform", side_effect=broken):
+                batched = splitter.save_sprites(os.path.join(temp, "batch"), resize_mode="scale", resize_scale=2)
+            with mock.patch.object(SpriteSplitter, "_batch_resize_eligible", return_value=False):
+                plain = splitter.save_sprites(os.path.join(temp, "plain"), resize_mode="scale", resize_scale=2)
+            for left, right in zip(batched, plain):
+                with open(left, "rb") as a, open(right, "rb") as b:
+                    self.assertEqual(a.read(), b.read(), left)
+
+
+if __name__ == "__main__":
+    unittest.main()
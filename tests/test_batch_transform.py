@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, numpy, SpriteSplitter, sprite_detect
+@output 导出：batch transform tests
+@pos    等尺寸帧批量数组变换（跨步视图、分隔线裁剪框、边缘去背景、trim 包围盒）与逐帧处理一致的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import itertools
+import os
+import random
+import tempfile
+import unittest
+
+from PIL import Image
+
+import sprite_detect
+from sprite_splitter import SpriteSplitter, SpriteRect
+
+
+def _sheet(rng, columns=5, rows=3, size=(18, 16)):
+    """白色分隔线隔开、单元格内带纯色背景/透明洞/半透明块的网格精灵表"""
+    width, height = size
+    img = Image.new("RGBA", (columns * (width + 2) + 2, rows * (height + 2) + 2), (255, 255, 255, 255))
+    for col, row in itertools.product(range(columns), range(rows)):
+        x, y = 2 + col * (width + 2), 2 + row * (height + 2)
+        img.paste(rng.choice([(30, 120, 200, 255), (250, 250, 250, 255), (0, 0, 0, 0)]), (x, y, x + width, y + height))
+        for _ in range(rng.randint(0, 3)):
+            left, top = x + rng.randrange(width), y + rng.randrange(height)
+            color = (rng.randrange(256), rng.randrange(256), rng.randrange(256), rng.choice([0, 90, 255]))
+            img.paste(color, (left, top, min(x + width, left + rng.randint(1, 8)), min(y + height, top + rng.randint(1, 8))))
+    return img
+
+
+@unittest.skipIf(sprite_detect.np is None, "需要 NumPy")
+class BatchTransformTests(unittest.TestCase):
+    def test_frame_view_shares_sheet_pixels(self):
+        pixels = sprite_detect.np.asarray(_sheet(random.Random(1)))
+        boxes = [(2 + i * 20, 2, 20 + i * 20, 18) for i in range(5)]
+        frames = sprite_detect.frame_view(pixels, boxes)
+        self.assertEqual(frames.shape, (5, 16, 18, 4))
+        self.assertTrue(sprite_detect.np.shares_memory(frames, pixels))
+        irregular = sprite_detect.frame_view(pixels, [boxes[0], boxes[3], (0, 20, 18, 36)])
+        for frame, (left, top, right, bottom) in zip(irregular, [boxes[0], boxes[3], (0, 20, 18, 36)]):
+            self.assertTrue((frame == pixels[top:bottom, left:right]).all())
+
+    def test_frame_operations_match_per_frame(self):
+        rng = random.Random(25)
+        splitter = SpriteSplitter.__new__(SpriteSplitter)
+        for _ in range(10):
+            img = _sheet(rng, columns=6, rows=1, size=(rng.randint(1, 14), rng.randint(1, 14)))
+            pixels = sprite_detect.np.asarray(img)
+            width, height = (img.width - 2) // 6 - 2, img.height - 4
+            boxes = [(2 + i * (width + 2), 2, 2 + i * (width + 2) + width, 2 + height) for i in range(6)]
+            frames = sprite_detect.frame_view(pixels, boxes)
+            crops = [img.crop(box) for box in boxes]
+
+            self.assertEqual(sprite_detect.frame_separator_boxes(frames, 30),
+                             [splitter._smart_edge_box(crop) for crop in crops])
+            self.assertEqual(sprite_detect.frame_alpha_bboxes(frames[..., 3]), [crop.getbbox() for crop in crops])
+
+            result, _ = sprite_detect.frame_edge_background(frames, 30)
+            for frame, crop in zip(result, crops):
+                self.assertEqual(frame.tobytes(), splitter._remove_edge_background(crop).tobytes())
+
+    def test_export_matches_per_sprite(self):
+        options = [
+            {"trim": True},
+            {"edge_crop": 1, "smart_edge_detect": True},
+            {"smart_edge_detect": True, "remove_bg": True, "trim": True},
+            {"edge_crop": 2, "remove_bg": True, "resize_mode": "fit", "resize_width": 24, "resize_height": 24},
+        ]
+        with tempfile.TemporaryDirectory() as temp:
+            for mode in ("RGBA", "P"):
+                img = _sheet(random.Random(7))
+                path = os.path.join(temp, f"sheet_{mode}.png")
+                (img.convert("RGB").quantize(32) if mode == "P" else img).save(path)
+                splitter = SpriteSplitter(path)
+                splitter.split_by_grid(columns=5, rows=3, margin=1)
+                # 越界单元格逐个处理
+                first = splitter.sprites[0]
+                splitter.sprites.append(SpriteRect(x=95, y=50, width=first.width, height=first.height, name="edge"))
+                for index, kwargs in enumerate(options):
+                    batched = splitter.save_sprites(os.path.join(temp, f"{mode}_batch{index}"), batch=True, **kwargs)
+                    plain = splitter.save_sprites(os.path.join(temp, f"{mode}_plain{index}"), **kwargs)
+                    for left, right in zip(batched, plain):
+                        with open(left, "rb") as a, open(right, "rb") as b:
+                            self.assertEqual(a.read(), b.read(), (mode, kwargs, left))
+
+
+if __name__ == "__main__":
+    unittest.main()
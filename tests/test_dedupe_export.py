@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_export
+@output 导出：dedupe export tests
+@pos    重复帧去重导出（别名/硬链接/符号链接）的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import sprite_export
+from sprite_splitter import SpriteSplitter
+
+
+class DedupeExportTests(unittest.TestCase):
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self._temp.name, "sheet.png")
+        # 6 帧：A A B A B C
+        colors = [(255, 0, 0), (255, 0, 0), (0, 255, 0), (255, 0, 0), (0, 255, 0), (0, 0, 255)]
+        img = Image.new("RGBA", (96, 16), (0, 0, 0, 0))
+        for index, color in enumerate(colors):
+            img.paste(color + (255,), (index * 16 + 3, 3, index * 16 + 13, 13))
+        img.save(self.image_path)
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def _export(self, dedupe, workers=3):
+        splitter = SpriteSplitter(self.image_path)
+        splitter.split_by_grid(columns=6, rows=1)
+        output_dir = os.path.join(self._temp.name, f"{dedupe}_{workers}")
+        encoded = []
+        original = sprite_export.encode_image
+
+        def counting_encode(img, format, **kwargs):
+            encoded.append(img.size)
+            return original(img, format, **kwargs)
+
+        with mock.patch.object(sprite_export, "encode_image", side_effect=counting_encode):
+            paths = splitter.save_sprites(output_dir, dedupe=dedupe, workers=workers)
+        return splitter, output_dir, paths, len(encoded)
+
+    def test_alias_writes_unique_frames_once(self):
+        for workers in (1, 3):
+            splitter, output_dir, paths, encoded = self._export("alias", workers)
+            self.assertEqual(encoded, 3)
+            self.assertEqual(sorted(os.listdir(output_dir)), ["sprite_0000.png", "sprite_0002.png", "sprite_0005.png"])
+            self.assertEqual([os.path.basename(p) for p in paths], [
+                "sprite_0000.png", "sprite_0000.png", "sprite_0002.png",
+                "sprite_0000.png", "sprite_0002.png", "sprite_0005.png"
+            ])
+
+            data_path = os.path.join(output_dir, "_sprites.json")
+            splitter.export_data_file(data_path)
+            with open(data_path, encoding="utf-8") as f:
+                entries = json.load(f)["sprites"]
+            self.assertEqual(
+                [entry.get("alias") for entry in entries],
+                [None, "sprite_0000", None, "sprite_0000", "sprite_0002", None]
+            )
+
+    def test_links_share_content(self):
+        for mode in ("hardlink", "symlink"):
+            _, output_dir, paths, encoded = self._export(mode)
+            self.assertEqual(encoded, 3)
+            self.assertEqual(len(set(paths)), 6)
+            contents = []
+            for path in paths:
+                with open(path, "rb") as f:
+                    contents.append(f.read())
+            self.assertEqual(contents[0], contents[1])
+            self.assertEqual(contents[0], contents[3])
+            self.assertEqual(contents[2], contents[4])
+            self.assertNotEqual(contents[0], contents[5])
+            if mode == "symlink" and os.path.islink(paths[1]):
+                self.assertEqual(os.readlink(paths[1]), "sprite_0000.png")
+            if mode == "hardlink":
+                self.assertTrue(os.path.samefile(paths[0], paths[3]))
+
+    def test_incremental_keeps_links(self):
+        splitter = SpriteSplitter(self.image_path)
+        splitter.split_by_grid(columns=6, rows=1)
+        output_dir = os.path.join(self._temp.name, "incremental")
+        first = splitter.save_sprites(output_dir, dedupe="hardlink", incremental=True)
+        with mock.patch.object(sprite_export, "encode_image", side_effect=AssertionError("re-encoded")):
+            second = splitter.save_sprites(output_dir, dedupe="hardlink", incremental=True)
+        self.assertEqual(first, second)
+        self.assertTrue(os.path.samefile(second[0], second[3]))
+
+        with self.assertRaises(ValueError):
+            splitter.save_sprites(output_dir, dedupe="alias", incremental=True)
+
+    def test_default_writes_every_frame(self):
+        _, output_dir, _, encoded = self._export("none")
+        self.assertEqual(encoded, 6)
+        self.assertEqual(len(os.listdir(output_dir)), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
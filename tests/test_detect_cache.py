@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_detect
+@output 导出：detection cache tests
+@pos    Rect 模式按图检测缓存（参数调整只重新过滤）的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import sprite_detect
+from sprite_splitter import SpriteSplitter
+
+
+def _boxes(sprites):
+    return [(s.x, s.y, s.width, s.height) for s in sprites]
+
+
+class DetectCacheTests(unittest.TestCase):
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self._temp.name, "sheet.png")
+        img = Image.new("RGBA", (120, 60), (0, 0, 0, 0))
+        img.paste((255, 0, 0, 255), (2, 2, 22, 22))
+        img.paste((0, 255, 0, 128), (30, 2, 36, 8))
+        img.paste((0, 0, 255, 255), (60, 10, 100, 50))
+        # 稀疏的 L 形：边界框 30x30，仅 59 个像素（密度约 6.6%）
+        img.paste((255, 255, 0, 255), (2, 28, 32, 29))
+        img.paste((255, 255, 0, 255), (2, 28, 3, 58))
+        img.save(self.image_path)
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def test_refilter_uses_cached_components(self):
+        splitter = SpriteSplitter(self.image_path)
+        first = splitter.split_by_rectangle()
+        self.assertEqual(len(first), 4)
+
+        with mock.patch.object(sprite_detect, "find_components", side_effect=AssertionError("re-detected")):
+            self.assertEqual(
+                _boxes(splitter.split_by_rectangle(min_width=10, min_height=10)),
+                [(2, 2, 20, 20), (60, 10, 40, 40), (2, 28, 30, 30)]
+            )
+            self.assertEqual(
+                _boxes(splitter.split_by_rectangle(min_width=10, min_height=10, min_density=0.1)),
+                [(2, 2, 20, 20), (60, 10, 40, 40)]
+            )
+            self.assertEqual(_boxes(splitter.split_by_rectangle()), _boxes(first))
+
+    def test_results_match_uncached_and_reference(self):
+        splitter = SpriteSplitter(self.image_path)
+        fresh = SpriteSplitter(self.image_path)
+        for threshold in (0, 200, 0):
+            for min_size, density in ((1, 0.01), (8, 0.01), (1, 0.1)):
+                kwargs = dict(min_width=min_size, min_height=min_size,
+                              alpha_threshold=threshold, min_density=density)
+                expected = _boxes(fresh.split_by_rectangle(engine="reference", **kwargs))
+                self.assertEqual(_boxes(splitter.split_by_rectangle(**kwargs)), expected, kwargs)
+
+        self.assertTrue(splitter.is_detection_cached(200))
+        splitter.split_by_rectangle(merge_distance=10)
+        self.assertTrue(splitter.is_detection_cached(0, 10))
+
+    def test_cache_cleared_on_reload_and_bounded(self):
+        splitter = SpriteSplitter(self.image_path)
+        for threshold in range(SpriteSplitter.DETECT_CACHE_SIZE + 2):
+            splitter.split_by_rectangle(alpha_threshold=threshold)
+        self.assertEqual(len(splitter._detect_cache), SpriteSplitter.DETECT_CACHE_SIZE)
+        self.assertFalse(splitter.is_detection_cached(0))
+
+        splitter._load_image()
+        self.assertFalse(splitter.is_detection_cached(SpriteSplitter.DETECT_CACHE_SIZE + 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_cache, sprite_detect
+@output 导出：disk cache tests
+@pos    拆分结果磁盘缓存（内容哈希键含调色板/透明色、LRU 淘汰）的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import sprite_detect
+from sprite_cache import DetectionCache, image_digest
+from sprite_splitter import SpriteSplitter
+
+
+def _boxes(sprites):
+    return [(s.name, s.x, s.y, s.width, s.height) for s in sprites]
+
+
+class DiskCacheTests(unittest.TestCase):
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self._temp.name, "cache")
+        self.image_path = os.path.join(self._temp.name, "sheet.png")
+        img = Image.new("RGBA", (90, 40), (0, 0, 0, 0))
+        img.paste((255, 0, 0, 255), (2, 2, 22, 22))
+        img.paste((0, 0, 255, 255), (40, 10, 80, 30))
+        img.save(self.image_path)
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def test_hit_skips_detection(self):
+        first = SpriteSplitter(self.image_path, cache=DetectionCache(self.cache_dir))
+        expected = _boxes(first.split_by_rectangle(min_width=4))
+        expected_xy = _boxes(first.split_by_xycut())
+
+        second = SpriteSplitter(self.image_path, cache=DetectionCache(self.cache_dir))
+        with mock.patch.object(sprite_detect, "find_components", side_effect=AssertionError("re-detected")), \
+                mock.patch.object(sprite_detect, "xy_cut", side_effect=AssertionError("re-detected")):
+            self.assertEqual(_boxes(second.split_by_rectangle(min_width=4)), expected)
+            self.assertEqual(_boxes(second.split_by_xycut()), expected_xy)
+
+        # 参数不同则不命中
+        self.assertEqual(len(second.split_by_rectangle(min_width=30)), 1)
+
+    def test_key_follows_pixels_not_file(self):
+        with Image.open(self.image_path) as handle:
+            rgba = handle.convert("RGBA")
+        resaved = os.path.join(self._temp.name, "resaved.png")
+        rgba.save(resaved, optimize=True)
+        with Image.open(resaved) as handle:
+            self.assertEqual(image_digest(handle.convert("RGBA")), image_digest(rgba))
+
+        changed = rgba.copy()
+        changed.putpixel((0, 0), (1, 1, 1, 255))
+        self.assertNotEqual(image_digest(changed), image_digest(rgba))
+
+    def test_palette_transparency_is_part_of_key(self):
+        # 两张调色板图像素下标相同，只有 tRNS 不同：第二个精灵在后者中全透明
+        indices = Image.new("P", (20, 12), 0)
+        indices.paste(1, (2, 2, 6, 6))
+        indices.paste(2, (10, 2, 15, 8))
+        indices.putpalette([0, 0, 0, 255, 0, 0, 0, 0, 255] + [0] * 759)
+        results = []
+        for name, transparency in (("a.png", b"\x00"), ("b.png", b"\x00\xff\x00")):
+            path = os.path.join(self._temp.name, name)
+            indices.save(path, transparency=transparency)
+            splitter = SpriteSplitter(path, cache=DetectionCache(self.cache_dir))
+            self.assertEqual(splitter.image.mode, "P")
+            results.append([(s.x, s.y, s.width, s.height) for s in splitter.split_by_rectangle()])
+        self.assertEqual(results, [[(2, 2, 4, 4), (10, 2, 5, 6)], [(2, 2, 4, 4)]])
+
+    def test_lru_eviction_and_corrupt_entries(self):
+        cache = DetectionCache(self.cache_dir)
+        payload = [{"x": i, "y": 0, "width": 1, "height": 1} for i in range(10)]
+        cache.put("probe", payload)
+        entry_size = os.path.getsize(os.path.join(self.cache_dir, "probe.json"))
+        os.remove(os.path.join(self.cache_dir, "probe.json"))
+        # 上限容纳 3 个条目
+        cache = DetectionCache(self.cache_dir, max_size_mb=entry_size * 3.5 / (1024 * 1024))
+        for index, key in enumerate(("a", "b", "c")):
+            cache.put(key, payload)
+            os.utime(os.path.join(self.cache_dir, f"{key}.json"), (index, index))
+        # 读取 a 使其成为最近使用，再写入 d 触发淘汰
+        self.assertEqual(cache.get("a"), payload)
+        cache.put("d", payload)
+        remaining = sorted(name for name in os.listdir(self.cache_dir))
+        self.assertIn("a.json", remaining)
+        self.assertIn("d.json", remaining)
+        self.assertNotIn("b.json", remaining)
+        total = sum(os.path.getsize(os.path.join(self.cache_dir, n)) for n in remaining)
+        self.assertLessEqual(total, cache.max_bytes)
+
+        with open(os.path.join(self.cache_dir, "a.json"), "w") as f:
+            f.write("{broken")
+        self.assertIsNone(cache.get("a"))
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, "a.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
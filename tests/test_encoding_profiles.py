@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_export
+@output 导出：encoding profile tests
+@pos    导出编码档位（fast/balanced/smallest）与运行报告（耗时含延迟加载）的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import io
+import json
+import os
+import random
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import sprite_export
+from sprite_splitter import SpriteRect, SpriteSplitter
+
+
+def _noisy_image():
+    rng = random.Random(3)
+    img = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
+    for _ in range(300):
+        x, y = rng.randrange(60), rng.randrange(60)
+        img.paste((rng.randrange(256), rng.randrange(256), 90, 255), (x, y, x + 4, y + 4))
+    return img
+
+
+class EncodingProfileTests(unittest.TestCase):
+    def test_balanced_matches_previous_defaults(self):
+        img = _noisy_image()
+        for format, expected_options in (("png", {}), ("webp", {}), ("jpg", {"quality": 95})):
+            buffer = io.BytesIO()
+            if format == "jpg":
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.split()[3])
+                background.save(buffer, format="JPEG", **expected_options)
+            else:
+                img.save(buffer, format=format.upper())
+            self.assertEqual(sprite_export.encode_image(img, format), buffer.getvalue(), format)
+
+    def test_profiles_trade_size(self):
+        img = _noisy_image()
+        for format in ("png", "webp"):
+            sizes = {
+                profile: len(sprite_export.encode_image(img, format, profile=profile))
+                for profile in sprite_export.ENCODING_PROFILES
+            }
+            self.assertLessEqual(sizes["smallest"], sizes["balanced"], format)
+            self.assertLessEqual(sizes["balanced"], sizes["fast"], format)
+        with self.assertRaises(ValueError):
+            sprite_export.encode_image(img, "png", profile="turbo")
+
+    def test_report_records_profile(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            _noisy_image().save(image_path)
+            splitter = SpriteSplitter(image_path)
+            splitter.split_by_grid(columns=2, rows=2)
+            output_dir = os.path.join(temp_dir, "out")
+            paths = splitter.save_sprites(output_dir, profile="fast")
+            report_path = splitter.export_report_file(os.path.join(output_dir, sprite_export.REPORT_NAME))
+            with open(report_path, encoding="utf-8") as f:
+                report = json.load(f)
+            self.assertEqual(report["profile"], "fast")
+            self.assertEqual(report["encoded"], 4)
+            self.assertEqual(report["bytes"], sum(os.path.getsize(p) for p in paths))
+
+    def test_report_seconds_cover_deferred_load(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # BMP 不能流式解码，延迟加载的整图加载发生在 save_sprites 内，耗时应计入报告
+            image_path = os.path.join(temp_dir, "sheet.bmp")
+            _noisy_image().convert("RGB").save(image_path)
+            splitter = SpriteSplitter(image_path, defer_load=True)
+            splitter.sprites = [SpriteRect(x=0, y=0, width=32, height=32, name="a")]
+            original = SpriteSplitter._load_image
+
+            def slow_load(instance):
+                time.sleep(0.05)
+                original(instance)
+
+            with mock.patch.object(SpriteSplitter, "_load_image", slow_load):
+                splitter.save_sprites(os.path.join(temp_dir, "out"))
+            self.assertIsNotNone(splitter.image)
+            self.assertGreaterEqual(splitter.export_report["seconds"], 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
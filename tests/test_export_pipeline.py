@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, sprite_export, SpriteSplitter
+@output 导出：export pipeline tests
+@pos    分阶段导出流水线（有界队列、原子写入（含数据文件与运行报告）、异常传播、输入出错时线程退出）的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import sprite_export
+from sprite_splitter import SpriteSplitter
+
+
+class ExportPipelineTests(unittest.TestCase):
+    def test_stages_chain_and_depth_bounds_in_flight(self):
+        lock = threading.Lock()
+        state = {"in_flight": 0, "peak": 0}
+        written = []
+
+        def produce(item):
+            with lock:
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+            return item * 2
+
+        def slow_write(item):
+            time.sleep(0.002)
+            with lock:
+                state["in_flight"] -= 1
+            written.append(item)
+
+        sprite_export.run_pipeline(range(50), [(produce, 2), (slow_write, 1)], depth=3)
+        self.assertEqual(sorted(written), [i * 2 for i in range(50)])
+        # 在途数量 ≤ 生产线程数 + 写入队列容量 + 写入线程数
+        self.assertLessEqual(state["peak"], 2 + 3 + 1)
+
+    def test_error_is_raised_in_caller(self):
+        def explode(item):
+            if item == 7:
+                raise RuntimeError("boom")
+            return item
+
+        with self.assertRaisesRegex(RuntimeError, "boom"):
+            sprite_export.run_pipeline(range(100), [(explode, 3), (lambda item: None, 1)], depth=2)
+
+    def test_failing_input_stops_stage_threads(self):
+        def items():
+            yield from range(5)
+            raise ValueError("PNG 数据不完整")
+
+        before = threading.active_count()
+        processed = []
+        with self.assertRaisesRegex(ValueError, "数据不完整"):
+            sprite_export.run_pipeline(items(), [(lambda item: item, 3), (processed.append, 1)], depth=2)
+        # 各阶段线程都已结束，没有线程阻塞在队列上
+        self.assertEqual(threading.active_count(), before)
+
+    def test_atomic_write_leaves_no_temp_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "a.bin")
+            sprite_export.atomic_write(path, b"old")
+            sprite_export.atomic_write(path, b"new")
+            self.assertEqual(os.listdir(temp_dir), ["a.bin"])
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"new")
+
+    def test_data_and_report_files_are_written_atomically(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            Image.new("RGBA", (32, 16), (200, 40, 90, 255)).save(image_path)
+            splitter = SpriteSplitter(image_path)
+            splitter.split_by_grid(columns=2, rows=1)
+            output_dir = os.path.join(temp_dir, "out")
+            splitter.save_sprites(output_dir)
+            # save_sprites 本身不写运行报告
+            self.assertNotIn(sprite_export.REPORT_NAME, os.listdir(output_dir))
+
+            data_path = os.path.join(output_dir, "_sprites.json")
+            report_path = os.path.join(temp_dir, "report.json")
+            with mock.patch.object(sprite_export, "atomic_write", wraps=sprite_export.atomic_write) as write:
+                splitter.export_data_file(data_path)
+                splitter.export_report_file(report_path)
+            self.assertEqual([call.args[0] for call in write.call_args_list], [data_path, report_path])
+            with open(data_path, encoding="utf-8") as f:
+                self.assertEqual(len(json.load(f)["sprites"]), 2)
+
+    def test_encoded_bytes_match_direct_save(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            img = Image.new("RGBA", (64, 32), (0, 0, 0, 0))
+            img.paste((200, 40, 90, 255), (3, 3, 20, 28))
+            img.paste((20, 140, 90, 128), (36, 5, 60, 20))
+            img.save(image_path)
+
+            splitter = SpriteSplitter(image_path)
+            splitter.split_by_grid(columns=2, rows=1)
+            for format in ("png", "webp"):
+                paths = splitter.save_sprites(os.path.join(temp_dir, format), format=format, workers=2)
+                for sprite, path in zip(splitter.sprites, paths):
+                    direct = os.path.join(temp_dir, f"direct.{format}")
+                    splitter.image.crop((sprite.x, sprite.y, sprite.x + sprite.width, sprite.y + sprite.height)).save(direct)
+                    with open(path, "rb") as a, open(direct, "rb") as b:
+                        self.assertEqual(a.read(), b.read(), format)
+
+            with self.assertRaises(ValueError):
+                splitter.save_sprites(os.path.join(temp_dir, "bad"), format="nope")
+
+
+if __name__ == "__main__":
+    unittest.main()
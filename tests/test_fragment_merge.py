@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_detect
+@output 导出：fragment merge tests
+@pos    Rect 模式碎片合并（merge_distance）的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from PIL import Image
+
+import sprite_detect
+from sprite_detect import Component
+from sprite_splitter import SpriteSplitter
+
+
+def _brute_force_merge(boxes, distance):
+    """O(n²) 两两比较的对照实现"""
+    boxes = [list(b) for b in boxes]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                gap_x = max(b[0] - a[2], a[0] - b[2])
+                gap_y = max(b[1] - a[3], a[1] - b[3])
+                if gap_x <= distance and gap_y <= distance:
+                    boxes[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return sorted(tuple(b) for b in boxes)
+
+
+class FragmentMergeTests(unittest.TestCase):
+    def test_spatial_hash_matches_pairwise(self):
+        rng = random.Random(0)
+        for distance in (1, 3, 8):
+            components = []
+            for _ in range(120):
+                x, y = rng.randrange(400), rng.randrange(400)
+                w, h = rng.randint(1, 12), rng.randint(1, 12)
+                components.append(Component(x=x, y=y, width=w, height=h, pixels=w * h, first_x=x))
+            merged = sprite_detect.merge_nearby_components(components, distance)
+            actual = sorted((c.x, c.y, c.x + c.width, c.y + c.height) for c in merged)
+            expected = _brute_force_merge(
+                [(c.x, c.y, c.x + c.width, c.y + c.height) for c in components], distance
+            )
+            self.assertEqual(actual, expected, f"distance={distance}")
+            self.assertEqual(sum(c.pixels for c in merged), sum(c.pixels for c in components))
+
+    def test_split_merges_sparks(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            img = Image.new("RGBA", (80, 30), (0, 0, 0, 0))
+            # 左侧：主体 + 3 个相距 2px 的火花碎片；右侧：独立精灵
+            for x in range(2, 12):
+                for y in range(2, 12):
+                    img.putpixel((x, y), (255, 0, 0, 255))
+            for x, y in [(14, 4), (17, 6), (14, 14)]:
+                img.putpixel((x, y), (255, 255, 0, 255))
+            for x in range(50, 60):
+                for y in range(5, 15):
+                    img.putpixel((x, y), (0, 0, 255, 255))
+            img.save(image_path)
+
+            splitter = SpriteSplitter(image_path)
+            self.assertEqual(len(splitter.split_by_rectangle()), 5)
+
+            sprites = splitter.split_by_rectangle(merge_distance=3)
+            self.assertEqual(
+                [(s.x, s.y, s.width, s.height) for s in sprites],
+                [(2, 2, 16, 13), (50, 5, 10, 10)]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_export
+@output 导出：incremental export tests
+@pos    增量导出（导出清单、跳过未变化精灵、清理过期文件）的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import sprite_export
+from sprite_splitter import SpriteSplitter
+
+
+class IncrementalExportTests(unittest.TestCase):
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self._temp.name, "sheet.png")
+        self.output_dir = os.path.join(self._temp.name, "out")
+        img = Image.new("RGBA", (64, 16), (0, 0, 0, 0))
+        for index in range(4):
+            img.paste((60 * index, 90, 200, 255), (index * 16 + 2, 2, index * 16 + 14, 14))
+        img.save(self.image_path)
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def _export(self, columns=4, **kwargs):
+        splitter = SpriteSplitter(self.image_path)
+        splitter.split_by_grid(columns=columns, rows=1)
+        encoded = []
+        original = sprite_export.encode_image
+
+        def counting_encode(img, format, **kwargs):
+            encoded.append(img.size)
+            return original(img, format, **kwargs)
+
+        with mock.patch.object(sprite_export, "encode_image", side_effect=counting_encode):
+            paths = splitter.save_sprites(self.output_dir, incremental=True, **kwargs)
+        return paths, len(encoded)
+
+    def test_only_changed_sprites_are_reencoded(self):
+        paths, count = self._export()
+        self.assertEqual(count, 4)
+        self.assertIn(sprite_export.MANIFEST_NAME, os.listdir(self.output_dir))
+
+        _, count = self._export()
+        self.assertEqual(count, 0)
+
+        # 修改一帧，只重新导出这一帧
+        with Image.open(self.image_path) as handle:
+            img = handle.convert("RGBA")
+        img.putpixel((20, 5), (1, 2, 3, 255))
+        img.save(self.image_path)
+        _, count = self._export()
+        self.assertEqual(count, 1)
+
+        # 处理参数变化时全部重新导出
+        _, count = self._export(trim=True)
+        self.assertEqual(count, 4)
+
+        # 输出文件被外部改动时重新导出
+        with open(paths[0], "ab") as f:
+            f.write(b"x")
+        _, count = self._export(trim=True)
+        self.assertEqual(count, 1)
+        with Image.open(paths[0]) as saved:
+            self.assertEqual(saved.size, (12, 12))
+
+    def test_prune_removes_stale_outputs(self):
+        self._export()
+        self.assertEqual(len([n for n in os.listdir(self.output_dir) if n.endswith(".png")]), 4)
+
+        paths, _ = self._export(columns=2)
+        self.assertEqual(len([n for n in os.listdir(self.output_dir) if n.endswith(".png")]), 4)
+
+        self._export(columns=2, prune=True)
+        remaining = sorted(n for n in os.listdir(self.output_dir) if n.endswith(".png"))
+        self.assertEqual(remaining, sorted(os.path.basename(p) for p in paths))
+        self.assertEqual(set(sprite_export.load_manifest(self.output_dir)), set(remaining))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_detect
+@output 导出：native mode loading tests
+@pos    精灵表保持原始模式（P/L/LA/RGB）加载后，检测与导出结果与整张转 RGBA 一致的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from PIL import Image
+
+import sprite_detect
+from sprite_splitter import SpriteSplitter, SpriteRect
+
+
+def _sheet(mode: str) -> Image.Image:
+    """白底、带几块彩色/透明区域的精灵表，再转成指定模式"""
+    rng = random.Random(9)
+    img = Image.new("RGBA", (64, 48), (255, 255, 255, 255))
+    for _ in range(6):
+        x, y = rng.randrange(56), rng.randrange(40)
+        color = (rng.randrange(200), rng.randrange(200), rng.randrange(200), rng.choice([255, 0, 128]))
+        img.paste(color, (x, y, x + rng.randint(3, 12), y + rng.randint(3, 12)))
+    if mode == "P":
+        return img.convert("RGB").quantize(16)
+    return img.convert(mode)
+
+
+class NativeModeTests(unittest.TestCase):
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def _splitters(self, mode):
+        path = os.path.join(self._temp.name, f"sheet_{mode}.png")
+        _sheet(mode).save(path)
+        native = SpriteSplitter(path)
+        converted = SpriteSplitter(path)
+        converted.image = converted.image.convert("RGBA")
+        return native, converted
+
+    def test_source_mode_is_kept(self):
+        for mode in ("P", "L", "LA", "RGB"):
+            native, _ = self._splitters(mode)
+            self.assertEqual(native.image.mode, mode)
+
+    def test_detection_and_export_match_rgba(self):
+        options = [
+            {},
+            {"trim": True},
+            {"remove_bg": True, "trim": True},
+            {"smart_edge_detect": True, "edge_crop": 1},
+            {"resize_mode": "scale", "resize_scale": 1.5},
+        ]
+        for mode in ("P", "L", "LA", "RGB"):
+            native, converted = self._splitters(mode)
+            boxes = [(s.x, s.y, s.width, s.height) for s in native.split_by_rectangle()]
+            self.assertEqual(boxes, [(s.x, s.y, s.width, s.height) for s in converted.split_by_rectangle()], mode)
+            self.assertEqual(native.infer_grid(), converted.infer_grid())
+
+            # 追加一个超出图片范围的精灵：越界部分应补透明像素
+            for splitter in (native, converted):
+                splitter.sprites.append(SpriteRect(name="edge", x=56, y=40, width=16, height=16))
+
+            for index, kwargs in enumerate(options):
+                left = native.save_sprites(os.path.join(self._temp.name, f"{mode}_native_{index}"), **kwargs)
+                right = converted.save_sprites(os.path.join(self._temp.name, f"{mode}_rgba_{index}"), **kwargs)
+                for a, b in zip(left, right):
+                    with open(a, "rb") as fa, open(b, "rb") as fb:
+                        self.assertEqual(fa.read(), fb.read(), (mode, kwargs, a))
+
+    def test_background_mask_matches_rgba(self):
+        for mode in ("P", "L", "LA", "RGB"):
+            img = _sheet(mode)
+            rgba = img.convert("RGBA")
+            for color in (None, (255, 255, 255), (30, 60, 90)):
+                for metric in ("sum", "channel"):
+                    for alpha_threshold in (None, 0, 255):
+                        expected = sprite_detect.build_background_mask(rgba, color, 30, metric, alpha_threshold)
+                        actual = sprite_detect.build_background_mask(img, color, 30, metric, alpha_threshold)
+                        self.assertEqual(actual.tobytes(), expected.tobytes(), (mode, color, metric, alpha_threshold))
+
+
+if __name__ == "__main__":
+    unittest.main()
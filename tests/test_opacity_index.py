@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_detect
+@output 导出：opacity index tests
+@pos    整表不透明像素积分图索引（count / bbox / is_empty）与游程掩码、裁剪 getbbox 一致的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import sprite_detect
+from sprite_splitter import SpriteSplitter
+
+
+def _random_sheet(rng, size):
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
+    for _ in range(rng.randint(0, 8)):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256), rng.randint(1, 255))
+        img.paste(color, (x, y, x + rng.randint(1, 10), y + rng.randint(1, 10)))
+    return img
+
+
+@unittest.skipIf(sprite_detect.np is None, "需要 NumPy")
+class OpacityIndexTests(unittest.TestCase):
+    def test_queries_match_run_mask_and_getbbox(self):
+        rng = random.Random(22)
+        for _ in range(60):
+            img = _random_sheet(rng, (rng.randint(1, 40), rng.randint(1, 40)))
+            index = sprite_detect.opacity_index(img)
+            self.assertIsInstance(index, sprite_detect.OpacityIndex)
+            runs = sprite_detect.RunMask.from_image(img)
+            self.assertEqual(index.count(), runs.count())
+            self.assertEqual(index.bbox(), img.getbbox())
+            for _ in range(10):
+                left, top = rng.randint(-5, img.width), rng.randint(-5, img.height)
+                box = (left, top, left + rng.randint(0, 20), top + rng.randint(0, 20))
+                self.assertEqual(index.count(box), runs.count(box), box)
+                self.assertEqual(index.is_empty(box), runs.is_empty(box), box)
+                self.assertEqual(index.bbox(box), runs.bbox(box), box)
+                if box[2] > box[0] and box[3] > box[1]:
+                    expected = img.crop(box).getbbox()
+                    actual = index.bbox(box)
+                    if actual is not None:
+                        actual = (actual[0] - box[0], actual[1] - box[1], actual[2] - box[0], actual[3] - box[1])
+                    self.assertEqual(actual, expected, box)
+
+    def test_falls_back_to_run_mask(self):
+        img = _random_sheet(random.Random(1), (30, 30))
+        self.assertIsInstance(sprite_detect.opacity_index(img, max_memory_mb=0.001), sprite_detect.RunMask)
+        self.assertIsInstance(sprite_detect.opacity_index(img, engine="pillow"), sprite_detect.RunMask)
+
+    def test_trim_export_matches_run_mask(self):
+        with tempfile.TemporaryDirectory() as temp:
+            image_path = os.path.join(temp, "sheet.png")
+            _random_sheet(random.Random(5), (64, 48)).save(image_path)
+            splitter = SpriteSplitter(image_path)
+            splitter.split_by_grid(columns=4, rows=3)
+
+            indexed = splitter.save_sprites(os.path.join(temp, "indexed"), trim=True,
+                                            resize_mode="fit", resize_width=20, resize_height=20)
+            self.assertIsInstance(splitter._opacity, sprite_detect.OpacityIndex)
+            splitter._opacity = None
+            with mock.patch.object(sprite_detect, "resolve_engine", return_value="pillow"):
+                plain = splitter.save_sprites(os.path.join(temp, "plain"), trim=True,
+                                              resize_mode="fit", resize_width=20, resize_height=20)
+            for left, right in zip(indexed, plain):
+                with open(left, "rb") as a, open(right, "rb") as b:
+                    self.assertEqual(a.read(), b.read(), left)
+
+
+if __name__ == "__main__":
+    unittest.main()
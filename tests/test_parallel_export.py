@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter
+@output 导出：parallel export tests
+@pos    多线程导出（save_sprites workers）与串行导出一致性的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from sprite_splitter import SpriteSplitter
+
+
+def _read_all(paths):
+    contents = []
+    for path in paths:
+        with open(path, "rb") as f:
+            contents.append(f.read())
+    return contents
+
+
+class ParallelExportTests(unittest.TestCase):
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self._temp.name, "sheet.png")
+        img = Image.new("RGBA", (160, 80), (0, 0, 0, 0))
+        for index in range(16):
+            x, y = (index % 8) * 20, (index // 8) * 40
+            img.paste((index * 15, 255 - index * 15, 90, 255), (x + 2 + index % 5, y + 3, x + 17, y + 30 - index % 7))
+        img.save(self.image_path)
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def _export(self, workers, **kwargs):
+        splitter = SpriteSplitter(self.image_path)
+        splitter.split_by_grid(columns=8, rows=2)
+        output_dir = os.path.join(self._temp.name, f"out_{workers}_{len(kwargs)}")
+        paths = splitter.save_sprites(output_dir, workers=workers, **kwargs)
+        return [os.path.relpath(p, output_dir) for p in paths], _read_all(paths)
+
+    def test_matches_serial_export(self):
+        for kwargs in ({}, {"trim": True}, {"trim": True, "resize_mode": "fit", "resize_width": 12, "resize_height": 12},
+                       {"format": "jpg", "edge_crop": 1}):
+            names, contents = self._export(1, **kwargs)
+            parallel_names, parallel_contents = self._export(4, **kwargs)
+            self.assertEqual(parallel_names, names, kwargs)
+            self.assertEqual(parallel_contents, contents, kwargs)
+
+    def test_duplicate_names_keep_last_sprite(self):
+        splitter = SpriteSplitter(self.image_path)
+        splitter.split_by_grid(columns=8, rows=2)
+        output_dir = os.path.join(self._temp.name, "dup")
+        # 模板只含 {y}，同一行的精灵写入同一文件，按顺序最后一个生效
+        paths = splitter.save_sprites(output_dir, name_template="row_{y}", workers=4)
+        self.assertEqual(len(paths), 16)
+        self.assertEqual(sorted(os.listdir(output_dir)), ["row_0.png", "row_40.png"])
+        with Image.open(os.path.join(output_dir, "row_40.png")) as saved:
+            last = splitter.sprites[-1]
+            expected = splitter.image.crop((last.x, last.y, last.x + last.width, last.y + last.height))
+            self.assertEqual(saved.convert("RGBA").tobytes(), expected.tobytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_detect, sprite_cache
+@output 导出：rect engine tests
+@pos    Rect 模式数组化检测引擎（含分块/流式分块/多进程/金字塔检测，金字塔区域过密时回退整图标记）与参考实现一致性的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import sprite_cache
+import sprite_detect
+from sprite_splitter import SpriteSplitter
+
+
+def _make_sheet(seed: int, size=(48, 40), background=(0, 0, 0, 0)) -> Image.Image:
+    rng = random.Random(seed)
+    img = Image.new("RGBA", size, background)
+    width, height = size
+    # 随机游走生成不规则形状，包含相邻、嵌套、半透明与单像素噪点
+    for _ in range(25):
+        x, y = rng.randrange(width), rng.randrange(height)
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256), rng.choice([5, 128, 255]))
+        for _ in range(rng.randint(1, 80)):
+            x = min(width - 1, max(0, x + rng.randint(-1, 1)))
+            y = min(height - 1, max(0, y + rng.randint(-1, 1)))
+            img.putpixel((x, y), color)
+    return img
+
+
+class RectEngineTests(unittest.TestCase):
+    def _split(self, image_path, **kwargs):
+        splitter = SpriteSplitter(image_path)
+        sprites = splitter.split_by_rectangle(**kwargs)
+        return [(s.x, s.y, s.width, s.height, s.name) for s in sprites]
+
+    def _engines(self):
+        engines = ["pillow"]
+        if sprite_detect.np is not None:
+            engines.append("numpy")
+        return engines
+
+    def test_engines_match_reference(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            for seed in range(6):
+                background = (200, 200, 200, 255) if seed % 2 else (0, 0, 0, 0)
+                _make_sheet(seed, background=background).save(image_path)
+                for alpha_threshold in (0, 10):
+                    expected = self._split(
+                        image_path, min_width=2, min_height=1,
+                        alpha_threshold=alpha_threshold, engine="reference"
+                    )
+                    for engine in self._engines():
+                        actual = self._split(
+                            image_path, min_width=2, min_height=1,
+                            alpha_threshold=alpha_threshold, engine=engine
+                        )
+                        self.assertEqual(actual, expected, f"seed={seed} engine={engine}")
+
+    def test_density_filter_and_order(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            img = Image.new("RGBA", (240, 240), (0, 0, 0, 0))
+            # L 形细线：bbox 230x230，填充率低于 1%，应被过滤
+            for i in range(230):
+                img.putpixel((i, 239), (255, 255, 255, 255))
+                img.putpixel((0, 10 + i), (255, 255, 255, 255))
+            # 同一 y 的两个实心块，应按 x 排序
+            for x in range(104, 110):
+                for y in range(0, 5):
+                    img.putpixel((x, y), (255, 0, 0, 255))
+            for x in range(112, 118):
+                for y in range(0, 5):
+                    img.putpixel((x, y), (0, 255, 0, 255))
+            img.save(image_path)
+
+            for engine in self._engines() + ["reference"]:
+                sprites = self._split(image_path, engine=engine)
+                self.assertEqual(
+                    sprites,
+                    [(104, 0, 6, 5, "sprite_0000"), (112, 0, 6, 5, "sprite_0001")],
+                    engine
+                )
+
+    def test_tiled_matches_untiled(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            for seed in range(4):
+                background = (200, 200, 200, 255) if seed % 2 else (0, 0, 0, 0)
+                _make_sheet(seed, background=background).save(image_path)
+                expected = self._split(image_path, engine="reference")
+                for engine in self._engines():
+                    # 分块边长取小值，保证大量连通域跨越分块边界
+                    for tile_size in (1, 5, 16):
+                        actual = self._split(image_path, engine=engine, tile_size=tile_size)
+                        self.assertEqual(actual, expected, f"seed={seed} engine={engine} tile={tile_size}")
+
+    def test_streamed_tiled_detection_over_pixel_limit(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sheets = {
+                "rgba": _make_sheet(11, size=(64, 700)),
+                "solid": _make_sheet(12, size=(64, 700), background=(200, 200, 200, 255)).convert("RGB"),
+                "palette": _make_sheet(13, size=(64, 700)).convert("P"),
+                "keyed": _make_sheet(14, size=(64, 700), background=(9, 9, 9, 255)).convert("RGB"),
+            }
+            for name, sheet in sheets.items():
+                image_path = os.path.join(temp_dir, f"{name}.png")
+                if name == "palette":
+                    sheet.save(image_path, transparency=0)
+                elif name == "keyed":
+                    sheet.save(image_path, transparency=(9, 9, 9))
+                else:
+                    sheet.save(image_path)
+                full = SpriteSplitter(image_path)
+                expected = [(s.x, s.y, s.width, s.height) for s in full.split_by_rectangle(tile_size=16)]
+                full_digest = sprite_cache.image_digest(full.image)
+
+                # 整表超过像素数上限的 2 倍（整图解码直接报错），流式解码的单条带低于上限
+                with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 20000):
+                    with self.assertRaises(Image.DecompressionBombError):
+                        SpriteSplitter(image_path)
+                    for engine in self._engines():
+                        # workers > 1：流式解码的各条带交给多进程标记
+                        for workers in (1, 2):
+                            # 每次用新的缓存目录，确保真正执行检测（缓存只用来核对流式计算的内容哈希）
+                            cache_dir = os.path.join(temp_dir, f"cache_{name}_{engine}_{workers}")
+                            cache = sprite_cache.DetectionCache(cache_dir)
+                            splitter = SpriteSplitter(image_path, cache=cache, defer_load=True)
+                            sprites = splitter.split_by_rectangle(engine=engine, tile_size=16, workers=workers)
+                            self.assertIsNone(splitter.image)
+                            self.assertEqual(
+                                [(s.x, s.y, s.width, s.height) for s in sprites], expected, (name, engine, workers)
+                            )
+                            self.assertEqual(splitter._content_digest, full_digest, name)
+
+    def test_parallel_bands_match_single_process(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            _make_sheet(7, size=(64, 57)).save(image_path)
+            expected = self._split(image_path, engine="reference")
+            for engine in self._engines():
+                # 带高取 3 行，保证大部分连通域跨越带接缝
+                actual = self._split(image_path, engine=engine, workers=2, tile_size=3)
+                self.assertEqual(actual, expected, engine)
+
+    def test_pyramid_matches_full_resolution(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            for seed in range(4):
+                background = (200, 200, 200, 255) if seed % 2 else (0, 0, 0, 0)
+                _make_sheet(seed, size=(70, 50), background=background).save(image_path)
+                expected = self._split(image_path, engine="reference")
+                for engine in self._engines():
+                    # 0：始终逐区域精确标记；极大值：始终回退整图标记
+                    for per_region in (0, 1 << 40):
+                        with mock.patch.object(sprite_detect, "PYRAMID_PIXELS_PER_REGION", per_region):
+                            for factor in (2, 4, 8):
+                                actual = self._split(image_path, engine=engine, pyramid=factor)
+                                self.assertEqual(
+                                    actual, expected,
+                                    f"seed={seed} engine={engine} factor={factor} per_region={per_region}"
+                                )
+
+    def test_pyramid_dense_regions_use_single_pass(self):
+        img = Image.new("RGBA", (256, 256), (0, 0, 0, 0))
+        for y in range(4, 256, 16):
+            for x in range(4, 256, 16):
+                img.paste((255, 0, 0, 255), (x, y, x + 5, y + 5))
+        calls = []
+        original = sprite_detect.RunMask.from_mask
+
+        def counted(mask, engine="auto"):
+            calls.append(mask.size)
+            return original(mask, engine)
+
+        with mock.patch.object(sprite_detect.RunMask, "from_mask", staticmethod(counted)):
+            components = sprite_detect.find_components_pyramid(img, factor=8)
+        # 256 个候选区域、每个平均只占 256 像素：粗检测一次 + 整图标记一次
+        self.assertEqual(calls, [(32, 32), (256, 256)])
+        self.assertEqual(sorted((c.x, c.y) for c in components),
+                         [(x, y) for x in range(4, 256, 16) for y in range(4, 256, 16)])
+
+    def test_tile_size_from_memory_budget(self):
+        self.assertEqual(sprite_detect.tile_size_for_memory(0.001), sprite_detect.MIN_TILE_SIZE)
+        side = sprite_detect.tile_size_for_memory(64)
+        self.assertLessEqual(side * side * sprite_detect.TILE_BYTES_PER_PIXEL, 64 * 1024 * 1024)
+        self.assertEqual(side % sprite_detect.MIN_TILE_SIZE, 0)
+
+    def test_unknown_engine_rejected(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            Image.new("RGBA", (4, 4), (0, 0, 0, 0)).save(image_path)
+            with self.assertRaises(ValueError):
+                SpriteSplitter(image_path).split_by_rectangle(engine="gpu")
+
+
+if __name__ == "__main__":
+    unittest.main()
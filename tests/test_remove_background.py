@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_detect
+@output 导出：edge background removal tests
+@pos    边缘去背景（游程连通域实现）与逐像素 BFS 结果一致的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import random
+import unittest
+from collections import deque
+from unittest import mock
+
+from PIL import Image, ImageDraw
+
+import sprite_detect
+from sprite_splitter import SpriteSplitter
+
+
+def _bfs_edge_fill(mask: Image.Image):
+    """逐像素 BFS 的对照实现：从四条边缘出发的 4 连通洪水填充"""
+    width, height = mask.size
+    data = mask.tobytes()
+    filled = bytearray(width * height)
+    queue = deque()
+    for y in range(height):
+        for x in range(width):
+            if (x in (0, width - 1) or y in (0, height - 1)) and data[y * width + x] and not filled[y * width + x]:
+                filled[y * width + x] = 255
+                queue.append((x, y))
+    while queue:
+        x, y = queue.popleft()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < width and 0 <= ny < height and data[ny * width + nx] and not filled[ny * width + nx]:
+                filled[ny * width + nx] = 255
+                queue.append((nx, ny))
+    return bytes(filled)
+
+
+class RemoveBackgroundTests(unittest.TestCase):
+    def test_edge_connected_mask_matches_bfs(self):
+        rng = random.Random(5)
+        engines = ["pillow"] + (["numpy"] if sprite_detect.np is not None else [])
+        for _ in range(60):
+            width, height = rng.randint(1, 30), rng.randint(1, 30)
+            mask = Image.new("L", (width, height), 0)
+            mask.putdata([255 if rng.random() < 0.55 else 0 for _ in range(width * height)])
+            expected = _bfs_edge_fill(mask)
+            for engine in engines:
+                self.assertEqual(sprite_detect.edge_connected_mask(mask, engine).tobytes(), expected, engine)
+
+    def test_interior_background_color_is_kept(self):
+        img = Image.new("RGBA", (40, 40), (250, 250, 250, 255))
+        draw = ImageDraw.Draw(img)
+        draw.rectangle([8, 8, 31, 31], fill=(20, 20, 20, 255))
+        draw.rectangle([14, 14, 25, 25], fill=(252, 248, 250, 255))
+
+        for numpy_available in (True, False):
+            with mock.patch.object(sprite_detect, "np", sprite_detect.np if numpy_available else None):
+                result = SpriteSplitter._remove_edge_background(None, img)
+            self.assertEqual(result.getpixel((0, 0)), (0, 0, 0, 0))
+            self.assertEqual(result.getpixel((39, 20)), (0, 0, 0, 0))
+            self.assertEqual(result.getpixel((10, 10)), (20, 20, 20, 255))
+            # 被前景包围的背景色区域不受影响
+            self.assertEqual(result.getpixel((20, 20)), (252, 248, 250, 255))
+            self.assertEqual(result.getbbox(), (8, 8, 32, 32))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_detect
+@output 导出：run mask tests
+@pos    游程掩码（RLE）区域查询与 trim 导出一致性的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from PIL import Image
+
+import sprite_detect
+from sprite_splitter import SpriteSplitter, SpriteRect
+
+
+def _sparse_sheet(seed: int, size=(60, 45)) -> Image.Image:
+    rng = random.Random(seed)
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
+    for _ in range(120):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        img.putpixel((x, y), (rng.randrange(256), 0, 0, rng.choice([1, 90, 255])))
+    return img
+
+
+class RunMaskTests(unittest.TestCase):
+    def _engines(self):
+        return ["pillow"] + (["numpy"] if sprite_detect.np is not None else [])
+
+    def test_bbox_and_count_match_pillow(self):
+        rng = random.Random(1)
+        img = _sparse_sheet(3)
+        alpha = img.getchannel("A")
+        for engine in self._engines():
+            runs = sprite_detect.RunMask.from_image(img, engine=engine)
+            for _ in range(200):
+                x0, y0 = rng.randint(-5, 60), rng.randint(-5, 45)
+                box = (x0, y0, x0 + rng.randint(1, 30), y0 + rng.randint(1, 30))
+                crop = alpha.crop(box)
+                expected = crop.getbbox()
+                actual = runs.bbox(box)
+                if expected is None:
+                    self.assertIsNone(actual)
+                else:
+                    self.assertEqual(
+                        actual,
+                        (expected[0] + box[0], expected[1] + box[1], expected[2] + box[0], expected[3] + box[1])
+                    )
+                self.assertEqual(runs.count(box), sum(crop.histogram()[1:]))
+
+    def test_trim_export_matches_getbbox(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            output_dir = os.path.join(temp_dir, "out")
+            img = _sparse_sheet(5)
+            img.save(image_path)
+
+            splitter = SpriteSplitter(image_path)
+            splitter.sprites = [
+                SpriteRect(x=0, y=0, width=20, height=20, name="a"),
+                SpriteRect(x=50, y=40, width=20, height=20, name="b"),  # 超出图片边界
+                SpriteRect(x=-3, y=10, width=12, height=9, name="c"),
+            ]
+            saved = splitter.save_sprites(output_dir, trim=True, edge_crop=1)
+
+            for sprite, path in zip(splitter.sprites, saved):
+                expected = img.crop((sprite.x, sprite.y, sprite.x + sprite.width, sprite.y + sprite.height))
+                expected = expected.crop((1, 1, sprite.width - 1, sprite.height - 1))
+                bbox = expected.getbbox()
+                if bbox:
+                    expected = expected.crop(bbox)
+                with Image.open(path) as handle:
+                    self.assertEqual(handle.size, expected.size)
+                    self.assertEqual(handle.convert("RGBA").tobytes(), expected.tobytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
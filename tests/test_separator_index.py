@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_detect
+@output 导出：separator index tests
+@pos    整表分隔线索引（智能边缘检测查表、网格推断）与逐单元格检测一致、整表分隔线分带判定与内存上限的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import random
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import sprite_detect
+from sprite_splitter import SpriteSplitter
+
+
+def _grid_sheet(columns=4, rows=3, size=20, gap=2, margin=2):
+    """浅色分隔线隔开的网格精灵表"""
+    width = margin * 2 + columns * size + (columns - 1) * gap
+    height = margin * 2 + rows * size + (rows - 1) * gap
+    img = Image.new("RGBA", (width, height), (255, 255, 255, 255))
+    for row in range(rows):
+        for col in range(columns):
+            x = margin + col * (size + gap)
+            y = margin + row * (size + gap)
+            img.paste((40 * col, 60 * row, 90, 255), (x, y, x + size, y + size))
+    return img
+
+
+@unittest.skipIf(sprite_detect.np is None, "需要 NumPy")
+class SeparatorIndexTests(unittest.TestCase):
+    def test_crop_box_matches_per_cell_detection(self):
+        rng = random.Random(3)
+        for _ in range(80):
+            width, height = rng.randint(1, 40), rng.randint(1, 40)
+            img = Image.new("RGBA", (width, height), (255, 255, 255, 255))
+            for _ in range(rng.randint(0, 5)):
+                x, y = rng.randrange(width), rng.randrange(height)
+                color = (rng.choice([255, 230, 198, 10]), rng.choice([255, 200]), 240, rng.randint(0, 255))
+                img.paste(color, (x, y, min(width, x + rng.randint(1, 15)), min(height, y + rng.randint(1, 15))))
+            tolerance = rng.choice([0, 10, 30])
+            boxes = []
+            for _ in range(4):
+                left, top = rng.randrange(width), rng.randrange(height)
+                boxes.append((left, top, rng.randint(left + 1, width), rng.randint(top + 1, height)))
+
+            index = sprite_detect.SeparatorIndex(img, boxes, tolerance)
+            for box in boxes:
+                self.assertTrue(index.covers(box))
+                expected = SpriteSplitter._smart_edge_box(None, img.crop(box), tolerance)
+                self.assertEqual(index.crop_box(box), expected, box)
+
+    def test_export_matches_per_cell_path(self):
+        with tempfile.TemporaryDirectory() as temp:
+            image_path = os.path.join(temp, "sheet.png")
+            _grid_sheet().save(image_path)
+            splitter = SpriteSplitter(image_path)
+            splitter.split_by_grid(columns=4, rows=3)
+            # 最后一个单元格越界，走逐单元格回退
+            splitter.sprites[-1].width += 5
+
+            for edge_crop in (0, 1):
+                indexed = splitter.save_sprites(os.path.join(temp, f"indexed{edge_crop}"),
+                                                smart_edge_detect=True, edge_crop=edge_crop)
+                with mock.patch.object(sprite_detect, "resolve_engine", return_value="pillow"):
+                    plain = splitter.save_sprites(os.path.join(temp, f"plain{edge_crop}"),
+                                                  smart_edge_detect=True, edge_crop=edge_crop)
+                for left, right in zip(indexed, plain):
+                    with open(left, "rb") as a, open(right, "rb") as b:
+                        self.assertEqual(a.read(), b.read(), left)
+            # 左上单元格的浅色边距已被裁掉
+            with Image.open(indexed[0]) as first:
+                self.assertNotEqual(first.getpixel((0, 0)), (255, 255, 255, 255))
+
+    def test_infer_grid(self):
+        img = _grid_sheet(columns=4, rows=3, size=20, gap=2, margin=2)
+        for engine in ("numpy", "pillow"):
+            rows, columns = sprite_detect.separator_line_flags(img, engine=engine)
+            self.assertEqual(sprite_detect.infer_grid_from_separators(rows, columns), {
+                "columns": 4, "rows": 3, "sprite_width": 20, "sprite_height": 20, "padding": 2, "margin": 2
+            })
+
+        with tempfile.TemporaryDirectory() as temp:
+            image_path = os.path.join(temp, "sheet.png")
+            img.save(image_path)
+            splitter = SpriteSplitter(image_path)
+            sprites = splitter.split_by_grid(**splitter.infer_grid())
+            self.assertEqual([(s.x, s.y) for s in sprites[:2]], [(2, 2), (24, 2)])
+            self.assertEqual(len(sprites), 12)
+
+        # 不等宽的单元格无法表示为 split_by_grid 参数
+        uneven = Image.new("RGBA", (30, 10), (255, 255, 255, 255))
+        uneven.paste((0, 0, 0, 255), (1, 1, 5, 9))
+        uneven.paste((0, 0, 0, 255), (7, 1, 20, 9))
+        self.assertIsNone(sprite_detect.infer_grid_from_separators(*sprite_detect.separator_line_flags(uneven)))
+
+    def test_banded_flags_match_pillow(self):
+        rng = random.Random(9)
+        for mode in ("RGBA", "RGB", "P", "L", "LA"):
+            for _ in range(10):
+                img = _grid_sheet(columns=rng.randint(1, 4), rows=rng.randint(1, 4), size=rng.randint(3, 9))
+                for _ in range(rng.randint(0, 5)):
+                    img.putpixel((rng.randrange(img.width), rng.randrange(img.height)), (240, 235, 250, 255))
+                img = img.convert(mode) if mode != "P" else img.convert("P", palette=Image.ADAPTIVE)
+                expected = sprite_detect.separator_line_flags(img, 10, engine="pillow")
+                # 带高取小值，保证列的判定跨越多条带
+                with mock.patch.object(sprite_detect, "SEPARATOR_BAND_ROWS", 3):
+                    self.assertEqual(sprite_detect.separator_line_flags(img, 10, engine="numpy"), expected, mode)
+
+    def test_flags_memory_stays_banded(self):
+        img = _grid_sheet(columns=16, rows=16, size=60, gap=4, margin=2).convert("P", palette=Image.ADAPTIVE)
+        band_rows = 32
+        tracemalloc.start()
+        try:
+            with mock.patch.object(sprite_detect, "SEPARATOR_BAND_ROWS", band_rows):
+                sprite_detect.separator_line_flags(img, engine="numpy")
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        # 峰值只与带的大小有关（整张 RGB 的 int16 副本约为每像素 6 字节）
+        self.assertLess(peak, img.width * band_rows * 16)
+        self.assertLess(peak, img.width * img.height // 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
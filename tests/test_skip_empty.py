@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_detect
+@output 导出：skip empty cell tests
+@pos    Grid 模式跳过全透明/纯背景色单元格，批量判空与逐单元格 getbbox 一致、判空索引跨网格参数复用的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import sprite_detect
+from sprite_splitter import SpriteSplitter
+
+
+def _partial_sheet(background=(0, 0, 0, 0), filled=10):
+    """4x4 网格、16px 单元格，只有前 filled 个单元格有内容"""
+    img = Image.new("RGBA", (64, 64), background)
+    for index in range(filled):
+        x, y = (index % 4) * 16, (index // 4) * 16
+        img.paste((200, 40 * (index % 5), 90, 255), (x + 4, y + 4, x + 12, y + 12))
+    return img
+
+
+class SkipEmptyTests(unittest.TestCase):
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.dir = self._temp.name
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def _splitter(self, img):
+        path = os.path.join(self.dir, "sheet.png")
+        img.save(path)
+        return SpriteSplitter(path)
+
+    def test_drops_transparent_and_background_cells(self):
+        for background in ((0, 0, 0, 0), (255, 0, 255, 255)):
+            splitter = self._splitter(_partial_sheet(background))
+            self.assertEqual(len(splitter.split_by_grid(columns=4, rows=4)), 16)
+            sprites = splitter.split_by_grid(columns=4, rows=4, skip_empty=True)
+            self.assertEqual([s.name for s in sprites], [f"sprite_{i:04d}" for i in range(10)])
+
+    def test_alpha_threshold(self):
+        img = _partial_sheet(filled=2)
+        img.paste((255, 255, 255, 20), (36, 4, 40, 8))
+        splitter = self._splitter(img)
+        self.assertEqual(len(splitter.split_by_grid(columns=4, rows=4, skip_empty=True)), 3)
+        self.assertEqual(len(splitter.split_by_grid(columns=4, rows=4, skip_empty=True, alpha_threshold=20)), 2)
+
+    def test_bulk_check_matches_per_cell_getbbox(self):
+        rng = random.Random(23)
+        for _ in range(30):
+            size = (rng.randint(1, 40), rng.randint(1, 40))
+            img = Image.new("RGBA", size, (0, 0, 0, 0))
+            for _ in range(rng.randint(0, 4)):
+                x, y = rng.randrange(size[0]), rng.randrange(size[1])
+                img.paste((9, 9, 9, rng.randint(1, 255)), (x, y, x + rng.randint(1, 4), y + rng.randint(1, 4)))
+            threshold = rng.choice([0, 100])
+            boxes = []
+            for _ in range(12):
+                left, top = rng.randint(-4, size[0]), rng.randint(-4, size[1])
+                boxes.append((left, top, left + rng.randint(0, 12), top + rng.randint(0, 12)))
+            mask = sprite_detect.build_foreground_mask(img, threshold)
+            expected = [mask.crop(box).getbbox() is None for box in boxes]
+            self.assertEqual(sprite_detect.empty_cells(img, boxes, threshold, engine="pillow"), expected)
+            if sprite_detect.np is not None:
+                self.assertEqual(sprite_detect.empty_cells(img, boxes, threshold), expected)
+                self.assertEqual(sprite_detect.empty_cells(img, boxes, threshold, max_memory_mb=0), expected)
+
+    def test_check_is_bulk(self):
+        splitter = self._splitter(_partial_sheet())
+        with mock.patch.object(sprite_detect, "cells_empty", wraps=sprite_detect.cells_empty) as bulk:
+            splitter.split_by_grid(columns=4, rows=4, skip_empty=True)
+        self.assertEqual(bulk.call_count, 1)
+
+    def test_index_reused_across_grid_changes(self):
+        splitter = self._splitter(_partial_sheet())
+        with mock.patch.object(sprite_detect, "empty_cells_index", wraps=sprite_detect.empty_cells_index) as build:
+            for columns in (4, 2, 8):
+                sprites = splitter.split_by_grid(columns=columns, rows=columns, skip_empty=True)
+                self.assertTrue(sprites)
+            self.assertEqual(build.call_count, 1)
+            # 阈值变化或重新加载图片时重建
+            splitter.split_by_grid(columns=4, rows=4, skip_empty=True, alpha_threshold=20)
+            self.assertEqual(build.call_count, 2)
+            splitter._load_image()
+            splitter.split_by_grid(columns=4, rows=4, skip_empty=True, alpha_threshold=20)
+            self.assertEqual(build.call_count, 3)
+        self.assertEqual(len(splitter.sprites), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
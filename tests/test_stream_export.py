@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_stream
+@output 导出：streaming export tests
+@pos    按水平带流式解码导出（Data 模式延迟加载）与整图加载结果一致、已用完的带及时释放、延迟加载不受像素数上限限制的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import json
+import os
+import random
+import tempfile
+import unittest
+import weakref
+from unittest import mock
+
+from PIL import Image
+
+import sprite_stream
+from sprite_splitter import SpriteSplitter
+
+
+def _random_sheet(rng, mode, size):
+    channels = 1 if mode == "P" else len(mode)
+    # 平滑渐变混合噪声，让 PNG 编码器用到各种行滤波
+    data = bytes(
+        (x * 7 + y * 3) % 256 if rng.random() < 0.7 else rng.randrange(256)
+        for y in range(size[1]) for x in range(size[0] * channels)
+    )
+    if mode == "P":
+        img = Image.frombytes("L", size, data).convert("P")
+        img.putpalette([rng.randrange(256) for _ in range(768)])
+        img.info["transparency"] = bytes(rng.randrange(256) for _ in range(32))
+        return img
+    return Image.frombytes(mode, size, data)
+
+
+class StreamExportTests(unittest.TestCase):
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.dir = self._temp.name
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def test_band_crops_match_full_decode(self):
+        rng = random.Random(21)
+        for mode in ("L", "RGB", "P", "LA", "RGBA"):
+            path = os.path.join(self.dir, f"sheet_{mode}.png")
+            img = _random_sheet(rng, mode, (23, 41))
+            img.save(path, transparency=img.info["transparency"]) if mode == "P" else img.save(path)
+            with Image.open(path) as full:
+                reference = full.convert("RGBA")
+            boxes = [(-3, -2, 9, 7), (4, 10, 20, 30), (0, 35, 23, 45), (5, 0, 6, 41), (2, 50, 8, 60)]
+            for band_rows in (1, 5, 64):
+                crops = dict(sprite_stream.iter_sprite_crops(path, boxes, band_rows))
+                self.assertEqual(sorted(crops), list(range(len(boxes))))
+                for index, box in enumerate(boxes):
+                    self.assertEqual(crops[index].tobytes(), reference.crop(box).tobytes(), (mode, band_rows, box))
+
+    def test_consumed_bands_are_released(self):
+        path = os.path.join(self.dir, "tall.png")
+        _random_sheet(random.Random(2), "RGBA", (16, 200)).save(path)
+        boxes = [(0, y, 16, y + 10) for y in range(0, 200, 10)]
+
+        alive = []
+        original = sprite_stream.PngBandReader.bands
+
+        def tracked(reader):
+            for top, band in original(reader):
+                alive.append(weakref.ref(band))
+                yield top, band
+
+        with mock.patch.object(sprite_stream.PngBandReader, "bands", tracked):
+            peak = 0
+            for _ in sprite_stream.iter_sprite_crops(path, boxes, band_rows=8):
+                peak = max(peak, sum(1 for ref in alive if ref() is not None))
+        self.assertEqual(len(alive), 25)
+        self.assertLessEqual(peak, 3)
+
+    def test_deferred_export_matches_full_load(self):
+        image_path = os.path.join(self.dir, "sheet.png")
+        sheet = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
+        sheet.paste(_random_sheet(random.Random(5), "RGBA", (48, 40)), (8, 4))
+        sheet.save(image_path)
+        frames = {f"f{i}": {"frame": {"x": (i % 4) * 16, "y": (i // 4) * 16 - 2, "w": 16, "h": 20}} for i in range(16)}
+        data_path = os.path.join(self.dir, "sheet.json")
+        with open(data_path, "w", encoding="utf-8") as f:
+            json.dump({"frames": frames}, f)
+
+        full = SpriteSplitter(image_path)
+        full.split_by_data_file(data_path)
+        streamed = SpriteSplitter(image_path, defer_load=True)
+        self.assertIsNone(streamed.image)
+        streamed.split_by_data_file(data_path)
+
+        for index, kwargs in enumerate(({}, {"trim": True}, {"smart_edge_detect": True, "remove_bg": True})):
+            expected = full.save_sprites(os.path.join(self.dir, f"full{index}"), **kwargs)
+            actual = streamed.save_sprites(os.path.join(self.dir, f"stream{index}"), band_rows=7, **kwargs)
+            self.assertIsNone(streamed.image)
+            for a, b in zip(expected, actual):
+                with open(a, "rb") as fa, open(b, "rb") as fb:
+                    self.assertEqual(fa.read(), fb.read(), (kwargs, a))
+
+        full.export_data_file(os.path.join(self.dir, "full.json"))
+        streamed.export_data_file(os.path.join(self.dir, "stream.json"))
+        with open(os.path.join(self.dir, "full.json"), encoding="utf-8") as a, \
+                open(os.path.join(self.dir, "stream.json"), encoding="utf-8") as b:
+            self.assertEqual(json.load(a), json.load(b))
+
+    def test_deferred_load_skips_pixel_limit(self):
+        image_path = os.path.join(self.dir, "huge.png")
+        sheet = _random_sheet(random.Random(13), "RGBA", (64, 200))
+        sheet.save(image_path)
+        data_path = os.path.join(self.dir, "huge.json")
+        with open(data_path, "w", encoding="utf-8") as f:
+            json.dump({"sprites": [{"name": f"s{i}", "x": 0, "y": i * 20, "width": 64, "height": 20}
+                                   for i in range(10)]}, f)
+
+        # 整表超过像素数上限的 2 倍（Pillow 直接报错），单条带远低于上限
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 3000):
+            with self.assertRaises(Image.DecompressionBombError):
+                SpriteSplitter(image_path)
+            splitter = SpriteSplitter(image_path, defer_load=True)
+            self.assertEqual(splitter.image_size, (64, 200))
+            splitter.split_by_data_file(data_path)
+            paths = splitter.save_sprites(os.path.join(self.dir, "out"), band_rows=8)
+            self.assertIsNone(splitter.image)
+
+        for i, path in enumerate(paths):
+            with Image.open(path) as exported:
+                self.assertEqual(exported.tobytes(), sheet.crop((0, i * 20, 64, i * 20 + 20)).tobytes())
+
+    def test_unsupported_images_fall_back_to_full_load(self):
+        image_path = os.path.join(self.dir, "sheet.bmp")
+        _random_sheet(random.Random(8), "RGB", (20, 20)).save(image_path)
+        self.assertFalse(sprite_stream.is_streamable(image_path))
+
+        data_path = os.path.join(self.dir, "frames.json")
+        with open(data_path, "w", encoding="utf-8") as f:
+            json.dump({"sprites": [{"name": "a", "x": 0, "y": 0, "width": 10, "height": 10}]}, f)
+        splitter = SpriteSplitter(image_path, defer_load=True)
+        splitter.split_by_data_file(data_path)
+        splitter.save_sprites(os.path.join(self.dir, "out"))
+        self.assertIsNotNone(splitter.image)
+
+
+if __name__ == "__main__":
+    unittest.main()
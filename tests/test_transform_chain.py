@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter
+@output 导出：transform chain tests
+@pos    预编译逐精灵变换链（裁剪阶段合并为一次裁剪、剔除无效阶段）与逐步变换结果一致的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from sprite_splitter import SpriteSplitter, SpriteRect, _ExportPlan
+
+
+def _sheet():
+    """浅色分隔线隔开、单元格内带透明边的网格精灵表"""
+    rng = random.Random(24)
+    img = Image.new("RGBA", (86, 64), (255, 255, 255, 255))
+    for col in range(4):
+        for row in range(3):
+            x, y = 2 + col * 21, 2 + row * 21
+            img.paste((0, 0, 0, 0), (x, y, x + 19, y + 19))
+            left, top = x + rng.randint(0, 6), y + rng.randint(0, 6)
+            img.paste((rng.randrange(200), 90, 160, 255), (left, top, left + rng.randint(3, 12), top + rng.randint(3, 12)))
+    return img
+
+
+def _stepwise(splitter, sprite, edge_crop):
+    """逐阶段裁剪：固定裁边 → 智能边缘 → trim，每步产生一张中间图片"""
+    img = splitter._crop_sprite(sprite)
+    box = splitter._edge_crop_box(img.size, edge_crop)
+    if box:
+        img = img.crop(box)
+    box = splitter._smart_edge_box(img)
+    if box:
+        img = img.crop(box)
+    bbox = img.getbbox()
+    return img.crop(bbox) if bbox else img
+
+
+class TransformChainTests(unittest.TestCase):
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        path = os.path.join(self._temp.name, "sheet.png")
+        _sheet().save(path)
+        self.splitter = SpriteSplitter(path)
+        self.splitter.split_by_grid(columns=4, rows=3, margin=1, padding=0)
+        # 越界单元格：智能边缘检测走逐单元格回退
+        self.splitter.sprites.append(SpriteRect(x=70, y=50, width=24, height=20, name="edge"))
+
+    def tearDown(self):
+        self._temp.cleanup()
+
+    def test_fused_crops_match_stepwise(self):
+        for edge_crop in (0, 1, 3):
+            with mock.patch.object(SpriteSplitter, "_crop_box", autospec=True,
+                                   side_effect=SpriteSplitter._crop_box) as crop_box:
+                files = self.splitter.save_sprites(os.path.join(self._temp.name, f"out{edge_crop}"),
+                                                   edge_crop=edge_crop, smart_edge_detect=True, trim=True)
+            # 每个精灵只从精灵表裁剪一次（越界单元格回退时在取出的检测区域上继续裁剪）
+            self.assertEqual(crop_box.call_count, len(files))
+            for sprite, path in zip(self.splitter.sprites, files):
+                with Image.open(path) as saved:
+                    expected = _stepwise(self.splitter, sprite, edge_crop)
+                    self.assertEqual(saved.size, expected.size, (edge_crop, sprite.name))
+                    self.assertEqual(saved.convert("RGBA").tobytes(), expected.tobytes(), (edge_crop, sprite.name))
+
+    def test_noop_stages_are_dropped(self):
+        def chain(**options):
+            plan = dict(trim=False, edge_crop=-2, smart_edge=False, remove_bg=False, restore=False,
+                        origin_mode="top", resize_mode="none", resize_scale=1.0, resize_width=0,
+                        resize_height=0, pad_align="top_left", pad_smart=True)
+            plan.update(options)
+            return self.splitter._compile_transform(_ExportPlan(**plan))
+
+        self.assertEqual(chain().edge_crop, 0)
+        self.assertIsNone(chain(resize_mode="scale", resize_scale=1.0).resize)
+        self.assertIsNone(chain(resize_mode="width", resize_width=0).resize)
+        self.assertIsNotNone(chain(resize_mode="scale", resize_scale=2.0).resize)
+        self.assertIsNone(chain(resize_mode="none", smart_edge=False).separators)
+
+        img = Image.new("RGBA", (10, 10), (1, 2, 3, 4))
+        self.assertIs(self.splitter._resize_image(img, "width", 1.0, 10, 0), img)
+
+
+if __name__ == "__main__":
+    unittest.main()
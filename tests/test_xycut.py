@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+@input  依赖：Pillow, SpriteSplitter, sprite_detect
+@output 导出：xy-cut mode tests
+@pos    XY-Cut 递归切分模式的回归测试入口
+
+⚠️ 一旦本文件被更新，务必更新以上注释
+"""
+
+import os
+import tempfile
+import unittest
+
+from PIL import Image, ImageDraw
+
+import sprite_detect
+from sprite_splitter import SpriteSplitter
+
+
+class XYCutTests(unittest.TestCase):
+    def _engines(self):
+        return ["pillow"] + (["numpy"] if sprite_detect.np is not None else [])
+
+    def test_rows_of_irregular_cells_in_reading_order(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            img = Image.new("RGBA", (100, 60), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(img)
+            # 第一行：三个宽度不同的单元；第二行：两个单元，其中一个由两块不连通的部件组成
+            draw.rectangle((2, 2, 11, 20), fill=(255, 0, 0, 255))
+            draw.rectangle((20, 5, 49, 15), fill=(0, 255, 0, 255))
+            draw.rectangle((60, 2, 64, 22), fill=(0, 0, 255, 255))
+            draw.rectangle((5, 30, 40, 50), fill=(255, 255, 0, 255))
+            draw.rectangle((50, 30, 60, 35), fill=(0, 255, 255, 255))
+            draw.rectangle((50, 37, 60, 55), fill=(0, 255, 255, 255))
+            img.save(image_path)
+
+            expected = [
+                (2, 2, 10, 19),
+                (20, 5, 30, 11),
+                (60, 2, 5, 21),
+                (5, 30, 36, 21),
+                (50, 30, 11, 6),
+                (50, 37, 11, 19),
+            ]
+            for engine in self._engines():
+                splitter = SpriteSplitter(image_path)
+                sprites = splitter.split_by_xycut(engine=engine)
+                self.assertEqual([(s.x, s.y, s.width, s.height) for s in sprites], expected, engine)
+                self.assertEqual(sprites[0].name, "sprite_0000")
+
+                # 最小间隔 3px：第二行右侧两块之间只有 1px 间隔，不再切开
+                sprites = splitter.split_by_xycut(min_gap=3, engine=engine)
+                self.assertEqual([(s.x, s.y, s.width, s.height) for s in sprites][-1], (50, 30, 11, 26), engine)
+
+    def test_solid_background_sheet(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "sheet.png")
+            img = Image.new("RGBA", (40, 20), (250, 250, 250, 255))
+            draw = ImageDraw.Draw(img)
+            draw.rectangle((3, 3, 12, 15), fill=(10, 10, 10, 255))
+            draw.rectangle((20, 4, 35, 10), fill=(200, 0, 0, 255))
+            img.save(image_path)
+
+            sprites = SpriteSplitter(image_path).split_by_xycut(min_width=2, min_height=2)
+            self.assertEqual([(s.x, s.y, s.width, s.height) for s in sprites], [(3, 3, 10, 13), (20, 4, 16, 7)])
+
+
+if __name__ == "__main__":
+    unittest.main()